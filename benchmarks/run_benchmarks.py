@@ -0,0 +1,250 @@
+"""
+Offline benchmark harness for the Best Ball Rankings Agent.
+
+Runs the scraper and uploader stages against the local stand-in server and
+process_data against synthetic rosters, then reports timings and memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --only process --scales 1 10 100
+    python benchmarks/run_benchmarks.py --rows 300 5000 --repeat 5 --json results.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import logging
+import argparse
+import statistics
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from standin_server import StandInServer  # noqa: E402
+
+ETR_RANKINGS_URL = (
+    "https://establishtherun.com/etrs-top-300-for-draftkings-best-ball-rankings-updates-9am-daily/"
+)
+BASE_ROSTER_SIZE = 300
+
+
+def measure(func, repeat):
+    """
+    Time func over several runs, then record Python heap usage in one extra run.
+
+    Memory is traced separately because tracemalloc slows allocation-heavy code.
+
+    Args:
+        func (callable): Zero-argument function to benchmark
+        repeat (int): Number of timed runs
+
+    Returns:
+        dict: median/min/max seconds and peak traced memory in bytes
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'median_seconds': statistics.median(timings),
+        'min_seconds': min(timings),
+        'max_seconds': max(timings),
+        'peak_memory_bytes': peak,
+        'runs': repeat,
+    }
+
+
+def synthetic_roster(scale, seed=0):
+    """
+    Build scraped-style rows using real template players, sampled with replacement.
+
+    Args:
+        scale (int): Multiple of the daily 300-player roster
+        seed (int): Random seed
+
+    Returns:
+        list[dict]: Rows shaped like web_scraper.fetch_player_rankings output
+    """
+    from template_repository import get_template_repository
+
+    template = get_template_repository().get()
+    players = list(zip(template['Name'], template['Team'], template['Position'], template['ADP']))
+    rng = random.Random(seed)
+    rows = []
+    for rank in range(1, BASE_ROSTER_SIZE * scale + 1):
+        name, team, position, adp = rng.choice(players)
+        adp = rank if adp != adp else float(adp)
+        rows.append({
+            'name': f' {name} ',
+            'team': str(team),
+            'position': str(position),
+            'etr_rank': str(rank),
+            'etr_pos_rank': str(rank // 4 + 1),
+            'adp': f'{adp:.1f}',
+            'adp_pos_rank': str(rank // 4 + 1),
+            'adp_diff': f'{adp - rank:.1f}',
+        })
+    return rows
+
+
+def benchmark_process_data(scales, repeat):
+    """
+    Benchmark the pandas and pandas-free paths from scraped rows to upload CSV bytes.
+
+    process_data is also measured on its own for comparison with earlier results.
+    """
+    from data_processor import process_data, assemble_rankings
+    from draftkings_uploader import serialize_rankings_csv
+    from player_ranking import process_rankings_csv
+
+    def pandas_csv(rows):
+        return serialize_rankings_csv(assemble_rankings(process_data(rows)))
+
+    results = []
+    for scale in scales:
+        rows = synthetic_roster(scale)
+        # Warm the template caches so only processing is measured
+        if pandas_csv(rows) != process_rankings_csv(rows):
+            raise RuntimeError(f"Fast path CSV differs from the pandas path for {len(rows)} rows")
+        for name, func in (('process_data', process_data),
+                           ('process_data+assemble+csv', pandas_csv),
+                           ('process_rankings_csv', process_rankings_csv)):
+            result = measure(lambda: func(rows), repeat)
+            result.update({'benchmark': name, 'size': len(rows)})
+            results.append(result)
+    return results
+
+
+def benchmark_browser_stages(row_counts, repeat):
+    """Benchmark login, fetch_player_rankings, upload_csv_file and save_rankings."""
+    from browser_pool import BrowserPool
+    from web_scraper import login, fetch_player_rankings, FETCH_MODE_DOM, FETCH_MODE_NETWORK
+    from draftkings_api import RequestRecorder, replay_upload
+    from draftkings_uploader import (
+        DRAFTKINGS_LOGIN_MARKER,
+        login_to_draftkings,
+        navigate_to_rankings_page,
+        upload_csv_file,
+        save_rankings,
+    )
+
+    results = []
+    with StandInServer() as server, BrowserPool(headless=True) as pool:
+        def etr_login():
+            with pool.context() as context:
+                server.route_context(context)
+                login(context, 'benchmark', 'benchmark')
+
+        result = measure(etr_login, repeat)
+        result.update({'benchmark': 'login', 'size': None})
+        results.append(result)
+
+        for rows in row_counts:
+            server.state.set_rows(rows)
+            for mode in (FETCH_MODE_NETWORK, FETCH_MODE_DOM):
+                def fetch():
+                    with pool.context() as context:
+                        server.route_context(context)
+                        players = fetch_player_rankings(context.new_page(), ETR_RANKINGS_URL, mode)
+                        if len(players) != rows:
+                            raise RuntimeError(f"Expected {rows} rows, got {len(players)}")
+
+                result = measure(fetch, repeat)
+                result.update({'benchmark': f'fetch_player_rankings[{mode}]', 'size': rows})
+                results.append(result)
+
+        csv_bytes = b'ID,Name,Position,ADP,Team\n' + b''.join(
+            f'{i},Player {i},WR,{i}.0,SF\n'.encode() for i in range(1, 1201)
+        )
+        with pool.context() as context:
+            server.route_context(context)
+            page = context.new_page()
+            login_to_draftkings(page, 'benchmark', 'benchmark')
+
+            def upload():
+                navigate_to_rankings_page(page)
+                upload_csv_file(page, csv_bytes)
+
+            result = measure(upload, repeat)
+            result.update({'benchmark': 'upload_csv_file', 'size': 1200})
+            results.append(result)
+
+            result = measure(lambda: save_rankings(page), repeat)
+            result.update({'benchmark': 'save_rankings', 'size': None})
+            results.append(result)
+
+            # Capture one UI upload, then time replaying it over HTTP
+            navigate_to_rankings_page(page)
+            recorder = RequestRecorder(page)
+            upload_csv_file(page, csv_bytes)
+            save_rankings(page)
+            recipe = recorder.build_recipe(csv_bytes)
+            if recipe is None:
+                raise RuntimeError("Upload requests were not captured")
+
+            result = measure(
+                lambda: replay_upload(context, recipe, csv_bytes, DRAFTKINGS_LOGIN_MARKER), repeat
+            )
+            result.update({'benchmark': 'replay_upload', 'size': 1200})
+            results.append(result)
+    return results
+
+
+def format_results(results):
+    """Render benchmark results as a fixed-width table."""
+    lines = [f"{'benchmark':<34} {'size':>7} {'median':>10} {'min':>10} {'max':>10} "
+             f"{'peak mem':>10}"]
+    for result in results:
+        size = '' if result['size'] is None else str(result['size'])
+        lines.append(
+            f"{result['benchmark']:<34} {size:>7} "
+            f"{result['median_seconds'] * 1000:>8.1f}ms {result['min_seconds'] * 1000:>8.1f}ms "
+            f"{result['max_seconds'] * 1000:>8.1f}ms {result['peak_memory_bytes'] / 2**20:>8.1f}MB"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline benchmarks")
+    parser.add_argument("--only", choices=['process', 'browser'], help="Run only one group")
+    parser.add_argument("--scales", type=int, nargs='+', default=[1, 10, 100],
+                        help="Roster multiples of 300 players for process_data")
+    parser.add_argument("--rows", type=int, nargs='+', default=[300, 1000, 5000],
+                        help="Ninja table sizes for fetch_player_rankings")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # Stage logging would drown out the report
+    logging.disable(logging.WARNING)
+
+    results = []
+    if args.only in (None, 'process'):
+        results += benchmark_process_data(args.scales, args.repeat)
+    if args.only in (None, 'browser'):
+        results += benchmark_browser_stages(args.rows, args.repeat)
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Stand-in Server Module
+
+This module serves local stand-ins for the establishtherun.com login and rankings
+pages and the DraftKings rankings upload page, so the scraper and uploader can be
+benchmarked without touching the live sites.
+"""
+
+import json
+import random
+import http.client
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ETR_SESSION_COOKIE = 'wordpress_logged_in_standin'
+DK_SESSION_COOKIE = 'dk_session_standin'
+
+TEAMS = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB',
+         'HOU', 'IND', 'JAX', 'KC', 'LAC', 'LAR', 'LV', 'MIA', 'MIN', 'NE', 'NO', 'NYG',
+         'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS']
+POSITIONS = ['QB', 'RB', 'WR', 'TE']
+
+ETR_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Log In</title></head>
+<body class="login">
+<form name="loginform" id="loginform" action="/wp-login.php" method="post">
+  <input type="text" name="log" id="user_login">
+  <input type="password" name="pwd" id="user_pass">
+  <input type="submit" name="wp-submit" id="wp-submit" value="Log In">
+</form>
+</body></html>
+"""
+
+ETR_ADMIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Dashboard</title></head><body><h1>Dashboard</h1></body></html>
+"""
+
+# The table is filled from the ninja-tables AJAX endpoint, like the live plugin
+ETR_RANKINGS_PAGE = """<!DOCTYPE html>
+<html><head><title>ETR Top 300</title></head>
+<body>
+<table data-ninja_table_instance="ninja_table_instance_0">
+  <thead><tr><th>Player</th><th>Team</th><th>Pos</th><th>ETR Rank</th><th>ETR Pos Rank</th>
+  <th>ADP</th><th>ADP Pos Rank</th><th>ADP Diff</th></tr></thead>
+  <tbody></tbody>
+</table>
+<script>
+  fetch('/wp-admin/admin-ajax.php?action=wp_ajax_ninja_tables_public_action&table_id=1'
+        + '&target_action=get-all-data&default_sorting=old_first')
+    .then(response => response.json())
+    .then(rows => {
+      const body = document.querySelector('tbody');
+      const keys = ['player', 'team', 'pos', 'etr_rank', 'etr_pos_rank', 'adp',
+                    'adp_pos_rank', 'adp_diff'];
+      body.innerHTML = rows.map(row =>
+        '<tr>' + keys.map(key => '<td>' + row.value[key] + '</td>').join('') + '</tr>'
+      ).join('');
+    });
+</script>
+</body></html>
+"""
+
+DK_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>DraftKings Login</title></head>
+<body>
+<form action="/login" method="post">
+  <input type="text" name="EmailOrUsername">
+  <input type="password" name="Password">
+  <button type="submit">Log In</button>
+</form>
+</body></html>
+"""
+
+DK_LOBBY_PAGE = """<!DOCTYPE html>
+<html><head><title>Lobby</title></head><body><h1>Lobby</h1></body></html>
+"""
+
+DK_RANKINGS_PAGE = """<!DOCTYPE html>
+<html><head><title>Pre-Draft Rankings</title></head>
+<body>
+<button data-testid="csv-upload-download" onclick="show('menu')">CSV</button>
+<div id="menu" hidden><button onclick="show('dialog')">UPLOAD CSV</button></div>
+<div id="dialog" hidden>
+  <input type="file" id="file" accept=".csv" hidden>
+  <button onclick="document.getElementById('file').click()">Choose File</button>
+  <button id="upload">Upload</button>
+</div>
+<button id="save">SAVE RANKINGS</button>
+<p id="status"></p>
+<script>
+  function show(id) { document.getElementById(id).hidden = false; }
+  function status(text) { document.getElementById('status').textContent = text; }
+  document.getElementById('upload').onclick = async () => {
+    status('');
+    const file = document.getElementById('file').files[0];
+    if (!file) { status('No file selected'); return; }
+    const body = await file.text();
+    const response = await fetch('/draft/rankings/upload', {method: 'POST', body: body});
+    if (response.ok) {
+      status('Pre-Draft Rankings CSV uploaded successfully! ' +
+             'Please remember to save your rankings.');
+    } else {
+      status('Upload failed');
+    }
+  };
+  document.getElementById('save').onclick = async () => {
+    status('');
+    const response = await fetch('/draft/rankings/save', {method: 'POST'});
+    if (response.ok) { status('Your rankings have been saved successfully.'); }
+  };
+</script>
+</body></html>
+"""
+
+
+def synthetic_rankings(rows, seed=0):
+    """
+    Build synthetic ninja-tables rows.
+
+    Args:
+        rows (int): Number of players
+        seed (int): Random seed, so runs are comparable
+
+    Returns:
+        list[dict]: Rows shaped like the ninja-tables get-all-data payload
+    """
+    rng = random.Random(seed)
+    data = []
+    for rank in range(1, rows + 1):
+        adp = round(rank + rng.uniform(-15, 15), 1)
+        data.append({
+            'value': {
+                '___id___': rank,
+                'player': f'Player {rank}',
+                'team': rng.choice(TEAMS),
+                'pos': rng.choice(POSITIONS),
+                'etr_rank': str(rank),
+                'etr_pos_rank': str(rank // 4 + 1),
+                'adp': str(adp),
+                'adp_pos_rank': str(rank // 4 + 1),
+                'adp_diff': f'{adp - rank:.1f}',
+            }
+        })
+    return data
+
+
+class StandInState:
+    """Mutable state shared by the stand-in request handlers."""
+
+    def __init__(self, rows=300):
+        self.set_rows(rows)
+        self.uploads = []
+        self.saves = 0
+        self.lock = threading.Lock()
+
+    def set_rows(self, rows):
+        """Regenerate the ninja table payload with the given number of rows."""
+        self.rows = rows
+        self.payload = json.dumps(synthetic_rankings(rows)).encode('utf-8')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Routes requests for both stand-in sites by path prefix."""
+
+    server_version = 'StandIn/1.0'
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location, cookie=None):
+        headers = {'Location': location}
+        if cookie:
+            headers['Set-Cookie'] = f'{cookie}=1; Path=/'
+        self._send(302, headers=headers)
+
+    def _has_cookie(self, name):
+        return f'{name}=' in (self.headers.get('Cookie') or '')
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        if path == '/wp-login.php':
+            self._send(200, ETR_LOGIN_PAGE)
+        elif path == '/wp-admin/admin-ajax.php':
+            query = parse_qs(url.query)
+            if query.get('target_action') == ['get-all-data']:
+                self._send(200, self.state.payload, 'application/json')
+            else:
+                self._send(400, b'{}', 'application/json')
+        elif path.startswith('/wp-admin'):
+            if self._has_cookie(ETR_SESSION_COOKIE):
+                self._send(200, ETR_ADMIN_PAGE)
+            else:
+                self._redirect('/wp-login.php')
+        elif path.startswith('/etrs-top-300'):
+            self._send(200, ETR_RANKINGS_PAGE)
+        elif path == '/login':
+            self._send(200, DK_LOGIN_PAGE)
+        elif path == '/lobby':
+            self._send(200, DK_LOBBY_PAGE)
+        elif path.startswith('/draft/rankings'):
+            self._send(200, DK_RANKINGS_PAGE)
+        else:
+            self._send(404, 'Not Found', 'text/plain')
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        if path == '/wp-login.php':
+            self._redirect('/wp-admin/', cookie=ETR_SESSION_COOKIE)
+        elif path == '/login':
+            self._redirect('/lobby', cookie=DK_SESSION_COOKIE)
+        elif path == '/draft/rankings/upload':
+            with self.state.lock:
+                self.state.uploads.append(body)
+            self._send(200, b'{"ok": true}', 'application/json')
+        elif path == '/draft/rankings/save':
+            with self.state.lock:
+                self.state.saves += 1
+            self._send(200, b'{"ok": true}', 'application/json')
+        else:
+            self._send(404, 'Not Found', 'text/plain')
+
+
+class StandInServer:
+    """
+    Local HTTP server hosting both stand-in sites on one port.
+
+    Example:
+        with StandInServer(rows=300) as server:
+            server.route_context(context)
+            page = login(context, 'user', 'password')
+    """
+
+    # Live hosts mapped onto the stand-in server by route_context()
+    ROUTED_HOSTS = (
+        'establishtherun.com',
+        'myaccount.draftkings.com',
+        'www.draftkings.com',
+    )
+
+    def __init__(self, rows=300, host='127.0.0.1', port=0):
+        self.state = StandInState(rows)
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.state = self.state
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def route_context(self, context):
+        """
+        Serve the live hosts from the stand-in for a Playwright browser context.
+
+        Requests keep their original https URLs in the browser, so the production
+        URL checks in the scraper and uploader behave as they do live; any other
+        host is aborted.
+
+        Args:
+            context: Playwright browser context
+        """
+        host, port = self.httpd.server_address[:2]
+
+        def handle_route(route):
+            request = route.request
+            url = urlparse(request.url)
+            if url.hostname not in self.ROUTED_HOSTS:
+                route.abort()
+                return
+            path = url.path + (f'?{url.query}' if url.query else '')
+            # all_headers() includes the Cookie header the browser would have sent
+            headers = {name: value for name, value in request.all_headers().items()
+                       if not name.startswith(':')}
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            try:
+                connection.request(request.method, path, body=request.post_data_buffer,
+                                   headers=headers)
+                response = connection.getresponse()
+                route.fulfill(status=response.status, headers=dict(response.getheaders()),
+                              body=response.read())
+            finally:
+                connection.close()
+
+        context.route('**/*', handle_route)
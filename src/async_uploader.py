@@ -0,0 +1,324 @@
+"""
+Async Uploader Module
+
+This module uploads the same rankings CSV to several DraftKings accounts concurrently
+using the Playwright async API.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Error as PlaywrightError
+
+from draftkings_uploader import (
+    DRAFTKINGS_LOGIN_URL,
+    DRAFTKINGS_LOBBY_URL,
+    DRAFTKINGS_RANKINGS_URL,
+    DRAFTKINGS_LOGIN_MARKER,
+    INVALID_LOGIN_SELECTOR,
+    UPLOAD_SUCCESS_SELECTOR,
+    SAVE_SUCCESS_SELECTOR,
+    RANKINGS_READY_SELECTOR,
+    DraftKingsUploaderError,
+    DraftKingsAuthError,
+    build_upload_payload,
+    load_config,
+)
+from browser_profile import apply_profile_async, context_options, launch_args
+from diagnostics import capture_failure_async, start_tracing_async, stop_tracing_async
+from instrumentation import span
+from session_store import SessionStore, PROBE_TIMEOUT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_MAX_CONCURRENCY = 3
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2.0
+
+
+def load_accounts(config=None):
+    """
+    Load the DraftKings accounts to upload to.
+
+    Accounts come from the JSON file named by DRAFTKINGS_ACCOUNTS_FILE, a list of
+    {"username": ..., "password": ...} objects, plus the primary account from
+    DRAFTKINGS_USERNAME and DRAFTKINGS_PASSWORD. Duplicate usernames are dropped.
+
+    Args:
+        config (dict, optional): Configuration from draftkings_uploader.load_config
+
+    Returns:
+        list[tuple[str, str]]: (username, password) pairs
+
+    Raises:
+        DraftKingsUploaderError: If the accounts file cannot be read
+    """
+    config = config or load_config()
+    accounts = {}
+    if config.get('DRAFTKINGS_USERNAME') and config.get('DRAFTKINGS_PASSWORD'):
+        accounts[config['DRAFTKINGS_USERNAME']] = config['DRAFTKINGS_PASSWORD']
+
+    accounts_file = os.getenv('DRAFTKINGS_ACCOUNTS_FILE')
+    if accounts_file:
+        try:
+            with open(accounts_file) as f:
+                for account in json.load(f):
+                    accounts.setdefault(account['username'], account['password'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise DraftKingsUploaderError(f"Failed to read accounts file {accounts_file}: {str(e)}")
+    return list(accounts.items())
+
+
+async def _probe_session(context):
+    """Async counterpart of session_store.probe_session for the DraftKings rankings page."""
+    try:
+        response = await context.request.get(DRAFTKINGS_RANKINGS_URL, timeout=PROBE_TIMEOUT)
+        valid = response.ok and DRAFTKINGS_LOGIN_MARKER not in response.url
+        await response.dispose()
+    except Exception as e:
+        logging.warning(f"Session probe failed for {DRAFTKINGS_RANKINGS_URL}: {str(e)}")
+        return False
+    return valid
+
+
+async def login_to_draftkings(page, username, password):
+    """Log in to DraftKings."""
+    try:
+        await page.goto(DRAFTKINGS_LOGIN_URL, timeout=60000)
+        await page.fill('input[name="EmailOrUsername"]', username)
+        await page.fill('input[name="Password"]', password)
+        await page.click('button[type="submit"]')
+
+        # Wait for whichever comes first: the lobby redirect or the invalid login message
+        invalid_login = asyncio.ensure_future(
+            page.wait_for_selector(INVALID_LOGIN_SELECTOR, timeout=60000, state='attached')
+        )
+        redirected = asyncio.ensure_future(page.wait_for_url(DRAFTKINGS_LOBBY_URL, timeout=60000))
+        done, pending = await asyncio.wait([invalid_login, redirected],
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if redirected in done and redirected.exception() is None:
+            return
+        if invalid_login in done and invalid_login.exception() is None:
+            raise DraftKingsAuthError("Login to DraftKings failed. Invalid username or password.")
+        raise next(iter(done)).exception()
+    except PlaywrightTimeoutError:
+        raise DraftKingsUploaderError(f"Login to DraftKings timed out. Current URL: {page.url}")
+    except PlaywrightError as e:
+        raise DraftKingsUploaderError(f"Login to DraftKings failed: {str(e)}")
+
+
+async def _log_in_and_store(page, username, password, session_store):
+    session_store.clear()
+    logging.info(f"[{username}] Logging in to DraftKings")
+    with span('login_to_draftkings', page=page, account=username):
+        await login_to_draftkings(page, username, password)
+    session_store.save_state(await page.context.storage_state())
+
+
+async def ensure_logged_in(page, username, password, session_store):
+    """
+    Reuse a stored DraftKings session if it is still valid, otherwise log in and store it.
+
+    Returns:
+        bool: True if the stored session was reused, False after a fresh login
+    """
+    if await _probe_session(page.context):
+        logging.info(f"[{username}] Reusing stored DraftKings session")
+        return True
+    await _log_in_and_store(page, username, password, session_store)
+    return False
+
+
+async def navigate_after_login(page, username, password, session_store, session_reused):
+    """
+    Open the rankings page, logging in again once if a reused session is rejected.
+
+    Async counterpart of draftkings_uploader.run_first_step for the first upload step.
+    """
+    try:
+        await navigate_to_rankings_page(page)
+    except DraftKingsUploaderError as e:
+        if not session_reused:
+            raise
+        logging.warning(f"[{username}] Rankings page failed on the stored session ({str(e)}); "
+                        f"logging in again")
+        await page.context.clear_cookies()
+        await _log_in_and_store(page, username, password, session_store)
+        await navigate_to_rankings_page(page)
+
+
+async def navigate_to_rankings_page(page):
+    """Navigate to the rankings upload page."""
+    try:
+        await page.goto(DRAFTKINGS_RANKINGS_URL, wait_until='domcontentloaded')
+        await page.wait_for_selector(RANKINGS_READY_SELECTOR)
+    except PlaywrightTimeoutError:
+        raise DraftKingsUploaderError("Navigation to rankings page failed.")
+    except PlaywrightError as e:
+        raise DraftKingsUploaderError(f"Unexpected error during navigation: {str(e)}")
+
+
+async def upload_csv_file(page, payload):
+    """Upload a CSV path or in-memory file payload to DraftKings."""
+    try:
+        await page.click(RANKINGS_READY_SELECTOR)
+        await page.click('text="UPLOAD CSV"')
+
+        async with page.expect_file_chooser() as fc_info:
+            await page.click('text="Choose File"')
+        file_chooser = await fc_info.value
+        await file_chooser.set_files(payload)
+
+        await page.click('text="Upload"')
+        await page.wait_for_selector(UPLOAD_SUCCESS_SELECTOR, timeout=30000)
+    except PlaywrightTimeoutError:
+        raise DraftKingsUploaderError("CSV file upload failed or upload confirmation not received.")
+    except PlaywrightError as e:
+        raise DraftKingsUploaderError(f"Unexpected error during CSV upload: {str(e)}")
+
+
+async def save_rankings(page):
+    """Save the uploaded rankings."""
+    try:
+        await page.click('text="SAVE RANKINGS"')
+        await page.wait_for_selector(SAVE_SUCCESS_SELECTOR)
+    except PlaywrightTimeoutError:
+        raise DraftKingsUploaderError("Saving rankings failed.")
+
+
+async def _upload_once(browser, username, password, payload):
+    session_store = SessionStore(f'draftkings-{username}')
+    context = await browser.new_context(storage_state=session_store.load(), **context_options())
+    page = None
+    try:
+        await apply_profile_async(context)
+        await start_tracing_async(context)
+        page = await context.new_page()
+        session_reused = await ensure_logged_in(page, username, password, session_store)
+        with span('navigate_to_rankings_page', page=page, account=username):
+            await navigate_after_login(page, username, password, session_store, session_reused)
+        with span('upload_csv_file', page=page, account=username):
+            await upload_csv_file(page, payload)
+        with span('save_rankings', page=page, account=username):
+            await save_rankings(page)
+        await stop_tracing_async(context)
+    except (DraftKingsUploaderError, PlaywrightError) as e:
+        await capture_failure_async(page, f'draftkings_upload-{username}', e)
+        raise
+    finally:
+        await context.close()
+
+
+async def _upload_account(browser, semaphore, username, password, payload, max_attempts):
+    """Upload for one account with retries, returning a result dictionary."""
+    result = {'username': username, 'success': False, 'attempts': 0, 'error': None,
+              'exception': None, 'elapsed': 0.0}
+    start = time.monotonic()
+    async with semaphore:
+        for attempt in range(1, max_attempts + 1):
+            result['attempts'] = attempt
+            try:
+                await _upload_once(browser, username, password, payload)
+                result['success'] = True
+                result['error'] = None
+                result['exception'] = None
+                logging.info(f"[{username}] Rankings uploaded and saved successfully")
+                break
+            except DraftKingsAuthError as e:
+                result['error'] = str(e)
+                result['exception'] = e
+                logging.error(f"[{username}] {str(e)}")
+                break
+            except (DraftKingsUploaderError, PlaywrightError) as e:
+                result['error'] = str(e)
+                result['exception'] = e
+                if attempt == max_attempts:
+                    logging.error(f"[{username}] Upload failed after {attempt} attempts: {str(e)}")
+                    break
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logging.warning(f"[{username}] Upload attempt {attempt} failed: {str(e)}. "
+                                f"Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    result['elapsed'] = round(time.monotonic() - start, 3)
+    return result
+
+
+async def upload_rankings_async(accounts, rankings, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                                max_attempts=DEFAULT_MAX_ATTEMPTS, headless=True):
+    """
+    Upload a rankings CSV to several DraftKings accounts concurrently.
+
+    One browser is shared and each account gets its own context. At most
+    max_concurrency accounts are processed at once, and a failing account is retried
+    on its own without affecting the others.
+
+    Args:
+        accounts (list[tuple[str, str]]): (username, password) pairs
+        rankings (str, bytes or pd.DataFrame): CSV path, CSV bytes or processed rankings
+        max_concurrency (int): Maximum number of accounts uploading at once
+        max_attempts (int): Attempts per account before giving up
+        headless (bool): Whether to run Chromium headless
+
+    Returns:
+        list[dict]: One result per account with 'username', 'success', 'attempts',
+            'error', 'exception' (the last exception, so callers can tell rejected
+            credentials apart) and 'elapsed' keys, in the order of accounts
+    """
+    # Serialize once; every account uploads the same buffer
+    payload = build_upload_payload(rankings)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, args=launch_args())
+        try:
+            return await asyncio.gather(*(
+                _upload_account(browser, semaphore, username, password, payload, max_attempts)
+                for username, password in accounts
+            ))
+        finally:
+            await browser.close()
+
+
+def upload_rankings_for_accounts(accounts, rankings, **kwargs):
+    """
+    Synchronous entry point for upload_rankings_async.
+
+    The event loop runs in a worker thread so this can be called while a Playwright
+    sync API session (such as a BrowserPool) is active in the calling thread.
+
+    Args:
+        accounts (list[tuple[str, str]]): (username, password) pairs
+        rankings (str, bytes or pd.DataFrame): CSV path, CSV bytes or processed rankings
+        **kwargs: Options passed to upload_rankings_async
+
+    Returns:
+        list[dict]: Per-account results, see upload_rankings_async
+    """
+    outcome = {}
+
+    def run():
+        try:
+            outcome['results'] = asyncio.run(upload_rankings_async(accounts, rankings, **kwargs))
+        except BaseException as e:
+            outcome['error'] = e
+
+    worker = threading.Thread(target=run, name='draftkings-async-uploader')
+    worker.start()
+    worker.join()
+    if 'error' in outcome:
+        raise outcome['error']
+
+    results = outcome['results']
+    succeeded = sum(1 for result in results if result['success'])
+    logging.info(f"Uploaded rankings to {succeeded} of {len(results)} DraftKings accounts")
+    return results
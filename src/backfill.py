@@ -0,0 +1,175 @@
+"""
+Backfill Module
+
+This module normalizes archived ETR ranking CSVs in bulk: files are processed in
+parallel worker processes that each build the DraftKings template index once, and
+the results are written to one consolidated CSV and, optionally, the history store.
+"""
+
+import os
+import re
+import glob
+import logging
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_processor import DataProcessingError, clean_data, read_csv, transform_data
+from history_store import HistoryStoreError
+from template_repository import DEFAULT_TEMPLATE, get_template_repository
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SNAPSHOT_DATE_COLUMN = 'Snapshot Date'
+SOURCE_FILE_COLUMN = 'Source File'
+
+_DATE_IN_NAME = re.compile(r'(\d{4})[-_]?(\d{2})[-_]?(\d{2})')
+
+
+def discover_files(pattern):
+    """
+    Expand a directory or glob pattern into a sorted list of CSV files.
+
+    Args:
+        pattern (str): Directory (all *.csv files in it) or glob pattern; "**" recurses
+
+    Returns:
+        list[str]: Matching file paths
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+def snapshot_date(path):
+    """
+    Return the day a rankings export was taken.
+
+    Uses a YYYY-MM-DD (or YYYYMMDD) date in the file name, falling back to the file's
+    modification date.
+
+    Args:
+        path (str): CSV path
+
+    Returns:
+        date: Snapshot day
+    """
+    match = _DATE_IN_NAME.search(os.path.basename(path))
+    if match:
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            pass
+    return date.fromtimestamp(os.path.getmtime(path))
+
+
+def _init_worker(template):
+    """Process pool initializer: quiet logging and build the template index once."""
+    # A forked worker inherits the parent's handlers, which may feed a queue nobody reads
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    get_template_repository().index(template)
+
+
+def process_file(path, template=DEFAULT_TEMPLATE):
+    """
+    Normalize one archived CSV.
+
+    Args:
+        path (str): CSV path
+        template (str): Name of the DraftKings template to match player IDs against
+
+    Returns:
+        tuple[str, pd.DataFrame or None, str or None]: Path, processed rankings with
+            Snapshot Date and Source File columns, and the error message on failure
+    """
+    try:
+        df = transform_data(clean_data(read_csv(path)), template)
+        df.insert(0, SNAPSHOT_DATE_COLUMN, snapshot_date(path).isoformat())
+        df.insert(1, SOURCE_FILE_COLUMN, os.path.basename(path))
+        return path, df, None
+    except DataProcessingError as e:
+        return path, None, str(e)
+    except Exception as e:
+        return path, None, f"Unexpected error: {str(e)}"
+
+
+def backfill(pattern, output=None, template=DEFAULT_TEMPLATE, workers=None, history_store=None):
+    """
+    Normalize every CSV matching pattern in parallel and consolidate the results.
+
+    A failing file is reported and skipped; it never aborts the batch. If a worker
+    process dies, the files it left unfinished are reported as failed.
+
+    Args:
+        pattern (str): Directory or glob pattern of archived ETR CSVs
+        output (str, optional): Consolidated CSV to write, one row per player per snapshot
+        template (str): Name of the DraftKings template to match player IDs against
+        workers (int, optional): Worker processes, default one per CPU
+        history_store (HistoryStore, optional): Store to append each snapshot to
+
+    Returns:
+        dict: 'files', 'processed' and 'rows' counts, 'errors' (path -> message) and
+            'output' (path or None)
+
+    Raises:
+        DataProcessingError: If no files match the pattern
+    """
+    files = discover_files(pattern)
+    if not files:
+        raise DataProcessingError(f"No CSV files match {pattern}")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    logging.info(f"Backfilling {len(files)} files with {workers} worker(s)")
+
+    results = {}
+    errors = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template,)) as executor:
+        futures = {executor.submit(process_file, path, template): path for path in files}
+        for future in as_completed(futures):
+            try:
+                path, df, error = future.result()
+            except Exception as e:
+                # A crashed worker (BrokenProcessPool) or an unpicklable result
+                path, df = futures[future], None
+                error = f"Worker failed ({type(e).__name__}): {str(e)}"
+            if error is None:
+                results[path] = df
+            else:
+                errors[path] = error
+                logging.error(f"Failed to backfill {path}: {error}")
+
+    # Consolidate in file order so the output does not depend on scheduling
+    frames = [results[path] for path in files if path in results]
+    rows = sum(len(df) for df in frames)
+    if output and frames:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        pd.concat(frames, ignore_index=True).to_csv(output, index=False)
+        logging.info(f"Wrote {rows} rows from {len(frames)} files to {output}")
+
+    if history_store is not None:
+        for path, df in zip((path for path in files if path in results), frames):
+            if df.empty:
+                continue
+            try:
+                history_store.append(
+                    df.drop(columns=[SNAPSHOT_DATE_COLUMN, SOURCE_FILE_COLUMN]),
+                    source='etr', taken_on=df[SNAPSHOT_DATE_COLUMN].iloc[0],
+                )
+            except HistoryStoreError as e:
+                errors[path] = str(e)
+                logging.error(f"Failed to store {path} in history: {str(e)}")
+
+    logging.info(f"Backfill finished: {len(frames)} of {len(files)} files processed, "
+                 f"{len(errors)} failed")
+    return {
+        'files': len(files),
+        'processed': len(frames),
+        'rows': rows,
+        'errors': errors,
+        'output': output if output and frames else None,
+    }
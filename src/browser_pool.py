@@ -0,0 +1,140 @@
+"""
+Browser Pool Module
+
+This module owns a single Playwright Chromium process and hands out isolated browser
+contexts to the pipeline stages.
+"""
+
+import logging
+from contextlib import contextmanager
+
+from playwright.sync_api import sync_playwright
+
+from browser_profile import launch_args as profile_launch_args
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class BrowserPool:
+    """
+    Shared Chromium browser for the scrape and upload stages.
+
+    The browser is launched on first use and closed when the pool exits. Each stage,
+    site or account gets its own context, so cookies and storage stay isolated while
+    the browser process is shared. Like the Playwright sync API it wraps, a pool must
+    only be used from the thread that created it.
+
+    Example:
+        with BrowserPool(headless=True) as pool:
+            rankings = scraper_main(browser_pool=pool)
+            upload_rankings_to_draftkings(username, password, path, browser_pool=pool)
+    """
+
+    def __init__(self, headless=True, launch_args=None):
+        """
+        Args:
+            headless (bool): Whether to run Chromium headless
+            launch_args (list[str], optional): Chromium command-line arguments; defaults
+                to those of the configured browser profile
+        """
+        self.headless = headless
+        self.launch_args = list(profile_launch_args() if launch_args is None else launch_args)
+        self._playwright_manager = None
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def browser(self):
+        """The shared Chromium browser, launched on first access and relaunched if it died."""
+        if self._browser is not None and not self._browser.is_connected():
+            logging.warning("Shared Chromium browser disconnected; relaunching")
+            self.close()
+        if self._browser is None:
+            self._playwright_manager = sync_playwright()
+            self._playwright = self._playwright_manager.start()
+            self._browser = self._playwright.chromium.launch(
+                headless=self.headless, args=self.launch_args
+            )
+            logging.info("Launched shared Chromium browser")
+        return self._browser
+
+    def new_context(self, **kwargs):
+        """
+        Create a new isolated browser context.
+
+        The context is closed with the pool unless the caller closes it first.
+
+        Args:
+            **kwargs: Options passed to Browser.new_context
+
+        Returns:
+            BrowserContext: New Playwright browser context
+        """
+        context = self.browser.new_context(**kwargs)
+        self._contexts.append(context)
+        return context
+
+    @contextmanager
+    def context(self, **kwargs):
+        """
+        Context manager yielding a browser context that is closed on exit.
+
+        Args:
+            **kwargs: Options passed to Browser.new_context
+        """
+        context = self.new_context(**kwargs)
+        try:
+            yield context
+        finally:
+            self._close_context(context)
+
+    def close(self):
+        """Close all open contexts, the browser and Playwright."""
+        for context in list(self._contexts):
+            self._close_context(context)
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logging.warning(f"Error closing browser: {str(e)}")
+            finally:
+                self._browser = None
+                self._playwright_manager.__exit__(None, None, None)
+                self._playwright_manager = None
+                self._playwright = None
+                logging.info("Closed shared Chromium browser")
+
+    def _close_context(self, context):
+        if context in self._contexts:
+            self._contexts.remove(context)
+        try:
+            context.close()
+        except Exception as e:
+            logging.warning(f"Error closing browser context: {str(e)}")
+
+
+@contextmanager
+def borrowed_or_owned_pool(browser_pool=None, headless=True):
+    """
+    Yield the given pool, or a temporary pool owned for the duration of the block.
+
+    Lets stages accept an injected pool while still working stand-alone.
+
+    Args:
+        browser_pool (BrowserPool, optional): Pool owned by the caller
+        headless (bool): Headless setting for a temporary pool
+    """
+    if browser_pool is not None:
+        yield browser_pool
+        return
+    with BrowserPool(headless=headless) as pool:
+        yield pool
@@ -0,0 +1,208 @@
+"""
+Change Detector Module
+
+This module fingerprints processed rankings and compares them with the last
+successfully uploaded snapshot, so unchanged rankings can skip the upload.
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import hashlib
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_PATH = os.path.join(PROJECT_ROOT, '.cache', 'last_upload.json')
+
+# Columns that define the uploaded ranking; the row order defines the rank itself
+FINGERPRINT_COLUMNS = ['ID', 'Name', 'Position']
+
+
+def _text(value):
+    """Render a cell as text, with missing values (None, NaN, pd.NA) as empty strings."""
+    if value is None:
+        return ''
+    try:
+        if value != value:
+            return ''
+    except TypeError:
+        return ''
+    return str(value)
+
+
+def _snapshot_records(rankings):
+    """
+    Return the fingerprinted columns as a list of [ID, Name, Position] rows in rank order.
+
+    rankings is a processed DataFrame or the upload CSV bytes; both give the same rows
+    for the same upload, so switching processing engines does not look like a change.
+    """
+    if isinstance(rankings, bytes):
+        reader = csv.reader(io.StringIO(rankings.decode('utf-8-sig')))
+        header = next(reader, [])
+        columns = [header.index(col) for col in FINGERPRINT_COLUMNS if col in header]
+        return [[row[i] for i in columns] for row in reader]
+    columns = [col for col in FINGERPRINT_COLUMNS if col in rankings.columns]
+    return [[_text(value) for value in row]
+            for row in rankings[columns].itertuples(index=False, name=None)]
+
+
+def compute_fingerprint(rankings):
+    """
+    Compute a stable content hash of processed rankings.
+
+    The hash covers the row order and the ID, Name and Position of each row, so any
+    reordering, addition or removal changes it while display-only columns do not.
+
+    Args:
+        rankings (pd.DataFrame or bytes): Processed rankings, or the upload CSV
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    for record in _snapshot_records(rankings):
+        digest.update('\x1f'.join(record).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _player_key(record):
+    """Identify a player by DraftKings ID, falling back to name and position when unmatched."""
+    return record[0] or f'{record[1]}|{record[2]}'
+
+
+def diff_rankings(previous_records, current_records):
+    """
+    Compare two snapshots of [ID, Name, Position] rows in rank order.
+
+    Args:
+        previous_records (list[list[str]]): Rows of the previous snapshot
+        current_records (list[list[str]]): Rows of the current snapshot
+
+    Returns:
+        dict: 'moved' (name, old_rank, new_rank, change; largest moves first), 'added'
+            (name, rank) and 'removed' (name, rank) lists
+    """
+    previous = {_player_key(record): (rank, record)
+                for rank, record in enumerate(previous_records, 1)}
+    current = {_player_key(record): (rank, record)
+               for rank, record in enumerate(current_records, 1)}
+
+    moved = []
+    added = []
+    for key, (rank, record) in current.items():
+        if key not in previous:
+            added.append({'name': record[1], 'rank': rank})
+        elif previous[key][0] != rank:
+            old_rank = previous[key][0]
+            moved.append({'name': record[1], 'old_rank': old_rank, 'new_rank': rank,
+                          'change': old_rank - rank})
+    removed = [{'name': record[1], 'rank': rank}
+               for key, (rank, record) in previous.items() if key not in current]
+
+    moved.sort(key=lambda move: (-abs(move['change']), move['new_rank']))
+    return {'moved': moved, 'added': added, 'removed': removed}
+
+
+def summarize_diff(diff, limit=5):
+    """
+    Render a ranking diff as a short human-readable summary.
+
+    Args:
+        diff (dict): Result of diff_rankings
+        limit (int): Maximum number of moves to list
+
+    Returns:
+        str: One-line summary followed by the largest moves
+    """
+    lines = [f"{len(diff['moved'])} moved, {len(diff['added'])} added, "
+             f"{len(diff['removed'])} removed"]
+    for move in diff['moved'][:limit]:
+        lines.append(f"  {move['name']}: {move['old_rank']} -> {move['new_rank']} "
+                     f"({move['change']:+d})")
+    return '\n'.join(lines)
+
+
+class ChangeDetector:
+    """
+    Tracks the last successfully uploaded rankings snapshot on disk.
+
+    Call check() after processing to decide whether the upload can be skipped, and
+    record() only after the upload has succeeded.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        """
+        Args:
+            path (str): JSON file holding the last uploaded fingerprint and snapshot
+        """
+        self.path = path
+
+    def load(self):
+        """
+        Load the last uploaded snapshot.
+
+        Returns:
+            dict or None: Snapshot with 'fingerprint', 'uploaded_at' and 'records', or None
+        """
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable ranking snapshot {self.path}: {str(e)}")
+            return None
+
+    def check(self, df):
+        """
+        Compare processed rankings with the last uploaded snapshot.
+
+        Args:
+            df (pd.DataFrame or bytes): Processed rankings, or the upload CSV
+
+        Returns:
+            dict: 'changed' (bool), 'fingerprint' (str) and 'diff' (dict, or None when
+                there is no previous snapshot)
+        """
+        fingerprint = compute_fingerprint(df)
+        previous = self.load()
+        if previous is None:
+            logging.info("No previous ranking snapshot; treating rankings as changed")
+            return {'changed': True, 'fingerprint': fingerprint, 'diff': None}
+
+        changed = previous.get('fingerprint') != fingerprint
+        diff = (diff_rankings(previous.get('records', []), _snapshot_records(df))
+                if changed else None)
+        if changed:
+            logging.info(f"Rankings changed since last upload: {summarize_diff(diff)}")
+        else:
+            logging.info("Rankings unchanged since last upload")
+        return {'changed': changed, 'fingerprint': fingerprint, 'diff': diff}
+
+    def record(self, df):
+        """
+        Store processed rankings as the last successfully uploaded snapshot.
+
+        Args:
+            df (pd.DataFrame or bytes): Rankings that were just uploaded, or their CSV
+        """
+        snapshot = {
+            'fingerprint': compute_fingerprint(df),
+            'uploaded_at': time.time(),
+            'records': _snapshot_records(df),
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not store ranking snapshot {self.path}: {str(e)}")
@@ -0,0 +1,288 @@
+"""
+Command-Line Interface Module
+
+This module is the single entry point for running the pipeline or any one stage of
+it. Stages hand their results to each other as files, and each command imports only
+what its stages need, so quick operations such as reprocessing a saved CSV start
+without loading Playwright.
+
+Usage:
+    python src/cli.py scrape [-o scraped.json]
+    python src/cli.py process [-i scraped.json|rankings.csv] [-o processed.csv]
+                              [--date YYYY-MM-DD] [--engine fast]
+    python src/cli.py upload [-i processed.csv] [--force]
+    python src/cli.py run
+    python src/cli.py dry-run [-o processed.csv]
+    python src/cli.py backfill "archive/*.csv" [-o backfill.csv] [--history] [--workers N]
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from datetime import date
+
+from diagnostics import configure_logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'stages')
+SCRAPED_PATH = os.path.join(STAGE_DIR, 'scraped.json')
+PROCESSED_PATH = os.path.join(STAGE_DIR, 'processed.csv')
+
+def _load_env():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _headless():
+    return os.getenv('HEADLESS', 'True').lower() == 'true'
+
+
+def _iso_date(value):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a YYYY-MM-DD date, got {value!r}")
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ensure_parent(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+def write_scraped(scraped, path):
+    """Write scraped rows per source as JSON."""
+    _ensure_parent(path)
+    with open(path, 'w') as f:
+        json.dump(scraped, f)
+    logging.info(f"Wrote {sum(len(rows) for rows in scraped.values())} scraped rows to {path}")
+
+
+def read_scraped(path):
+    """
+    Read scraped rows written by the scrape command.
+
+    A plain list of rows is treated as ETR rankings.
+    """
+    with open(path) as f:
+        scraped = json.load(f)
+    return {'etr': scraped} if isinstance(scraped, list) else scraped
+
+
+def write_processed(rankings, path):
+    """Write processed rankings, or an upload CSV from the fast engine, to a file."""
+    from stages import upload_row_count
+
+    _ensure_parent(path)
+    if isinstance(rankings, bytes):
+        with open(path, 'wb') as f:
+            f.write(rankings)
+    else:
+        rankings.to_csv(path, index=False)
+    logging.info(f"Wrote {upload_row_count(rankings)} processed rankings to {path}")
+
+
+def scrape(args):
+    """Scrape the configured sources into a JSON file."""
+    from browser_pool import BrowserPool
+    from stages import scrape_rankings
+
+    with BrowserPool(headless=_headless()) as pool:
+        scraped = scrape_rankings(pool, headless=_headless())
+    write_scraped(scraped, args.output)
+    return 0
+
+
+def process(args):
+    """Process scraped JSON, or a rankings CSV, into the upload CSV."""
+    from stages import ENGINE_FAST, process_rankings, processing_engine
+
+    if (args.engine or processing_engine()) == ENGINE_FAST:
+        return process_fast(args)
+
+    if args.input.lower().endswith('.csv'):
+        # process_data reads CSV paths itself
+        scraped = {'etr': args.input}
+    else:
+        scraped = read_scraped(args.input)
+    # Only a dated run may write history; the input may be an old export
+    rankings = process_rankings(scraped, history=args.date is not None, taken_on=args.date)
+    write_processed(rankings, args.output)
+    return 0
+
+
+def process_fast(args):
+    """Process scraped JSON into the upload CSV without loading pandas."""
+    from stages import process_rankings_csv
+
+    if args.input.lower().endswith('.csv'):
+        logging.error("The fast engine reads scraped JSON; use --engine pandas for CSV input")
+        return 1
+    if args.date:
+        logging.warning("The fast engine does not record rankings history; ignoring --date")
+    write_processed(process_rankings_csv(read_scraped(args.input)), args.output)
+    return 0
+
+
+def _change_check(path):
+    from change_detector import ChangeDetector
+
+    # The detector reads the CSV itself, so checking a file does not load pandas
+    with open(path, 'rb') as f:
+        rankings = f.read()
+    detector = ChangeDetector()
+    return detector, rankings, detector.check(rankings)
+
+
+def upload(args):
+    """Upload a processed CSV to every configured DraftKings account."""
+    from async_uploader import load_accounts
+    from browser_pool import BrowserPool
+    from pipeline_runner import CheckpointStore
+    from stages import upload_rankings
+
+    accounts = load_accounts()
+    if not accounts:
+        logging.error("Missing required configuration for DraftKings upload. "
+                      "Please check your .env file or environment variables.")
+        return 1
+
+    detector, rankings, change = _change_check(args.input)
+    force = args.force or os.getenv('FORCE_UPLOAD', 'False').lower() == 'true'
+    if not change['changed'] and not force:
+        logging.info("Rankings unchanged since last upload. Skipping DraftKings upload.")
+        return 0
+
+    # A run ID per file content keeps manual uploads from resuming the pipeline's own
+    # progress, or the progress of an earlier file at the same path
+    checkpoints = CheckpointStore(run_id=f'cli-upload-{_file_digest(args.input)[:16]}')
+    with BrowserPool(headless=_headless()) as pool:
+        upload_rankings(accounts, args.input, pool, checkpoints, change['fingerprint'],
+                        headless=_headless())
+    checkpoints.clear()
+    detector.record(rankings)
+    logging.info(f"Uploaded {args.input} to {len(accounts)} DraftKings account(s)")
+    return 0
+
+
+def run(args):
+    """Run the full pipeline with retries and checkpoints."""
+    from main import main as run_pipeline
+
+    return 0 if run_pipeline() else 1
+
+
+def dry_run(args):
+    """Scrape and process, write the upload CSV and report what would change, without uploading."""
+    from browser_pool import BrowserPool
+    from change_detector import summarize_diff
+    from stages import scrape_rankings, process_scraped
+
+    with BrowserPool(headless=_headless()) as pool:
+        scraped = scrape_rankings(pool, headless=_headless())
+    write_scraped(scraped, args.scraped)
+    rankings = process_scraped(scraped)
+    write_processed(rankings, args.output)
+
+    _, _, change = _change_check(args.output)
+    if not change['changed']:
+        print("Rankings unchanged since last upload; nothing would be uploaded.")
+    elif change['diff'] is None:
+        print("No previous upload recorded; the full rankings would be uploaded.")
+    else:
+        print(f"Rankings would be uploaded:\n{summarize_diff(change['diff'])}")
+    return 0
+
+
+def backfill(args):
+    """Normalize archived ETR CSVs in parallel into one consolidated CSV."""
+    from backfill import backfill as run_backfill
+
+    history_store = None
+    if args.history:
+        from history_store import HistoryStore
+
+        history_store = HistoryStore()
+    report = run_backfill(args.pattern, output=args.output, workers=args.workers,
+                          history_store=history_store)
+    print(f"Processed {report['processed']} of {report['files']} files ({report['rows']} rows)")
+    for path, error in sorted(report['errors'].items()):
+        print(f"  FAILED {path}: {error}")
+    return 1 if report['errors'] else 0
+
+
+def build_parser():
+    from stages import ENGINES
+
+    parser = argparse.ArgumentParser(description="Best Ball Rankings Agent")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape_parser = subparsers.add_parser('scrape', help="Scrape rankings to a JSON file")
+    scrape_parser.add_argument('-o', '--output', default=SCRAPED_PATH, help="Scraped rows JSON")
+    scrape_parser.set_defaults(handler=scrape)
+
+    process_parser = subparsers.add_parser('process',
+                                           help="Process scraped rankings into the upload CSV")
+    process_parser.add_argument('-i', '--input', default=SCRAPED_PATH,
+                                help="Scraped rows JSON, or an ETR rankings CSV")
+    process_parser.add_argument('-o', '--output', default=PROCESSED_PATH, help="Upload CSV")
+    process_parser.add_argument('--date', type=_iso_date,
+                                help="Record the processed rankings in history for this day "
+                                     "(not recorded without it)")
+    process_parser.add_argument('--engine', choices=ENGINES,
+                                help="Processing engine (default: PROCESSING_ENGINE or pandas); "
+                                     "fast skips pandas and history for a single source")
+    process_parser.set_defaults(handler=process)
+
+    upload_parser = subparsers.add_parser('upload', help="Upload a processed CSV to DraftKings")
+    upload_parser.add_argument('-i', '--input', default=PROCESSED_PATH, help="Upload CSV")
+    upload_parser.add_argument('--force', action='store_true', help="Upload even if unchanged")
+    upload_parser.set_defaults(handler=upload)
+
+    run_parser = subparsers.add_parser('run', help="Run the full pipeline")
+    run_parser.set_defaults(handler=run)
+
+    dry_run_parser = subparsers.add_parser('dry-run', help="Scrape and process without uploading")
+    dry_run_parser.add_argument('--scraped', default=SCRAPED_PATH, help="Scraped rows JSON")
+    dry_run_parser.add_argument('-o', '--output', default=PROCESSED_PATH, help="Upload CSV")
+    dry_run_parser.set_defaults(handler=dry_run)
+
+    backfill_parser = subparsers.add_parser('backfill',
+                                            help="Normalize archived ETR CSVs in parallel")
+    backfill_parser.add_argument('pattern', help="Directory or glob pattern of CSV files")
+    backfill_parser.add_argument('-o', '--output', default=os.path.join(STAGE_DIR, 'backfill.csv'),
+                                 help="Consolidated CSV")
+    backfill_parser.add_argument('--history', action='store_true',
+                                 help="Also append each snapshot to the history store")
+    backfill_parser.add_argument('--workers', type=int,
+                                 help="Worker processes (default: one per CPU)")
+    backfill_parser.set_defaults(handler=backfill)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    _load_env()
+    try:
+        return args.handler(args)
+    except Exception as e:
+        logging.error(f"{args.command} failed: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
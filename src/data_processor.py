@@ -11,9 +11,13 @@ Data Processing Module
 This module handles data processing functionality using Pandas.
 """
 
+import numpy as np
 import pandas as pd
 import logging
 
+from instrumentation import span
+from template_repository import DEFAULT_TEMPLATE, TEMPLATE_COLUMNS, get_template_repository
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -42,12 +46,55 @@ def read_csv(file_path):
         logging.error(f"Error reading CSV file: {str(e)}")
         raise DataProcessingError(f"Failed to read CSV file: {str(e)}")
 
-def clean_data(df):
+# Typed schema applied by clean_data: string columns are stripped, categorical
+# columns use category dtype, and numeric columns are parsed straight to compact dtypes
+STRING_COLUMNS = ['name']
+CATEGORY_COLUMNS = ['team', 'position']
+NUMERIC_COLUMNS = {
+    'etr_rank': 'Int16',
+    'etr_pos_rank': 'Int16',
+    'adp': 'float32',
+    'adp_pos_rank': 'Int16',
+    'adp_diff': 'float32',
+}
+
+MERGE_WEIGHTED_MEAN = 'weighted_mean'
+MERGE_BORDA = 'borda'
+MERGE_METHODS = (MERGE_WEIGHTED_MEAN, MERGE_BORDA)
+# Player details carried over from the template or the source rankings
+DETAIL_COLUMNS = [col for col in TEMPLATE_COLUMNS if col != 'ID']
+
+def _strip_strings(values):
+    """Strip whitespace from the strings of a column and turn empty strings into missing values."""
+    series = pd.Series(values, dtype=object)
+    stripped = series.map(lambda value: value.strip() if isinstance(value, str) else value)
+    return stripped.mask(stripped == '')
+
+def _to_numeric(values, dtype):
+    """
+    Parse a column to the given numeric dtype, coercing invalid values to missing.
+
+    Columns may mix numbers and numeric strings; only the strings are stripped.
+    Integer columns that contain fractional values fall back to float32 rather than failing.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        numeric = pd.to_numeric(series, errors='coerce')
+    else:
+        numeric = pd.to_numeric(_strip_strings(series), errors='coerce')
+    if dtype == 'Int16' and not (numeric.dropna() % 1 == 0).all():
+        dtype = 'float32'
+    return numeric.astype(dtype)
+
+def clean_data(data):
     """
     Clean the data by handling inconsistencies and missing values.
 
+    Scraped records are parsed column by column into the typed schema without first
+    building an all-object DataFrame.
+
     Args:
-        df (pd.DataFrame): Input DataFrame
+        data (pd.DataFrame or list): Input DataFrame or list of dictionaries containing player data
 
     Returns:
         pd.DataFrame: Cleaned DataFrame
@@ -56,29 +103,44 @@ def clean_data(df):
         DataProcessingError: If there's an error during data cleaning
     """
     try:
-        # Remove any leading/trailing whitespace from string columns
-        df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+        if isinstance(data, pd.DataFrame):
+            columns = {col: data[col] for col in data.columns}
+        else:
+            keys = dict.fromkeys(key for record in data for key in record)
+            columns = {key: [record.get(key) for record in data] for key in keys}
+
+        missing = [col for col in NUMERIC_COLUMNS if col not in columns]
+        if missing:
+            raise DataProcessingError(f"Missing required columns: {', '.join(missing)}")
 
-        # Handle missing values (you may want to customize this based on your specific needs)
-        df = df.fillna('N/A')
+        cleaned = {}
+        for col, values in columns.items():
+            if col in NUMERIC_COLUMNS:
+                cleaned[col] = _to_numeric(values, NUMERIC_COLUMNS[col])
+            elif col in CATEGORY_COLUMNS:
+                cleaned[col] = _strip_strings(values).astype('category')
+            elif col in STRING_COLUMNS or not pd.api.types.is_numeric_dtype(pd.Series(values)):
+                cleaned[col] = _strip_strings(values)
+            else:
+                cleaned[col] = pd.Series(values)
 
-        # Ensure numeric columns are of the correct type
-        numeric_columns = ['etr_rank', 'etr_pos_rank', 'adp', 'adp_pos_rank', 'adp_diff']
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = pd.DataFrame(cleaned)
 
         logging.info("Data cleaning completed successfully")
         return df
+    except DataProcessingError:
+        raise
     except Exception as e:
         logging.error(f"Error during data cleaning: {str(e)}")
         raise DataProcessingError(f"Failed to clean data: {str(e)}")
 
-def transform_data(df):
+def transform_data(df, template=DEFAULT_TEMPLATE):
     """
     Transform the data to match DraftKings format.
 
     Args:
         df (pd.DataFrame): Input DataFrame
+        template (str): Name of the DraftKings template to match player IDs against
 
     Returns:
         pd.DataFrame: Transformed DataFrame
@@ -87,16 +149,8 @@ def transform_data(df):
         DataProcessingError: If there's an error during data transformation
     """
     try:
-        # Load DraftKings pre-draft rankings
-        dk_rankings = pd.read_csv('csv-templates/DkPreDraftRankings.csv')
-
-        # Function to find the closest matching player ID
-        def find_player_id(name, position):
-            matches = dk_rankings[(dk_rankings['Name'].str.contains(name, case=False, na=False)) & 
-                                  (dk_rankings['Position'] == position)]
-            if not matches.empty:
-                return matches.iloc[0]['ID']
-            return None
+        # Look up the cached DraftKings template index by name, position and team
+        player_index = get_template_repository().index(template)
 
         # Rename columns to match DraftKings format
         df = df.rename(columns={
@@ -110,14 +164,16 @@ def transform_data(df):
             'adp_diff': 'ADP Diff'
         })
 
-        # Add ID column by matching player names and positions
-        df['ID'] = df.apply(lambda row: find_player_id(row['Name'], row['Position']), axis=1)
+        # Add ID and match confidence columns by matching player names, positions and teams
+        ids, confidences = player_index.match_many(
+            df['Name'].tolist(), df['Position'].tolist(), df['Team'].tolist()
+        )
+        df['ID'] = pd.Series(ids, index=df.index, dtype=object)
+        df['Match Confidence'] = confidences
 
         # Reorder columns to match DraftKings format
-        df = df[['ID', 'Name', 'Position', 'ADP', 'Team', 'ETR Rank', 'ETR Pos Rank', 'ADP Pos Rank', 'ADP Diff']]
-
-        # Fill any missing values with empty strings
-        df = df.fillna('')
+        df = df[['ID', 'Name', 'Position', 'ADP', 'Team', 'ETR Rank', 'ETR Pos Rank',
+                 'ADP Pos Rank', 'ADP Diff', 'Match Confidence']]
 
         logging.info("Data transformation completed successfully")
         return df
@@ -125,12 +181,211 @@ def transform_data(df):
         logging.error(f"Error during data transformation: {str(e)}")
         raise DataProcessingError(f"Failed to transform data: {str(e)}")
 
-def process_data(data):
+def merge_rankings(frames, weights=None, method=MERGE_WEIGHTED_MEAN):
+    """
+    Merge processed rankings from several sources into one consensus ranking.
+
+    Players are aligned by DraftKings ID into a players x sources rank matrix. A player
+    missing from a source is placed just below that source's last ranked player.
+    "weighted_mean" orders players by weighted average rank; "borda" orders them by
+    weighted Borda points (sources with longer lists award more points). Sources
+    without any player matched to a DraftKings ID are left out with a warning.
+
+    Args:
+        frames (dict[str, pd.DataFrame]): Processed rankings per source name
+        weights (dict[str, float], optional): Weight per source, default 1.0
+        method (str): "weighted_mean" or "borda"
+
+    Returns:
+        pd.DataFrame: Consensus ranking with ID, Name, Position, ADP, Team, Consensus Rank,
+            Consensus Score, Sources and one "<source> Rank" column per merged source
+
+    Raises:
+        DataProcessingError: If no source has matched players, the method is unknown,
+            or a weight is negative or the weights sum to zero
+    """
+    if method not in MERGE_METHODS:
+        raise DataProcessingError(
+            f"Invalid merge method: {method}. Expected one of {', '.join(MERGE_METHODS)}."
+        )
+    frames = {name: df for name, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        raise DataProcessingError("No rankings to merge")
+    weights = {name: float((weights or {}).get(name, 1.0)) for name in frames}
+    invalid = [name for name, weight in weights.items() if not np.isfinite(weight) or weight < 0]
+    if invalid:
+        raise DataProcessingError(
+            f"Source weights must be non-negative numbers: {', '.join(invalid)}"
+        )
+
+    # Unmatched players cannot be aligned by ID and are dropped; a source without any
+    # matched player has no ranks to merge
+    matched_frames = {}
+    for name, df in frames.items():
+        matched = df[df['ID'].notna()].drop_duplicates('ID')
+        if matched.empty:
+            logging.warning(f"Leaving {name} out of the merge: none of its players "
+                            f"matched a DraftKings ID")
+            continue
+        matched_frames[name] = matched
+    if not matched_frames:
+        raise DataProcessingError("No source has players matched to DraftKings IDs")
+    if sum(weights[name] for name in matched_frames) == 0:
+        raise DataProcessingError(f"Source weights sum to zero: {', '.join(matched_frames)}")
+
+    try:
+        # Source rank per player ID
+        rank_columns = {}
+        for name, matched in matched_frames.items():
+            ranks = matched['ETR Rank'] if 'ETR Rank' in matched.columns else None
+            if ranks is None or ranks.isna().all():
+                ranks = pd.Series(range(1, len(matched) + 1), index=matched.index)
+            rank_columns[f'{name} Rank'] = pd.Series(
+                ranks.to_numpy(dtype='float64', na_value=np.nan), index=matched['ID'].to_numpy()
+            )
+        ranks = pd.DataFrame(rank_columns)
+
+        matrix = ranks.to_numpy(dtype='float64')
+        present = ~np.isnan(matrix)
+        depth = np.nanmax(matrix, axis=0)
+        filled = np.where(present, matrix, depth + 1)
+        weight_vector = np.array([weights[name] for name in matched_frames])
+
+        if method == MERGE_BORDA:
+            points = (depth + 1) - filled
+            score = points @ weight_vector / weight_vector.sum()
+            order = np.argsort(-score, kind='stable')
+        else:
+            score = filled @ weight_vector / weight_vector.sum()
+            order = np.argsort(score, kind='stable')
+
+        # Player details come from the first source that lists the player
+        details = pd.concat(
+            [matched.set_index('ID')[DETAIL_COLUMNS] for matched in matched_frames.values()]
+        )
+        details = details[~details.index.duplicated()].reindex(ranks.index)
+
+        merged = details.iloc[order].reset_index().rename(columns={'index': 'ID'})
+        merged['ID'] = merged['ID'].astype(object)
+        merged['Consensus Rank'] = np.arange(1, len(order) + 1)
+        merged['Consensus Score'] = np.round(score[order], 3)
+        merged['Sources'] = present[order].sum(axis=1)
+        for col in ranks.columns:
+            merged[col] = ranks[col].to_numpy()[order]
+
+        logging.info(f"Merged {len(matched_frames)} sources into {len(merged)} consensus rankings")
+        return merged
+    except Exception as e:
+        logging.error(f"Error during rankings merge: {str(e)}")
+        raise DataProcessingError(f"Failed to merge rankings: {str(e)}")
+
+def assemble_rankings(df, template=DEFAULT_TEMPLATE, rank_column=None):
+    """
+    Build the complete DraftKings upload: every template player exactly once, in rank order.
+
+    Ranked players come first, ordered by rank_column (ties and missing ranks keep
+    their row order). Template players without a rank follow by template ADP, then
+    template order, with players without ADP last. Player details come from the
+    template so they match what DraftKings expects; ranking columns are kept for
+    ranked players.
+
+    Args:
+        df (pd.DataFrame): Processed or merged rankings with an ID column
+        template (str): Name of the DraftKings template that defines the full player list
+        rank_column (str, optional): Column holding the rank; defaults to "Consensus Rank"
+            when present, otherwise "ETR Rank"
+
+    Returns:
+        pd.DataFrame: One row per template player in upload order
+
+    Raises:
+        DataProcessingError: If the rankings reference unknown IDs or the result is not a
+            complete, duplicate-free list of template IDs
+    """
+    template_df = get_template_repository().get(template)
+    template_ids = template_df['ID'].to_numpy()
+    if not template_df['ID'].is_unique:
+        raise DataProcessingError(f"Template {template} contains duplicate player IDs")
+    if rank_column is None:
+        rank_column = 'Consensus Rank' if 'Consensus Rank' in df.columns else 'ETR Rank'
+
+    unmatched = df['ID'].isna()
+    if unmatched.any():
+        names = ', '.join(df.loc[unmatched, 'Name'].astype(str).head(10))
+        logging.warning(f"{int(unmatched.sum())} ranked players have no DraftKings ID and are "
+                        f"placed by ADP instead: {names}")
+    ranked = df[~unmatched]
+
+    # Rank each ranked player, keeping the best rank of any duplicate
+    if rank_column in ranked.columns:
+        ranks = pd.to_numeric(ranked[rank_column], errors='coerce').to_numpy(
+            dtype='float64', na_value=np.inf)
+    else:
+        ranks = np.zeros(len(ranked))
+    order = np.lexsort((np.arange(len(ranked)), ranks))
+    ranked = ranked.iloc[order].drop_duplicates('ID')
+
+    positions = pd.Index(template_ids).get_indexer(ranked['ID'].to_numpy())
+    if (positions < 0).any():
+        unknown = ranked['ID'].to_numpy()[positions < 0][:10]
+        raise DataProcessingError(
+            f"{int((positions < 0).sum())} ranked IDs are not in template {template}: "
+            f"{', '.join(map(str, unknown))}"
+        )
+
+    # Sort key per template row: ranked rows by rank position, the rest after them by ADP
+    is_ranked = np.zeros(len(template_ids), dtype=bool)
+    is_ranked[positions] = True
+    primary = np.full(len(template_ids), np.inf)
+    primary[positions] = np.arange(len(positions))
+    adp = template_df['ADP'].to_numpy(dtype='float64', na_value=np.nan)
+    secondary = np.where(is_ranked, 0.0, np.nan_to_num(adp, nan=np.inf))
+    final_order = np.lexsort((np.arange(len(template_ids)), secondary, primary))
+
+    assembled = template_df.iloc[final_order][TEMPLATE_COLUMNS].reset_index(drop=True)
+    extra_columns = [col for col in df.columns if col not in TEMPLATE_COLUMNS]
+    if extra_columns:
+        assembled = assembled.merge(ranked.set_index('ID')[extra_columns], how='left',
+                                    left_on='ID', right_index=True)
+
+    validate_upload_ids(assembled['ID'], template_ids)
+    logging.info(f"Assembled {len(assembled)} rankings: {len(positions)} ranked, "
+                 f"{len(assembled) - len(positions)} placed by ADP")
+    return assembled
+
+def validate_upload_ids(ids, template_ids):
+    """
+    Check that an upload lists every template player exactly once.
+
+    Args:
+        ids (array-like): Player IDs in upload order
+        template_ids (array-like): Player IDs of the DraftKings template
+
+    Raises:
+        DataProcessingError: If any ID is missing, duplicated or not in the template
+    """
+    ids = pd.Series(ids)
+    if ids.isna().any():
+        raise DataProcessingError(f"{int(ids.isna().sum())} rows have no player ID")
+    duplicated = ids[ids.duplicated()].unique()
+    if len(duplicated):
+        raise DataProcessingError(f"Duplicate player IDs: {', '.join(map(str, duplicated[:10]))}")
+    template_index = pd.Index(template_ids)
+    unknown = ids[~ids.isin(template_index)].to_numpy()
+    missing = template_index.difference(ids)
+    if len(unknown) or len(missing):
+        raise DataProcessingError(
+            f"Upload does not match the template: {len(missing)} IDs missing, "
+            f"{len(unknown)} unknown"
+        )
+
+def process_data(data, template=DEFAULT_TEMPLATE):
     """
     Main function to process the data: read CSV or use provided data, clean, and transform.
 
     Args:
         data (str or list): Path to the CSV file or list of dictionaries containing player data
+        template (str): Name of the DraftKings template to match player IDs against
 
     Returns:
         pd.DataFrame: Processed DataFrame
@@ -139,15 +394,17 @@ def process_data(data):
         DataProcessingError: If there's an error during any step of data processing
     """
     try:
-        if isinstance(data, str):
-            df = read_csv(data)
-        elif isinstance(data, list):
-            df = pd.DataFrame(data)
-        else:
-            raise DataProcessingError(f"Invalid data type: {type(data)}. Expected str or list.")
-        
-        df = clean_data(df)
-        df = transform_data(df)
+        with span('clean_data') as record:
+            if isinstance(data, str):
+                df = clean_data(read_csv(data))
+            elif isinstance(data, list):
+                df = clean_data(data)
+            else:
+                raise DataProcessingError(f"Invalid data type: {type(data)}. Expected str or list.")
+            record['rows'] = len(df)
+
+        with span('transform_data', template=template):
+            df = transform_data(df, template)
         logging.info("Data processing completed successfully")
         return df
     except DataProcessingError as e:
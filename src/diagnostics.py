@@ -0,0 +1,365 @@
+"""
+Diagnostics Module
+
+This module keeps failure artifacts (page HTML, screenshot, Playwright trace) in a
+size-capped store on disk and routes logging through a queue, so neither failure
+handling nor log writes block the browser stages.
+"""
+
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import weakref
+import threading
+import logging.handlers
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIAGNOSTICS_DIR = os.path.join(PROJECT_ROOT, '.cache', 'diagnostics')
+LOG_DIR = os.path.join(PROJECT_ROOT, 'logs')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+DEFAULT_MAX_BYTES = 200 * 2**20
+DEFAULT_MAX_FAILURES = 50
+LOG_FILE_MAX_BYTES = 5 * 2**20
+LOG_FILE_BACKUPS = 5
+
+CAPTURE_TIMEOUT = 5000
+WRITE_QUEUE_SIZE = 8
+
+# Reads the title and the serialized document (what page.content() returns) in one
+# locator call, since page.title() and page.content() accept no timeout
+PAGE_SNAPSHOT_SCRIPT = """root => {
+    const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+    return [document.title, doctype + root.outerHTML];
+}"""
+
+
+def _env_flag(name, default='False'):
+    return os.getenv(name, default).lower() == 'true'
+
+
+class ArtifactStore:
+    """
+    Directory of failure artifacts, pruned oldest-first to stay within size and count caps.
+
+    Each failure gets its own directory holding info.json and whichever of
+    page.html.gz, screenshot.png and trace.zip could be captured.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, max_failures=None):
+        """
+        Args:
+            directory (str, optional): Store directory; defaults to DIAGNOSTICS_DIR
+                env or .cache/diagnostics
+            max_bytes (int, optional): Total size cap; defaults to DIAGNOSTICS_MAX_BYTES or 200 MB
+            max_failures (int, optional): Maximum failures kept; defaults to
+                DIAGNOSTICS_MAX_FAILURES or 50
+        """
+        self.directory = directory or os.getenv('DIAGNOSTICS_DIR', DIAGNOSTICS_DIR)
+        self.max_bytes = max_bytes or int(os.getenv('DIAGNOSTICS_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.max_failures = max_failures or int(os.getenv('DIAGNOSTICS_MAX_FAILURES',
+                                                          DEFAULT_MAX_FAILURES))
+
+    def new_failure_dir(self, label):
+        """Create and return a directory for one failure."""
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        millis = int(time.time() * 1000) % 1000
+        path = os.path.join(self.directory, f'{stamp}-{millis:03d}-{label}')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def write(self, failure_dir, info, html=None, screenshot=None):
+        """
+        Write captured artifacts into a failure directory, then prune the store.
+
+        Args:
+            failure_dir (str): Directory from new_failure_dir
+            info (dict): URL, title, error and capture time
+            html (str, optional): Page HTML, stored gzip-compressed
+            screenshot (bytes, optional): PNG screenshot
+        """
+        if html is not None:
+            with gzip.open(os.path.join(failure_dir, 'page.html.gz'), 'wt', encoding='utf-8') as f:
+                f.write(html)
+        if screenshot is not None:
+            with open(os.path.join(failure_dir, 'screenshot.png'), 'wb') as f:
+                f.write(screenshot)
+        with open(os.path.join(failure_dir, 'info.json'), 'w') as f:
+            json.dump(info, f, indent=2)
+        self.prune()
+
+    def _failures(self):
+        """Return (path, size) per failure directory, oldest first."""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        failures = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            size = 0
+            for root, _, files in os.walk(path):
+                for file_name in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file_name))
+                    except OSError:
+                        pass
+            failures.append((path, size))
+        return failures
+
+    def prune(self):
+        """Delete the oldest failures until the store is within its caps."""
+        failures = self._failures()
+        total = sum(size for _, size in failures)
+        while failures and (total > self.max_bytes or len(failures) > self.max_failures):
+            path, size = failures.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class _ArtifactWriter:
+    """Single background thread that compresses and writes artifacts off the hot path."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._run, name='diagnostics-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.drain)
+
+    def submit(self, task):
+        try:
+            self.queue.put_nowait(task)
+        except queue.Full:
+            logging.warning("Diagnostics writer is busy; dropping failure artifacts")
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            try:
+                task()
+            except Exception as e:
+                logging.warning(f"Could not write failure artifacts: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def drain(self, timeout=10):
+        """Wait up to timeout seconds for queued artifacts to be written."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_traced_contexts = weakref.WeakSet()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _ArtifactWriter()
+        return _writer
+
+
+def diagnostics_enabled():
+    """Return whether failure artifacts are captured (DIAGNOSTICS_ENABLED, default true)."""
+    return _env_flag('DIAGNOSTICS_ENABLED', 'True')
+
+
+def tracing_enabled():
+    """Return whether Playwright traces are recorded (DIAGNOSTICS_TRACE, default false)."""
+    return diagnostics_enabled() and _env_flag('DIAGNOSTICS_TRACE')
+
+
+def start_tracing(context):
+    """
+    Start recording a Playwright trace for a browser context when tracing is enabled.
+
+    The trace is only written if capture_failure is called for a page of the context;
+    stop_tracing discards it otherwise.
+
+    Args:
+        context: Playwright browser context
+    """
+    if tracing_enabled():
+        try:
+            context.tracing.start(screenshots=True, snapshots=True)
+            _traced_contexts.add(context)
+        except Exception as e:
+            logging.warning(f"Could not start Playwright tracing: {str(e)}")
+
+
+def stop_tracing(context, path=None):
+    """Stop a trace started by start_tracing, writing it to path or discarding it."""
+    if context not in _traced_contexts:
+        return
+    _traced_contexts.discard(context)
+    try:
+        if path:
+            context.tracing.stop(path=path)
+        else:
+            context.tracing.stop()
+    except Exception as e:
+        logging.warning(f"Could not stop Playwright tracing: {str(e)}")
+
+
+async def start_tracing_async(context):
+    """Async API version of start_tracing."""
+    if tracing_enabled():
+        try:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            _traced_contexts.add(context)
+        except Exception as e:
+            logging.warning(f"Could not start Playwright tracing: {str(e)}")
+
+
+async def stop_tracing_async(context, path=None):
+    """Async API version of stop_tracing."""
+    if context not in _traced_contexts:
+        return
+    _traced_contexts.discard(context)
+    try:
+        if path:
+            await context.tracing.stop(path=path)
+        else:
+            await context.tracing.stop()
+    except Exception as e:
+        logging.warning(f"Could not stop Playwright tracing: {str(e)}")
+
+
+def _failure_info(label, url, title, error):
+    return {
+        'label': label,
+        'url': url,
+        'title': title,
+        'error': f'{type(error).__name__}: {str(error)}' if error is not None else None,
+        'captured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def capture_failure(page, label, error=None, store=None):
+    """
+    Capture artifacts of a failed page and hand them to the background writer.
+
+    Only the browser round trips happen on the calling thread: the title and HTML
+    (read together) and the screenshot are each bounded by CAPTURE_TIMEOUT, and the
+    trace, if one is recording, is saved. Compression, writing and pruning run in
+    the background. Capture never raises.
+
+    Args:
+        page: Playwright page that failed
+        label (str): Short name of the failing step, used in the directory name
+        error (Exception, optional): The failure
+        store (ArtifactStore, optional): Store to write to
+
+    Returns:
+        str or None: Directory the artifacts are written to, or None if disabled
+    """
+    if page is None or not diagnostics_enabled():
+        return None
+    store = store or ArtifactStore()
+    try:
+        failure_dir = store.new_failure_dir(label)
+    except OSError as e:
+        logging.warning(f"Could not create diagnostics directory: {str(e)}")
+        return None
+
+    url = title = html = screenshot = None
+    try:
+        url = page.url
+        title, html = page.locator(':root').evaluate(PAGE_SNAPSHOT_SCRIPT,
+                                                     timeout=CAPTURE_TIMEOUT)
+        screenshot = page.screenshot(timeout=CAPTURE_TIMEOUT, full_page=False)
+    except Exception as e:
+        logging.warning(f"Partial failure capture for {label}: {str(e)}")
+    stop_tracing(page.context, os.path.join(failure_dir, 'trace.zip'))
+
+    info = _failure_info(label, url, title, error)
+    _get_writer().submit(lambda: store.write(failure_dir, info, html, screenshot))
+    logging.info(f"Failure artifacts for {label} saved to {failure_dir}")
+    return failure_dir
+
+
+async def capture_failure_async(page, label, error=None, store=None):
+    """Async API version of capture_failure."""
+    if page is None or not diagnostics_enabled():
+        return None
+    store = store or ArtifactStore()
+    try:
+        failure_dir = store.new_failure_dir(label)
+    except OSError as e:
+        logging.warning(f"Could not create diagnostics directory: {str(e)}")
+        return None
+
+    url = title = html = screenshot = None
+    try:
+        url = page.url
+        title, html = await page.locator(':root').evaluate(PAGE_SNAPSHOT_SCRIPT,
+                                                           timeout=CAPTURE_TIMEOUT)
+        screenshot = await page.screenshot(timeout=CAPTURE_TIMEOUT, full_page=False)
+    except Exception as e:
+        logging.warning(f"Partial failure capture for {label}: {str(e)}")
+    await stop_tracing_async(page.context, os.path.join(failure_dir, 'trace.zip'))
+
+    info = _failure_info(label, url, title, error)
+    _get_writer().submit(lambda: store.write(failure_dir, info, html, screenshot))
+    logging.info(f"Failure artifacts for {label} saved to {failure_dir}")
+    return failure_dir
+
+
+_listener = None
+
+
+def configure_logging(level=logging.INFO, log_file=None):
+    """
+    Route all logging through a queue to the console and a size-capped rotating file.
+
+    Log calls only enqueue records; a listener thread formats and writes them. Safe to
+    call more than once.
+
+    Args:
+        level (int): Root logging level
+        log_file (str, optional): Log file path; defaults to LOG_FILE or logs/best_ball_agent.log
+
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_file = log_file or os.getenv('LOG_FILE', os.path.join(LOG_DIR, 'best_ball_agent.log'))
+    os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    # Existing handlers (the console handler from basicConfig) move behind the queue
+    handlers = [handler for handler in root.handlers] or [logging.StreamHandler()]
+    for handler in handlers:
+        root.removeHandler(handler)
+        if handler.formatter is None:
+            handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, file_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
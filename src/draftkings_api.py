@@ -0,0 +1,166 @@
+"""
+DraftKings API Module
+
+This module captures the HTTP requests the DraftKings rankings page sends when a CSV
+is uploaded and saved through the UI, and replays them directly with the session
+cookies so later uploads take a couple of HTTP round trips instead of the UI flow.
+"""
+
+import base64
+import logging
+from urllib.parse import urlparse
+
+from session_store import SessionStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+UPLOAD_MODE_UI = 'ui'
+UPLOAD_MODE_API = 'api'
+UPLOAD_MODES = (UPLOAD_MODE_UI, UPLOAD_MODE_API)
+
+REPLAY_TIMEOUT = 30000
+RECIPE_VERSION = 1
+
+CAPTURED_METHODS = ('POST', 'PUT', 'PATCH')
+CAPTURED_RESOURCE_TYPES = ('xhr', 'fetch')
+CAPTURED_HOST_SUFFIX = 'draftkings.com'
+
+# Sent by the request context itself, or tied to the capturing connection
+EXCLUDED_HEADERS = ('cookie', 'content-length', 'host', 'connection', 'accept-encoding')
+
+
+class DraftKingsReplayError(Exception):
+    """Custom exception class for DraftKings API replay errors"""
+    pass
+
+
+def recipe_store(username):
+    """Return the encrypted store holding an account's captured upload requests."""
+    return SessionStore(f'draftkings-api-{username}')
+
+
+class RequestRecorder:
+    """
+    Records the state-changing XHR/fetch requests a page sends to DraftKings.
+
+    Example:
+        recorder = RequestRecorder(page)
+        upload_csv_file(page, payload)
+        save_rankings(page)
+        recipe = recorder.build_recipe(csv_bytes)
+    """
+
+    def __init__(self, page):
+        """
+        Args:
+            page: Playwright page to record; recording starts immediately
+        """
+        self.page = page
+        self.requests = []
+        page.on('requestfinished', self._on_request)
+
+    def _on_request(self, request):
+        host = urlparse(request.url).hostname or ''
+        if (request.method in CAPTURED_METHODS
+                and request.resource_type in CAPTURED_RESOURCE_TYPES
+                and host.endswith(CAPTURED_HOST_SUFFIX)):
+            self.requests.append(request)
+
+    def stop(self):
+        """Stop recording."""
+        self.page.remove_listener('requestfinished', self._on_request)
+
+    def build_recipe(self, csv_bytes):
+        """
+        Turn the recorded requests into a replayable recipe.
+
+        The recipe starts at the request whose body contains the uploaded CSV, which
+        becomes a template for the next CSV, and keeps the requests that followed it
+        (the save). Earlier requests are unrelated to the upload and are dropped.
+
+        Args:
+            csv_bytes (bytes): CSV that was uploaded while recording
+
+        Returns:
+            dict or None: Recipe, or None if no recorded request carried the CSV verbatim
+                (e.g. the page parsed it client-side) or a request did not succeed
+        """
+        self.stop()
+        steps = []
+        for request in self.requests:
+            body = request.post_data_buffer or b''
+            if not steps:
+                offset = body.find(csv_bytes) if csv_bytes else -1
+                if offset < 0:
+                    continue
+                step = {'prefix': _encode(body[:offset]),
+                        'suffix': _encode(body[offset + len(csv_bytes):])}
+            else:
+                step = {'body': _encode(body)}
+
+            response = request.response()
+            if response is None or not response.ok:
+                logging.info(f"Not capturing DraftKings requests: {request.method} {request.url} "
+                             f"returned {response.status if response else 'no response'}")
+                return None
+            step.update({
+                'method': request.method,
+                'url': request.url,
+                'headers': {name: value for name, value in request.all_headers().items()
+                            if not name.startswith(':') and name not in EXCLUDED_HEADERS},
+            })
+            steps.append(step)
+
+        if not steps:
+            logging.info("No DraftKings request carried the uploaded CSV; "
+                         "API replay is unavailable")
+            return None
+        logging.info(f"Captured {len(steps)} DraftKings upload requests for replay")
+        return {'version': RECIPE_VERSION, 'steps': steps}
+
+
+def _encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _decode(text):
+    return base64.b64decode(text.encode('ascii'))
+
+
+def replay_upload(context, recipe, csv_bytes, login_marker):
+    """
+    Upload and save rankings by replaying captured requests with the context's cookies.
+
+    Args:
+        context: Logged-in Playwright browser context
+        recipe (dict): Recipe from RequestRecorder.build_recipe
+        csv_bytes (bytes): CSV to upload
+        login_marker (str): Substring of the login page URL, to detect a lost session
+
+    Raises:
+        DraftKingsReplayError: If the recipe is unusable or any replayed request fails;
+            the caller should fall back to the UI flow
+    """
+    if not recipe or recipe.get('version') != RECIPE_VERSION or not recipe.get('steps'):
+        raise DraftKingsReplayError("No usable captured upload requests")
+
+    for step in recipe['steps']:
+        if 'body' in step:
+            body = _decode(step['body'])
+        else:
+            body = _decode(step['prefix']) + csv_bytes + _decode(step['suffix'])
+        try:
+            response = context.request.fetch(step['url'], method=step['method'],
+                                             headers=step['headers'], data=body,
+                                             timeout=REPLAY_TIMEOUT)
+        except Exception as e:
+            raise DraftKingsReplayError(f"{step['method']} {step['url']} failed: {str(e)}")
+        try:
+            if not response.ok or login_marker in response.url:
+                raise DraftKingsReplayError(
+                    f"{step['method']} {step['url']} returned HTTP {response.status}"
+                )
+        finally:
+            response.dispose()
+    logging.info(f"Replayed {len(recipe['steps'])} DraftKings upload requests")
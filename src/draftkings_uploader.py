@@ -1,72 +1,154 @@
 import logging
 import os
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import time
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import Error as PlaywrightError
 from dotenv import load_dotenv
 
+from browser_pool import borrowed_or_owned_pool
+from browser_profile import apply_profile, context_options
+from diagnostics import capture_failure, start_tracing, stop_tracing
+from instrumentation import span
+from session_store import SessionStore, probe_session
+from template_repository import TEMPLATE_COLUMNS
+from draftkings_api import (
+    UPLOAD_MODE_UI,
+    UPLOAD_MODE_API,
+    UPLOAD_MODES,
+    DraftKingsReplayError,
+    RequestRecorder,
+    recipe_store,
+    replay_upload,
+)
+
 # Configure logging
-log_format = '%(asctime)s - %(levelname)s - %(message)s'
-logging.basicConfig(level=logging.INFO, format=log_format)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DRAFTKINGS_LOGIN_URL = "https://myaccount.draftkings.com/login?returnPath=%2flobby"
+DRAFTKINGS_LOBBY_URL = "https://www.draftkings.com/lobby"
+DRAFTKINGS_RANKINGS_URL = "https://www.draftkings.com/draft/rankings/nfl"
+DRAFTKINGS_LOGIN_MARKER = "myaccount.draftkings.com/login"
+
+UPLOAD_FILE_NAME = 'DkPreDraftRankings.csv'
 
-# Create a file handler
-file_handler = logging.FileHandler('draftkings_uploader.log')
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter(log_format))
+INVALID_LOGIN_SELECTOR = 'text="Invalid username or password" >> visible=true'
+UPLOAD_SUCCESS_SELECTOR = (
+    'text="Pre-Draft Rankings CSV uploaded successfully! Please remember to save your rankings."'
+)
+SAVE_SUCCESS_SELECTOR = 'text="Your rankings have been saved successfully."'
+# The upload menu button is the only control needed on the rankings page
+RANKINGS_READY_SELECTOR = 'button[data-testid="csv-upload-download"]'
 
-# Get the root logger and add the file handler
-root_logger = logging.getLogger()
-root_logger.addHandler(file_handler)
+LOGIN_TIMEOUT = 60000
+LOGIN_POLL_INTERVAL = 250
 
 class DraftKingsUploaderError(Exception):
     """Custom exception for DraftKings uploader errors."""
     pass
 
+class DraftKingsAuthError(DraftKingsUploaderError):
+    """Raised when DraftKings rejects the account credentials; retrying will not help."""
+    pass
+
+class DraftKingsAccountsError(DraftKingsUploaderError):
+    """Raised when uploads to some accounts still failed after their own retries."""
+    pass
+
 def login_to_draftkings(page, username, password):
     """Log in to DraftKings."""
     try:
         logging.info("Attempting to log in to DraftKings...")
-        page.goto("https://myaccount.draftkings.com/login?returnPath=%2flobby", timeout=60000)
+        page.goto(DRAFTKINGS_LOGIN_URL, timeout=60000)
         logging.info("Login page loaded. Filling in credentials...")
         page.fill('input[name="EmailOrUsername"]', username)
         page.fill('input[name="Password"]', password)
         logging.info("Credentials filled. Submitting login form...")
         page.click('button[type="submit"]')
         logging.info("Waiting for login process to complete...")
-        
-        # Wait for either successful login redirect or error message
-        try:
-            login_result = page.wait_for_selector('text="Invalid username or password" >> visible=true', timeout=60000, state='attached')
-            
-            if login_result and login_result.is_visible():
-                logging.error("Login failed. Invalid username or password.")
-                raise DraftKingsUploaderError("Login to DraftKings failed. Invalid username or password.")
-            
-            # Check for successful login redirect
-            page.wait_for_url("https://www.draftkings.com/lobby", timeout=60000)
-            logging.info("Login successful. Redirected to lobby.")
-        except PlaywrightTimeoutError:
-            logging.error(f"Login process timed out. Current URL: {page.url}")
-            logging.error(f"Page title: {page.title()}")
-            logging.error(f"Page content: {page.content()}")
-            raise DraftKingsUploaderError("Login to DraftKings timed out. Please check the logs for more details.")
-        
+
+        # Wait for whichever comes first: the lobby redirect or the invalid login message
+        invalid_login = page.locator(INVALID_LOGIN_SELECTOR)
+        deadline = time.monotonic() + LOGIN_TIMEOUT / 1000
+        while not page.url.startswith(DRAFTKINGS_LOBBY_URL):
+            try:
+                if invalid_login.count():
+                    logging.error("Login failed. Invalid username or password.")
+                    raise DraftKingsAuthError(
+                        "Login to DraftKings failed. Invalid username or password.")
+            except PlaywrightError:
+                # The document is being replaced mid-navigation; check again on the next tick
+                pass
+            if time.monotonic() > deadline:
+                logging.error(f"Login process timed out. Current URL: {page.url}")
+                raise DraftKingsUploaderError(
+                    "Login to DraftKings timed out. Please check the logs for more details.")
+            page.wait_for_timeout(LOGIN_POLL_INTERVAL)
+        logging.info("Login successful. Redirected to lobby.")
+
+    except DraftKingsUploaderError:
+        raise
     except PlaywrightTimeoutError:
         logging.error(f"Timeout occurred. Current URL: {page.url}")
-        logging.error(f"Page title: {page.title()}")
-        logging.error(f"Page content: {page.content()}")
         raise DraftKingsUploaderError("Login to DraftKings timed out. Please check the logs for more details.")
     except Exception as e:
-        logging.error(f"Unexpected error during login: {str(e)}")
-        logging.error(f"Current URL: {page.url}")
-        logging.error(f"Page title: {page.title()}")
-        logging.error(f"Page content: {page.content()}")
+        logging.error(f"Unexpected error during login: {str(e)}. Current URL: {page.url}")
         raise DraftKingsUploaderError(f"Login to DraftKings failed: {str(e)}")
 
+def _log_in_and_store(page, username, password, session_store):
+    session_store.clear()
+    with span('login_to_draftkings', page=page):
+        login_to_draftkings(page, username, password)
+    session_store.save(page.context)
+
+def ensure_logged_in(page, username, password, session_store):
+    """
+    Reuse a stored DraftKings session if it is still valid, otherwise log in and store it.
+
+    Returns:
+        bool: True if the stored session was reused, False after a fresh login
+    """
+    if probe_session(page.context, DRAFTKINGS_RANKINGS_URL, DRAFTKINGS_LOGIN_MARKER):
+        logging.info("Reusing stored DraftKings session")
+        return True
+    _log_in_and_store(page, username, password, session_store)
+    return False
+
+def run_first_step(page, username, password, session_store, session_reused, step, *args):
+    """
+    Run the first step after ensure_logged_in, logging in again once if it fails on a
+    reused session.
+
+    The session probe is a plain HTTP request, so a session can pass it and still be
+    rejected by the site; the stored session is then dropped and replaced.
+
+    Args:
+        page: Playwright page
+        username (str): DraftKings username
+        password (str): DraftKings password
+        session_store (SessionStore): Store of this account's session
+        session_reused (bool): Result of ensure_logged_in
+        step (callable): Step to run with *args
+
+    Returns:
+        The result of step
+    """
+    try:
+        return step(*args)
+    except (DraftKingsUploaderError, DraftKingsReplayError) as e:
+        if not session_reused or isinstance(e, DraftKingsAuthError):
+            raise
+        logging.warning(f"First step failed on the stored DraftKings session ({str(e)}); "
+                        f"logging in again")
+        page.context.clear_cookies()
+        _log_in_and_store(page, username, password, session_store)
+        return step(*args)
+
 def navigate_to_rankings_page(page):
     """Navigate to the rankings upload page."""
     try:
         logging.info("Navigating to rankings page...")
-        page.goto("https://www.draftkings.com/draft/rankings/nfl")
-        page.wait_for_load_state('networkidle')
+        page.goto(DRAFTKINGS_RANKINGS_URL, wait_until='domcontentloaded')
+        page.wait_for_selector(RANKINGS_READY_SELECTOR)
         logging.info("Navigation to rankings page successful")
     except PlaywrightTimeoutError:
         logging.error("Navigation to rankings page failed")
@@ -75,20 +157,80 @@ def navigate_to_rankings_page(page):
         logging.error(f"Unexpected error during navigation: {str(e)}")
         raise DraftKingsUploaderError(f"Unexpected error during navigation: {str(e)}")
 
-def upload_csv_file(page, file_path):
-    """Upload the CSV file to DraftKings."""
+def serialize_rankings_csv(rankings):
+    """
+    Serialize processed rankings to DraftKings CSV bytes.
+
+    The DraftKings template columns come first, in template order, followed by any
+    other columns in their existing order.
+
+    Args:
+        rankings (pd.DataFrame): Processed rankings
+
+    Returns:
+        bytes: UTF-8 encoded CSV
+    """
+    columns = [col for col in TEMPLATE_COLUMNS if col in rankings.columns]
+    columns += [col for col in rankings.columns if col not in columns]
+    return rankings.to_csv(index=False, columns=columns).encode('utf-8')
+
+def build_upload_payload(rankings, name=UPLOAD_FILE_NAME):
+    """
+    Convert rankings into something the file chooser accepts without touching disk.
+
+    Args:
+        rankings (str, bytes or pd.DataFrame): Path to a CSV file, CSV bytes or processed rankings
+        name (str): File name reported to DraftKings for in-memory payloads
+
+    Returns:
+        str or dict: The path unchanged, or a Playwright file payload with name, mimeType and buffer
+    """
+    if isinstance(rankings, (str, os.PathLike)):
+        return rankings
+    if isinstance(rankings, dict):
+        return rankings
+    if isinstance(rankings, (bytes, bytearray)):
+        buffer = bytes(rankings)
+    elif hasattr(rankings, 'to_csv'):
+        buffer = serialize_rankings_csv(rankings)
+    else:
+        raise DraftKingsUploaderError(f"Unsupported rankings type: {type(rankings).__name__}")
+    return {'name': name, 'mimeType': 'text/csv', 'buffer': buffer}
+
+def payload_bytes(payload):
+    """Return the CSV bytes of an upload payload, reading the file for path payloads."""
+    if isinstance(payload, dict):
+        return payload['buffer']
+    with open(payload, 'rb') as f:
+        return f.read()
+
+def _describe_payload(payload):
+    if isinstance(payload, dict):
+        return f"{payload['name']} ({len(payload['buffer'])} bytes in memory)"
+    return str(payload)
+
+def upload_csv_file(page, rankings):
+    """
+    Upload the CSV file to DraftKings.
+
+    Args:
+        page: Playwright page on the rankings page
+        rankings (str, bytes, dict or pd.DataFrame): CSV path, CSV bytes, file payload or
+            processed rankings; anything but a path is streamed from memory
+    """
     try:
-        logging.info(f"Attempting to upload CSV file: {file_path}")
-        page.click('button[data-testid="csv-upload-download"]')
+        payload = build_upload_payload(rankings)
+        logging.info(f"Attempting to upload CSV file: {_describe_payload(payload)}")
+        page.click(RANKINGS_READY_SELECTOR)
         page.click('text="UPLOAD CSV"')
         
         with page.expect_file_chooser() as fc_info:
             page.click('text="Choose File"')
         file_chooser = fc_info.value
-        file_chooser.set_files(file_path)
+        file_chooser.set_files(payload)
         
         page.click('text="Upload"')
-        page.wait_for_selector('text="Pre-Draft Rankings CSV uploaded successfully! Please remember to save your rankings."', timeout=30000)
+        page.wait_for_selector(UPLOAD_SUCCESS_SELECTOR, timeout=30000)
         logging.info("CSV file uploaded successfully")
     except PlaywrightTimeoutError:
         logging.error("CSV file upload failed or upload confirmation not received")
@@ -102,29 +244,89 @@ def save_rankings(page):
     try:
         logging.info("Attempting to save rankings...")
         page.click('text="SAVE RANKINGS"')
-        page.wait_for_selector('text="Your rankings have been saved successfully."')
+        page.wait_for_selector(SAVE_SUCCESS_SELECTOR)
         logging.info("Rankings saved successfully")
     except PlaywrightTimeoutError:
         logging.error("Saving rankings failed")
         raise DraftKingsUploaderError("Saving rankings failed.")
 
-def upload_rankings_to_draftkings(username, password, csv_file_path):
-    """Main function to upload rankings to DraftKings."""
+def upload_rankings_to_draftkings(username, password, rankings, browser_pool=None, mode=None):
+    """
+    Main function to upload rankings to DraftKings.
+
+    rankings may be a CSV path, CSV bytes or a processed DataFrame; see upload_csv_file.
+    A fresh context is taken from browser_pool when one is given; otherwise a
+    temporary browser is launched for this upload.
+
+    In "api" mode the upload and save requests captured during the last UI upload are
+    replayed directly. The UI flow is used, and its requests captured, when nothing
+    has been captured yet or the replay fails.
+
+    Args:
+        username (str): DraftKings username
+        password (str): DraftKings password
+        rankings (str, bytes or pd.DataFrame): Rankings to upload
+        browser_pool (BrowserPool, optional): Shared browser pool
+        mode (str, optional): "ui" or "api"; defaults to DRAFTKINGS_UPLOAD_MODE
+    """
     config = load_config()
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=config.get('HEADLESS', True))
-        page = browser.new_page()
+    mode = mode or config['UPLOAD_MODE']
+    if mode not in UPLOAD_MODES:
+        raise DraftKingsUploaderError(
+            f"Invalid upload mode: {mode}. Expected one of {', '.join(UPLOAD_MODES)}."
+        )
+
+    payload = build_upload_payload(rankings)
+    session_store = SessionStore(f'draftkings-{username}')
+    with borrowed_or_owned_pool(browser_pool, headless=config.get('HEADLESS', True)) as pool, \
+            pool.context(storage_state=session_store.load(), **context_options()) as context:
+        apply_profile(context)
+        start_tracing(context)
+        page = context.new_page()
         try:
-            login_to_draftkings(page, username, password)
-            navigate_to_rankings_page(page)
-            upload_csv_file(page, csv_file_path)
-            save_rankings(page)
+            session_reused = ensure_logged_in(page, username, password, session_store)
+
+            recorder = None
+            if mode == UPLOAD_MODE_API:
+                csv_bytes = payload_bytes(payload)
+                recipes = recipe_store(username)
+                recipe = recipes.load()
+                if recipe:
+                    try:
+                        with span('replay_upload'):
+                            run_first_step(page, username, password, session_store,
+                                           session_reused, replay_upload, context, recipe,
+                                           csv_bytes, DRAFTKINGS_LOGIN_MARKER)
+                        logging.info("Rankings uploaded and saved successfully via API replay.")
+                        stop_tracing(context)
+                        return
+                    except DraftKingsReplayError as e:
+                        logging.warning(f"API replay failed, falling back to the upload UI: "
+                                        f"{str(e)}")
+                        recipes.clear()
+                    # The replay was the first step; the session was renewed if it failed
+                    session_reused = False
+
+            with span('navigate_to_rankings_page', page=page):
+                run_first_step(page, username, password, session_store, session_reused,
+                               navigate_to_rankings_page, page)
+            if mode == UPLOAD_MODE_API:
+                recorder = RequestRecorder(page)
+            with span('upload_csv_file', page=page):
+                upload_csv_file(page, payload)
+            with span('save_rankings', page=page):
+                save_rankings(page)
             logging.info("Rankings uploaded and saved successfully.")
+
+            if recorder is not None:
+                recipe = recorder.build_recipe(csv_bytes)
+                if recipe:
+                    recipes.save_state(recipe)
+            stop_tracing(context)
         except DraftKingsUploaderError as e:
             logging.error(f"Error uploading rankings: {str(e)}")
+            capture_failure(page, 'draftkings_upload', e)
             raise
-        finally:
-            browser.close()
 
 def load_config():
     """Load configuration from environment variables or .env file."""
@@ -133,7 +335,9 @@ def load_config():
         'DRAFTKINGS_USERNAME': os.getenv('DRAFTKINGS_USERNAME'),
         'DRAFTKINGS_PASSWORD': os.getenv('DRAFTKINGS_PASSWORD'),
         'CSV_FILE_PATH': os.getenv('CSV_FILE_PATH'),
-        'HEADLESS': os.getenv('HEADLESS', 'True').lower() == 'true'
+        'HEADLESS': os.getenv('HEADLESS', 'True').lower() == 'true',
+        'FORCE_UPLOAD': os.getenv('FORCE_UPLOAD', 'False').lower() == 'true',
+        'UPLOAD_MODE': os.getenv('DRAFTKINGS_UPLOAD_MODE', UPLOAD_MODE_UI).lower()
     }
 
 # The main function has been removed as it's no longer necessary.
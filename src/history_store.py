@@ -0,0 +1,310 @@
+"""
+History Store Module
+
+This module keeps every processed rankings snapshot in a local SQLite database and
+answers time-series questions about them: rank and ADP trajectories, biggest risers
+and fallers, and season-over-season comparisons.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from datetime import date
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join(PROJECT_ROOT, '.cache', 'history.sqlite3')
+
+# Queries read the database through a memory map instead of read() calls
+MMAP_SIZE = 256 * 2**20
+
+# Rank columns in order of preference: a merged ranking, then a single source
+RANK_COLUMNS = ['Consensus Rank', 'ETR Rank']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_on TEXT NOT NULL,
+    source TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    taken_at REAL NOT NULL,
+    players INTEGER NOT NULL,
+    UNIQUE (source, taken_on)
+);
+CREATE INDEX IF NOT EXISTS snapshots_season ON snapshots (source, season, taken_on);
+CREATE TABLE IF NOT EXISTS rankings (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    player_key TEXT NOT NULL,
+    player_id TEXT,
+    name TEXT NOT NULL,
+    position TEXT,
+    team TEXT,
+    rank INTEGER NOT NULL,
+    adp REAL,
+    PRIMARY KEY (snapshot_id, player_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rankings_player ON rankings (player_key, snapshot_id);
+"""
+
+
+def _ranks(df):
+    """
+    Return each row's rank as floats, from Consensus Rank or ETR Rank.
+
+    Rows without a rank are placed after the highest rank in row order; without
+    either column the row order is the rank.
+    """
+    column = next((col for col in RANK_COLUMNS if col in df.columns), None)
+    if column is None:
+        return np.arange(1, len(df) + 1, dtype='float64')
+    ranks = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    missing = np.isnan(ranks)
+    if missing.any():
+        highest = np.nanmax(ranks) if not missing.all() else 0.0
+        ranks[missing] = highest + np.arange(1, int(missing.sum()) + 1)
+    return ranks
+
+
+class HistoryStoreError(Exception):
+    """Custom exception class for history store errors"""
+    pass
+
+
+def _text(value):
+    """Render a cell as text, with missing values (None, NaN, pd.NA) as None."""
+    if value is None or pd.isna(value):
+        return None
+    return str(value)
+
+
+def _player_key(player_id, name, position):
+    """Identify a player by DraftKings ID, falling back to name and position when unmatched."""
+    return player_id or f'{name}|{position or ""}'
+
+
+def _iso(day):
+    return day.isoformat() if isinstance(day, date) else str(day)
+
+
+class HistoryStore:
+    """
+    Append-only store of daily rankings snapshots, one per source and day.
+
+    Each snapshot records every player's rank (the Consensus Rank or ETR Rank column,
+    or the row order when neither exists) and ADP. Storing a second snapshot for the
+    same source and day replaces the earlier one, so re-runs keep the latest rankings of the day.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): SQLite database file; defaults to HISTORY_DB_PATH or
+                .cache/history.sqlite3
+        """
+        self.path = path or os.getenv('HISTORY_DB_PATH', HISTORY_PATH)
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection with the schema in place, committing on success."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        try:
+            connection = sqlite3.connect(self.path)
+        except sqlite3.Error as e:
+            raise HistoryStoreError(f"Could not open history database {self.path}: {str(e)}")
+        try:
+            connection.execute('PRAGMA foreign_keys = ON')
+            connection.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+            if not self._initialized:
+                connection.execute('PRAGMA journal_mode = WAL')
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            with connection:
+                yield connection
+        except sqlite3.Error as e:
+            raise HistoryStoreError(f"History database error: {str(e)}")
+        finally:
+            connection.close()
+
+    def append(self, df, source='etr', taken_on=None, season=None):
+        """
+        Store processed rankings as the snapshot for a source and day.
+
+        Args:
+            df (pd.DataFrame): Processed or merged rankings, in any order
+            source (str): Rankings source name
+            taken_on (date or str, optional): Snapshot day, default today
+            season (int, optional): Season the snapshot belongs to, default the year of taken_on
+
+        Returns:
+            int: Snapshot ID
+
+        Raises:
+            HistoryStoreError: If the snapshot cannot be stored
+        """
+        taken_on = date.fromisoformat(_iso(taken_on)) if taken_on else date.today()
+        season = season or taken_on.year
+
+        ranks = _ranks(df)
+        # Best rank first, so the de-duplication below keeps a player's best rank
+        df = df.iloc[np.lexsort((np.arange(len(df)), ranks))]
+        ranks = np.sort(ranks, kind='stable')
+        adps = df['ADP'] if 'ADP' in df.columns else pd.Series(None, index=df.index)
+        teams = df['Team'] if 'Team' in df.columns else pd.Series(None, index=df.index)
+        rows = {}
+        for rank, player_id, name, position, team, adp in zip(
+                ranks, df['ID'], df['Name'], df['Position'], teams, adps):
+            player_id, name, position = _text(player_id), _text(name) or '', _text(position)
+            key = _player_key(player_id, name, position)
+            # Keep a player's best rank if a source lists them twice
+            if key not in rows:
+                rank = int(rank) if rank % 1 == 0 else float(rank)
+                adp = None if pd.isna(adp) else float(adp)
+                rows[key] = (key, player_id, name, position, _text(team), rank, adp)
+
+        with self._connect() as connection:
+            connection.execute('DELETE FROM snapshots WHERE source = ? AND taken_on = ?',
+                               (source, taken_on.isoformat()))
+            cursor = connection.execute(
+                'INSERT INTO snapshots (taken_on, source, season, taken_at, players) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (taken_on.isoformat(), source, season, time.time(), len(rows)),
+            )
+            snapshot_id = cursor.lastrowid
+            connection.executemany(
+                'INSERT INTO rankings '
+                '(snapshot_id, player_key, player_id, name, position, team, rank, adp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((snapshot_id, *row) for row in rows.values()),
+            )
+        logging.info(f"Stored {len(rows)} {source} rankings for {taken_on.isoformat()} in history")
+        return snapshot_id
+
+    def _query(self, sql, params=()):
+        with self._connect() as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def snapshots(self, source=None):
+        """
+        List stored snapshots.
+
+        Args:
+            source (str, optional): Only list snapshots of this source
+
+        Returns:
+            pd.DataFrame: taken_on, source, season and players per snapshot
+        """
+        sql = 'SELECT taken_on, source, season, players FROM snapshots'
+        params = ()
+        if source:
+            sql += ' WHERE source = ?'
+            params = (source,)
+        return self._query(sql + ' ORDER BY taken_on, source', params)
+
+    def trajectory(self, player, source='etr', start=None, end=None):
+        """
+        Rank and ADP of one player over time.
+
+        Args:
+            player (str): DraftKings ID, or "Name|Position" for unmatched players
+            source (str): Rankings source name
+            start (date or str, optional): First day to include
+            end (date or str, optional): Last day to include
+
+        Returns:
+            pd.DataFrame: taken_on, rank and adp, oldest first
+        """
+        return self._query(
+            'SELECT s.taken_on, r.rank, r.adp FROM rankings r '
+            'JOIN snapshots s ON s.id = r.snapshot_id '
+            'WHERE r.player_key = ? AND s.source = ? AND s.taken_on BETWEEN ? AND ? '
+            'ORDER BY s.taken_on',
+            (player, source, _iso(start or date.min), _iso(end or date.max)),
+        )
+
+    def _snapshot_on_or_before(self, connection, source, day):
+        row = connection.execute(
+            'SELECT id, taken_on FROM snapshots WHERE source = ? AND taken_on <= ? '
+            'ORDER BY taken_on DESC LIMIT 1',
+            (source, _iso(day)),
+        ).fetchone()
+        if row is None:
+            raise HistoryStoreError(f"No {source} snapshot on or before {_iso(day)}")
+        return row
+
+    def movers(self, start, end=None, source='etr', limit=10):
+        """
+        Biggest risers and fallers between two days.
+
+        Uses the latest snapshot on or before each day. Players missing from either
+        snapshot are left out.
+
+        Args:
+            start (date or str): Earlier day
+            end (date or str, optional): Later day, default the latest snapshot
+            source (str): Rankings source name
+            limit (int): Players per list
+
+        Returns:
+            dict: 'risers' and 'fallers' DataFrames with player_key, name, position,
+                old_rank, new_rank, change (positive means moved up) and adp_change
+
+        Raises:
+            HistoryStoreError: If either day has no snapshot
+        """
+        with self._connect() as connection:
+            old_id, _ = self._snapshot_on_or_before(connection, source, start)
+            new_id, _ = self._snapshot_on_or_before(connection, source, end or date.max)
+            changes = pd.read_sql_query(
+                'SELECT n.player_key, n.name, n.position, o.rank AS old_rank, n.rank AS new_rank, '
+                'o.rank - n.rank AS change, n.adp - o.adp AS adp_change '
+                'FROM rankings n JOIN rankings o '
+                'ON o.snapshot_id = ? AND o.player_key = n.player_key '
+                'WHERE n.snapshot_id = ?',
+                connection, params=(old_id, new_id),
+            )
+        return {
+            'risers': changes[changes['change'] > 0]
+            .sort_values(['change', 'new_rank'], ascending=[False, True]).head(limit)
+            .reset_index(drop=True),
+            'fallers': changes[changes['change'] < 0]
+            .sort_values(['change', 'new_rank'], ascending=[True, True]).head(limit)
+            .reset_index(drop=True),
+        }
+
+    def season_comparison(self, season, other_season, source='etr'):
+        """
+        Compare each player's final rank and ADP in two seasons.
+
+        Args:
+            season (int): Season to compare
+            other_season (int): Season to compare against, usually the previous one
+            source (str): Rankings source name
+
+        Returns:
+            pd.DataFrame: player_key, name, position, rank, adp, other_rank, other_adp
+                and rank_change (positive means ranked higher in season), ordered by rank.
+                Players missing from one season have empty values for it.
+        """
+        final = (
+            'SELECT r.player_key, r.name, r.position, r.rank, r.adp FROM rankings r '
+            'WHERE r.snapshot_id = (SELECT id FROM snapshots WHERE source = ? AND season = ? '
+            'ORDER BY taken_on DESC LIMIT 1)'
+        )
+        with self._connect() as connection:
+            current = pd.read_sql_query(final, connection, params=(source, season))
+            other = pd.read_sql_query(final, connection, params=(source, other_season))
+        other = other.rename(columns={'rank': 'other_rank', 'adp': 'other_adp'})
+        comparison = current.merge(other, on='player_key', how='outer', suffixes=('', '_other'))
+        comparison['name'] = comparison['name'].fillna(comparison.pop('name_other'))
+        comparison['position'] = comparison['position'].fillna(comparison.pop('position_other'))
+        comparison['rank_change'] = comparison['other_rank'] - comparison['rank']
+        return (comparison.sort_values(['rank', 'other_rank'], na_position='last')
+                .reset_index(drop=True))
@@ -0,0 +1,253 @@
+"""
+Instrumentation Module
+
+This module records structured timing spans for the pipeline stages and exports them
+as JSON lines and/or a Prometheus textfile.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; spans are recorded without memory figures there
+    resource = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+METRIC_PREFIX = 'best_ball_agent'
+
+
+def peak_rss_bytes():
+    """
+    Return the highest resident set size this Python process has reached so far.
+
+    The value only ever grows during the process lifetime, so it is not the memory
+    used by any one stage.
+
+    Returns:
+        int or None: Bytes, or None where the platform does not report it
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _PageMonitor:
+    """Counts response bytes and load events on a Playwright page or context while attached."""
+
+    def __init__(self, page):
+        self.page = page
+        self.network_bytes = 0
+        self.responses = 0
+        self.page_loads = 0
+        self.dom_content_loads = 0
+
+    def _on_response(self, response):
+        self.responses += 1
+        # Header lookup is local; response.body() would cost a protocol round trip
+        length = response.headers.get('content-length')
+        if length and length.isdigit():
+            self.network_bytes += int(length)
+
+    def _on_load(self, _page):
+        self.page_loads += 1
+
+    def _on_dom_content_loaded(self, _page):
+        self.dom_content_loads += 1
+
+    def attach(self):
+        self.page.on('response', self._on_response)
+        self.page.on('load', self._on_load)
+        self.page.on('domcontentloaded', self._on_dom_content_loaded)
+
+    def detach(self):
+        for event, handler in (('response', self._on_response), ('load', self._on_load),
+                               ('domcontentloaded', self._on_dom_content_loaded)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+
+class Instrumentation:
+    """
+    Collects stage spans for one pipeline run.
+
+    Each span records wall time, success, the peak RSS the process had reached when the
+    span ended (its lifetime peak, not the stage's own use) and, when given a Playwright
+    page, response bytes (from Content-Length), response count and load
+    events. Spans are exported by flush() to the configured sinks.
+    """
+
+    def __init__(self, jsonl_path=None, prometheus_path=None):
+        """
+        Args:
+            jsonl_path (str, optional): File to append one JSON object per span to
+            prometheus_path (str, optional): Prometheus textfile collector file to overwrite
+        """
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, page=None, **attributes):
+        """
+        Record a span around a block of work.
+
+        Args:
+            stage (str): Stage name, e.g. "login" or "upload_csv_file"
+            page: Optional Playwright page or browser context whose network traffic is
+                attributed to the span (load events are only counted for pages)
+            **attributes: Extra JSON-serializable fields stored on the span
+
+        Yields:
+            dict: The span record, which the block may add fields to
+        """
+        record = {'run_id': self.run_id, 'stage': stage, 'started_at': time.time()}
+        record.update(attributes)
+        monitor = _PageMonitor(page) if page is not None else None
+        if monitor:
+            monitor.attach()
+        start = time.perf_counter()
+        try:
+            yield record
+            record['success'] = True
+        except BaseException as e:
+            record['success'] = False
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['duration_seconds'] = round(time.perf_counter() - start, 6)
+            process_peak = peak_rss_bytes()
+            if process_peak is not None:
+                record['process_peak_rss_bytes'] = process_peak
+            if monitor:
+                monitor.detach()
+                record['network_bytes'] = monitor.network_bytes
+                record['responses'] = monitor.responses
+                record['page_loads'] = monitor.page_loads
+                record['dom_content_loads'] = monitor.dom_content_loads
+            with self._lock:
+                self.spans.append(record)
+            logging.debug(f"Span {stage}: {record['duration_seconds']:.3f}s")
+
+    def summary(self):
+        """
+        Return the total duration per stage for this run.
+
+        Returns:
+            dict[str, float]: Stage name to summed duration in seconds
+        """
+        totals = {}
+        with self._lock:
+            for record in self.spans:
+                totals[record['stage']] = (totals.get(record['stage'], 0.0)
+                                           + record['duration_seconds'])
+        return totals
+
+    def flush(self):
+        """Write the recorded spans to the configured sinks."""
+        with self._lock:
+            spans = list(self.spans)
+        if self.jsonl_path:
+            try:
+                with open(self.jsonl_path, 'a') as f:
+                    for record in spans:
+                        f.write(json.dumps(record, default=str) + '\n')
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {self.jsonl_path}: {str(e)}")
+        if self.prometheus_path:
+            self._write_prometheus(spans)
+
+    def _write_prometheus(self, spans):
+        # The textfile reflects the latest run; repeated stages are summed
+        metrics = {
+            'stage_duration_seconds': ('gauge', 'Wall time spent in the stage', 'duration_seconds'),
+            'stage_network_bytes': ('gauge', 'Response bytes seen during the stage',
+                                    'network_bytes'),
+            'stage_page_loads': ('gauge', 'Page load events during the stage', 'page_loads'),
+            'process_peak_rss_bytes': ('gauge', 'Lifetime peak RSS of the agent process '
+                                       'when the stage ended', 'process_peak_rss_bytes'),
+            'stage_success': ('gauge', '1 if every span of the stage succeeded', 'success'),
+        }
+        values = {}
+        for record in spans:
+            for name, (_, _, field) in metrics.items():
+                if field not in record:
+                    continue
+                key = (name, record['stage'])
+                value = float(record[field])
+                if field == 'success':
+                    values[key] = min(values.get(key, 1.0), value)
+                elif field == 'process_peak_rss_bytes':
+                    values[key] = max(values.get(key, 0.0), value)
+                else:
+                    values[key] = values.get(key, 0.0) + value
+
+        lines = []
+        for name, (metric_type, help_text, _) in metrics.items():
+            full_name = f'{METRIC_PREFIX}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            for (metric, stage), value in values.items():
+                if metric == name:
+                    lines.append(f'{full_name}{{stage="{stage}"}} {value:.15g}')
+        lines.append(f'# HELP {METRIC_PREFIX}_last_run_timestamp_seconds '
+                     f'Start time of the last run')
+        lines.append(f'# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge')
+        lines.append(f'{METRIC_PREFIX}_last_run_timestamp_seconds {self.started_at:.0f}')
+
+        try:
+            tmp_path = f'{self.prometheus_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, self.prometheus_path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {self.prometheus_path}: {str(e)}")
+
+
+_instrumentation = None
+
+
+def get_instrumentation():
+    """
+    Return the process-wide instrumentation, configured from the environment.
+
+    METRICS_JSONL_PATH and METRICS_PROMETHEUS_PATH select the sinks; with neither set
+    spans are still collected in memory but flush() writes nothing.
+
+    Returns:
+        Instrumentation: Shared instance for the current run
+    """
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = Instrumentation(
+            jsonl_path=os.getenv('METRICS_JSONL_PATH'),
+            prometheus_path=os.getenv('METRICS_PROMETHEUS_PATH'),
+        )
+    return _instrumentation
+
+
+def reset_instrumentation():
+    """Start a new run: the next get_instrumentation() call returns a fresh instance."""
+    global _instrumentation
+    _instrumentation = None
+
+
+def span(stage, page=None, **attributes):
+    """Shortcut for get_instrumentation().span(...)."""
+    return get_instrumentation().span(stage, page=page, **attributes)
@@ -2,58 +2,147 @@
 Main entry point for the Best Ball Rankings Agent
 """
 
-from web_scraper import main as scraper_main
-from data_processor import process_data
-from draftkings_uploader import upload_rankings_to_draftkings, load_config
+from draftkings_uploader import load_config
+from async_uploader import load_accounts
+from browser_pool import borrowed_or_owned_pool
+from change_detector import ChangeDetector
+from instrumentation import get_instrumentation, reset_instrumentation
+from pipeline_runner import PipelineRunner, PipelineStageError, classify_error
+from diagnostics import configure_logging
+from notifier import notify, run_event
+from stages import (
+    scrape_rankings, process_scraped, upload_rankings, load_upload_state, upload_row_count,
+)
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-import tempfile
-import os
+def upload_outcomes(accounts, checkpoints, fingerprint, error=None):
+    """
+    Report the upload result of each account from the upload checkpoint.
 
-def main():
+    Args:
+        accounts (list[tuple[str, str]]): Usernames and passwords
+        checkpoints (CheckpointStore): Checkpoints of this run, before they are cleared
+        fingerprint (str): Fingerprint of the uploaded rankings
+        error (str, optional): Upload stage error, given to accounts not marked done
+
+    Returns:
+        list[dict]: 'username', 'success' and 'error' per account
+    """
+    if error is None:
+        uploaded = {username for username, _ in accounts}
+    else:
+        uploaded = set(load_upload_state(checkpoints, fingerprint)['uploaded'])
+    return [
+        {'username': username, 'success': username in uploaded,
+         'error': None if username in uploaded else error}
+        for username, _ in accounts
+    ]
+
+def run_once(browser_pool=None, fresh=False, scraped=None):
+    """
+    Run the pipeline once: scrape, process and upload.
+
+    Each stage is retried on failure and checkpointed on success, so a rerun after a
+    failure resumes from the last completed stage.
+
+    Args:
+        browser_pool (BrowserPool, optional): Warm browser to reuse, e.g. from the
+            scheduler daemon; a new one is launched and closed when omitted
+        fresh (bool): Scrape again instead of resuming scrape and process checkpoints,
+            e.g. when the run was triggered by a change of the rankings page
+        scraped (dict[str, list[dict]], optional): Rows already scraped per source,
+            e.g. by the daemon's change poll; used as the scrape stage's output
+
+    Returns:
+        dict: 'success' (True if the rankings were uploaded or were already up to
+            date), and for a failed run 'failed_stage', 'error' and 'error_kind' (one
+            of the pipeline_runner ERROR_* kinds)
+    """
+    reset_instrumentation()
+    instrumentation = get_instrumentation()
+    succeeded = False
+    runner = change = failed_stage = error = error_kind = None
+    accounts = []
+    uploads = []
     try:
-        # Run the web scraper
-        scraped_data = scraper_main()
-        
-        if scraped_data:
-            # Process the scraped data
-            processed_data = process_data(scraped_data)
-            
-            if processed_data is not None:
-                logging.info(f"Processed {len(processed_data)} player rankings")
+        # Load configuration and launch one browser shared by the scrape and upload stages
+        config = load_config()
+        runner = PipelineRunner()
+        if fresh or scraped:
+            # Checkpoints from an earlier failed run hold the rankings before the change
+            for stage in ('scrape', 'process'):
+                runner.checkpoints.discard(stage)
+        if scraped:
+            # Seeded as the scrape checkpoint, so the stage resumes from it
+            runner.checkpoints.save('scrape', scraped)
+        with instrumentation.span('run'), \
+                borrowed_or_owned_pool(browser_pool, headless=config['HEADLESS']) as browser_pool:
+            # Scrape and process the configured rankings sources
+            scraped_data = runner.run_stage('scrape', scrape_rankings, browser_pool,
+                                            headless=config['HEADLESS'])
+            # A DataFrame, or the upload CSV bytes when PROCESSING_ENGINE=fast
+            processed_data = runner.run_stage('process', process_scraped, scraped_data)
+            logging.info(f"Processed {upload_row_count(processed_data)} player rankings")
+            if not isinstance(processed_data, bytes):
                 print(processed_data.head())  # Print the first few rows of processed data
-                
-                # Load configuration for DraftKings uploader
-                config = load_config()
-
-                # Create a temporary CSV file
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as temp_csv:
-                    processed_data.to_csv(temp_csv.name, index=False)
-                    temp_csv_path = temp_csv.name
-
-                # Upload processed data to DraftKings
-                if all([config['DRAFTKINGS_USERNAME'], config['DRAFTKINGS_PASSWORD']]):
-                    try:
-                        upload_rankings_to_draftkings(
-                            config['DRAFTKINGS_USERNAME'],
-                            config['DRAFTKINGS_PASSWORD'],
-                            temp_csv_path
-                        )
-                        logging.info("Data processing and uploading to DraftKings completed successfully.")
-                    finally:
-                        # Clean up the temporary file
-                        os.unlink(temp_csv_path)
-                else:
-                    logging.error("Missing required configuration for DraftKings upload. Please check your .env file or environment variables.")
+
+            # Skip the upload when the rankings match the last successful upload
+            change_detector = ChangeDetector()
+            change = change_detector.check(processed_data)
+
+            # Upload processed data to DraftKings, streaming the CSV from memory
+            accounts = load_accounts(config)
+            if not change['changed'] and not config['FORCE_UPLOAD']:
+                logging.info("Rankings unchanged since last upload. Skipping DraftKings upload.")
+                succeeded = True
+            elif accounts:
+                runner.run_stage('upload', upload_rankings, accounts, processed_data, browser_pool,
+                                 runner.checkpoints, change['fingerprint'],
+                                 headless=config['HEADLESS'], checkpoint=False)
+                uploads = upload_outcomes(accounts, runner.checkpoints, change['fingerprint'])
+                change_detector.record(processed_data)
+                succeeded = True
+                logging.info("Data processing and uploading to DraftKings completed successfully.")
             else:
-                logging.warning("Data processing failed.")
-        else:
-            logging.warning("No data was scraped. Skipping data processing and DraftKings upload.")
+                error = "Missing required configuration for DraftKings upload."
+                logging.error("Missing required configuration for DraftKings upload. "
+                              "Please check your .env file or environment variables.")
+        if succeeded:
+            runner.complete()
+    except PipelineStageError as e:
+        failed_stage, error, error_kind = e.stage, str(e.error), e.kind
+        if e.stage == 'upload':
+            uploads = upload_outcomes(accounts, runner.checkpoints, change['fingerprint'], error)
+        logging.error(f"Pipeline stopped at the {e.stage} stage: {str(e.error)}. "
+                      f"The next run resumes from the last checkpoint.")
     except Exception as e:
+        error, error_kind = str(e), classify_error(e)
         logging.error(f"An error occurred in the main function: {str(e)}")
+    finally:
+        summary = instrumentation.summary()
+        timings = ', '.join(f"{stage}={seconds:.2f}s" for stage, seconds in summary.items())
+        logging.info(f"Stage timings: {timings}")
+        instrumentation.flush()
+        # Only queued here; a background thread sends it
+        try:
+            notify(run_event(succeeded, summary, change, uploads, failed_stage, error))
+        except Exception as e:
+            logging.warning(f"Could not queue run notification: {str(e)}")
+    return {'success': succeeded, 'failed_stage': failed_stage, 'error': error,
+            'error_kind': error_kind}
+
+def main(browser_pool=None, fresh=False):
+    """
+    Run the pipeline once; see run_once.
+
+    Returns:
+        bool: True if the rankings were uploaded or were already up to date
+    """
+    return run_once(browser_pool, fresh)['success']
 
 if __name__ == "__main__":
+    configure_logging()
     main()
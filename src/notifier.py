@@ -0,0 +1,308 @@
+"""
+Notifier Module
+
+This module reports run results (stage timings, the ranking diff and the outcome of
+each upload) to Slack, a generic HTTP endpoint and/or a local file. Events are queued
+and sent by a background thread in batches with retries, so a slow or unreachable
+endpoint never delays or fails the pipeline.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+import threading
+
+import requests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_MAX_BATCH = 20
+DEFAULT_BATCH_WINDOW = 1.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_FLUSH_TIMEOUT = 5.0
+HTTP_TIMEOUT = 5
+RETRY_BASE_DELAY = 0.5
+DIFF_MOVES_LIMIT = 5
+
+
+class NotifierError(Exception):
+    """Custom exception class for notification sink errors"""
+    pass
+
+
+class SlackWebhookSink:
+    """Posts a batch of events as one message to a Slack incoming webhook."""
+
+    name = 'slack'
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events):
+        text = '\n\n'.join(format_event(event) for event in events)
+        _post_json(self.url, {'text': text}, self.timeout)
+
+
+class HttpSink:
+    """Posts a batch of events as JSON ({"events": [...]}) to an HTTP endpoint."""
+
+    name = 'http'
+
+    def __init__(self, url, headers=None, timeout=HTTP_TIMEOUT):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def send(self, events):
+        _post_json(self.url, {'events': events}, self.timeout, self.headers)
+
+
+class FileSink:
+    """Appends each event as one JSON line to a local file."""
+
+    name = 'file'
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event, default=str) + '\n')
+        except OSError as e:
+            raise NotifierError(f"Could not write notifications to {self.path}: {str(e)}") from e
+
+
+def _post_json(url, payload, timeout, headers=None):
+    try:
+        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        raise NotifierError(f"Could not reach {url}: {str(e)}") from e
+    if response.status_code >= 300:
+        raise NotifierError(f"{url} returned HTTP {response.status_code}: {response.text[:200]}")
+
+
+def format_event(event):
+    """
+    Render a run event as a short human-readable message.
+
+    Args:
+        event (dict): Event from run_event
+
+    Returns:
+        str: Message text
+    """
+    status = 'succeeded' if event.get('success') else 'FAILED'
+    lines = [f"Best ball rankings run {status}"]
+    if event.get('error'):
+        stage = f" at the {event['failed_stage']} stage" if event.get('failed_stage') else ''
+        lines.append(f"Error{stage}: {event['error']}")
+    if event.get('timings'):
+        lines.append('Stages: ' + ', '.join(f"{stage}={seconds:.2f}s"
+                                            for stage, seconds in event['timings'].items()))
+    if event.get('changes'):
+        lines.append(f"Rankings: {event['changes']}")
+    for upload in event.get('uploads', []):
+        outcome = 'uploaded' if upload['success'] else f"failed ({upload.get('error')})"
+        lines.append(f"  {upload['username']}: {outcome}")
+    return '\n'.join(lines)
+
+
+def run_event(success, timings=None, change=None, uploads=None, failed_stage=None, error=None):
+    """
+    Build the notification event for one pipeline run.
+
+    Args:
+        success (bool): Whether the run succeeded
+        timings (dict[str, float], optional): Seconds per stage
+        change (dict, optional): Result of ChangeDetector.check
+        uploads (list[dict], optional): 'username', 'success' and 'error' per account
+        failed_stage (str, optional): Stage the run stopped at
+        error (str, optional): Error message of a failed run
+
+    Returns:
+        dict: JSON-serializable event
+    """
+    from change_detector import summarize_diff
+
+    changes = None
+    if change is not None:
+        if not change['changed']:
+            changes = 'unchanged since last upload'
+        elif change['diff'] is None:
+            changes = 'first upload'
+        else:
+            changes = summarize_diff(change['diff'], limit=DIFF_MOVES_LIMIT)
+    return {
+        'type': 'run',
+        'success': success,
+        'sent_at': time.time(),
+        'timings': {stage: round(seconds, 3) for stage, seconds in (timings or {}).items()},
+        'changes': changes,
+        'diff': change['diff'] if change else None,
+        'uploads': uploads or [],
+        'failed_stage': failed_stage,
+        'error': error,
+    }
+
+
+def configured_sinks():
+    """
+    Build the sinks configured in the environment.
+
+    NOTIFY_SLACK_WEBHOOK_URL, NOTIFY_HTTP_URL and NOTIFY_FILE each enable a sink; with
+    none set notifications are disabled.
+
+    Returns:
+        list: Sink instances
+    """
+    sinks = []
+    if os.getenv('NOTIFY_SLACK_WEBHOOK_URL'):
+        sinks.append(SlackWebhookSink(os.getenv('NOTIFY_SLACK_WEBHOOK_URL')))
+    if os.getenv('NOTIFY_HTTP_URL'):
+        sinks.append(HttpSink(os.getenv('NOTIFY_HTTP_URL')))
+    if os.getenv('NOTIFY_FILE'):
+        sinks.append(FileSink(os.getenv('NOTIFY_FILE')))
+    return sinks
+
+
+class Notifier:
+    """
+    Sends events to sinks from a single background thread.
+
+    notify() only enqueues; when the bounded queue is full the event is dropped with a
+    warning. The sender collects events for up to batch_window seconds (at most
+    max_batch), sends the batch to each sink and retries a failing sink with
+    jittered exponential backoff. Failures are logged, never raised.
+    """
+
+    def __init__(self, sinks, queue_size=DEFAULT_QUEUE_SIZE, max_batch=DEFAULT_MAX_BATCH,
+                 batch_window=DEFAULT_BATCH_WINDOW, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 retry_delay=RETRY_BASE_DELAY):
+        """
+        Args:
+            sinks (list): Objects with a name and a send(events) method that raises on failure
+            queue_size (int): Maximum events waiting to be sent
+            max_batch (int): Maximum events per send
+            batch_window (float): Seconds to wait for more events before sending a batch
+            max_attempts (int): Attempts per sink and batch
+            retry_delay (float): First backoff in seconds
+        """
+        self.sinks = list(sinks)
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def notify(self, event):
+        """
+        Queue an event for sending without blocking.
+
+        Args:
+            event (dict): JSON-serializable event
+
+        Returns:
+            bool: True if the event was queued
+        """
+        if not self.sinks:
+            return False
+        self._start()
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            logging.warning("Notification queue is full; dropping notification")
+            return False
+
+    def _start(self):
+        with self._lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                for sink in self.sinks:
+                    self._send(sink, batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _send(self, sink, batch):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                sink.send(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logging.warning(f"Dropping {len(batch)} notification(s) for {sink.name} "
+                                    f"after {attempt} attempt(s): {str(e)}")
+                    return
+                delay = self.retry_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logging.info(f"Notification to {sink.name} failed: {str(e)}. "
+                             f"Retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def flush(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """
+        Wait up to timeout seconds for queued events to be sent.
+
+        Returns:
+            bool: True if the queue was drained
+        """
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                logging.warning(f"{self.queue.unfinished_tasks} notification(s) still pending")
+                return False
+            time.sleep(0.05)
+        return True
+
+
+_notifier = None
+
+
+def get_notifier():
+    """
+    Return the process-wide notifier, with sinks from the environment.
+
+    Queued notifications get up to NOTIFY_FLUSH_TIMEOUT seconds (default 5) to be sent
+    when the process exits.
+
+    Returns:
+        Notifier: Shared instance
+    """
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier(configured_sinks())
+        flush_timeout = float(os.getenv('NOTIFY_FLUSH_TIMEOUT', DEFAULT_FLUSH_TIMEOUT))
+        atexit.register(_notifier.flush, flush_timeout)
+    return _notifier
+
+
+def notify(event):
+    """Shortcut for get_notifier().notify(event)."""
+    return get_notifier().notify(event)
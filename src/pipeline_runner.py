@@ -0,0 +1,267 @@
+"""
+Pipeline Runner Module
+
+This module runs pipeline stages with retries and checkpoints: each stage's output
+is persisted once it succeeds, failed stages are retried with jittered exponential
+backoff according to the kind of error, and a rerun resumes from the last good
+checkpoint instead of starting over.
+"""
+
+import os
+import re
+import time
+import pickle
+import random
+import shutil
+import logging
+from datetime import date
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from web_scraper import WebScraperAuthError
+from draftkings_uploader import DraftKingsAccountsError, DraftKingsAuthError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, '.cache', 'checkpoints')
+
+# Checkpoints older than this are ignored, so a stale scrape is never uploaded
+DEFAULT_CHECKPOINT_MAX_AGE = 60 * 60
+
+ERROR_TIMEOUT = 'timeout'
+ERROR_SELECTOR = 'selector'
+ERROR_AUTH = 'auth'
+ERROR_OTHER = 'other'
+
+# Attempts per error kind. Bad credentials never fix themselves; a missing selector
+# usually means the page changed, so it gets one retry in case it was a slow render.
+RETRY_POLICIES = {
+    ERROR_TIMEOUT: 3,
+    ERROR_SELECTOR: 2,
+    ERROR_AUTH: 1,
+    ERROR_OTHER: 2,
+}
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+
+_SELECTOR_WAIT = re.compile(r'waiting for (locator|selector)', re.IGNORECASE)
+_SELECTOR_HINTS = ('selector', 'locator', 'no element', 'not found')
+
+
+class PipelineStageError(Exception):
+    """Custom exception class for pipeline stages that failed after all retries"""
+
+    def __init__(self, stage, kind, attempts, error):
+        super().__init__(f"Stage {stage} failed after {attempts} attempt(s) ({kind}): {str(error)}")
+        self.stage = stage
+        self.kind = kind
+        self.attempts = attempts
+        self.error = error
+
+
+def _exception_chain(error):
+    """Yield an exception followed by the exceptions it was raised from or during."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def classify_error(error):
+    """
+    Classify a stage failure to pick its retry policy.
+
+    The stage modules wrap Playwright errors in their own exception types, so the
+    whole exception chain is inspected.
+
+    Args:
+        error (Exception): Exception raised by a stage
+
+    Returns:
+        str: ERROR_AUTH, ERROR_SELECTOR, ERROR_TIMEOUT or ERROR_OTHER
+    """
+    chain = list(_exception_chain(error))
+    if any(isinstance(exc, (WebScraperAuthError, DraftKingsAuthError)) for exc in chain):
+        return ERROR_AUTH
+    for exc in chain:
+        if isinstance(exc, PlaywrightTimeoutError):
+            # Waiting for an element that never appears is a missing selector, not a slow network
+            return ERROR_SELECTOR if _SELECTOR_WAIT.search(str(exc)) else ERROR_TIMEOUT
+
+    message = str(error).lower()
+    if 'timed out' in message or 'timeout' in message:
+        return ERROR_TIMEOUT
+    if any(hint in message for hint in _SELECTOR_HINTS):
+        return ERROR_SELECTOR
+    return ERROR_OTHER
+
+
+def backoff_delay(attempt, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """Return the jittered exponential backoff before retrying after the given attempt."""
+    return min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class CheckpointStore:
+    """
+    On-disk stage outputs for one pipeline run.
+
+    Checkpoints are pickled into a directory per run ID and ignored once they are
+    older than max_age.
+    """
+
+    def __init__(self, run_id=None, directory=CHECKPOINT_DIR, max_age=None):
+        """
+        Args:
+            run_id (str, optional): Run identifier, default today's date
+            directory (str): Directory holding a subdirectory per run
+            max_age (int, optional): Maximum checkpoint age in seconds; defaults to
+                PIPELINE_CHECKPOINT_MAX_AGE or one hour
+        """
+        self.run_id = run_id or date.today().isoformat()
+        self.directory = os.path.join(directory, self.run_id)
+        if max_age is None:
+            max_age = int(os.getenv('PIPELINE_CHECKPOINT_MAX_AGE', DEFAULT_CHECKPOINT_MAX_AGE))
+        self.max_age = max_age
+
+    def _path(self, stage):
+        return os.path.join(self.directory, f'{stage}.pkl')
+
+    def load(self, stage):
+        """
+        Load a stage's checkpoint.
+
+        Args:
+            stage (str): Stage name
+
+        Returns:
+            object or None: Stored output, or None if missing, stale or unreadable
+        """
+        path = self._path(stage)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                logging.info(f"Ignoring stale {stage} checkpoint")
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable {stage} checkpoint: {str(e)}")
+            return None
+
+    def save(self, stage, value):
+        """
+        Store a stage's output.
+
+        Args:
+            stage (str): Stage name
+            value (object): Picklable stage output
+        """
+        path = self._path(stage)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            # A missing checkpoint only costs redoing the stage on a rerun
+            logging.warning(f"Could not store {stage} checkpoint: {str(e)}")
+
+    def discard(self, stage):
+        """Delete one stage's checkpoint, e.g. when the data it was built from has changed."""
+        try:
+            os.remove(self._path(stage))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not discard {stage} checkpoint: {str(e)}")
+
+    def clear(self):
+        """Delete all checkpoints of this run."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PipelineRunner:
+    """
+    Runs pipeline stages with checkpoints and classified retries.
+
+    Example:
+        runner = PipelineRunner()
+        rows = runner.run_stage('scrape', scrape_rankings, pool)
+        df = runner.run_stage('process', process_rankings, rows)
+        runner.run_stage('upload', upload, df, checkpoint=False)
+        runner.complete()
+    """
+
+    def __init__(self, checkpoints=None, policies=None, base_delay=None, sleep=time.sleep):
+        """
+        Args:
+            checkpoints (CheckpointStore, optional): Checkpoints of this run
+            policies (dict, optional): Attempts per error kind, default RETRY_POLICIES
+            base_delay (float, optional): First backoff in seconds; defaults to
+                PIPELINE_RETRY_BASE_DELAY or RETRY_BASE_DELAY
+            sleep (callable): Function used to wait between attempts
+        """
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.policies = dict(RETRY_POLICIES, **(policies or {}))
+        if base_delay is None:
+            base_delay = float(os.getenv('PIPELINE_RETRY_BASE_DELAY', RETRY_BASE_DELAY))
+        self.base_delay = base_delay
+        self.sleep = sleep
+
+    def run_stage(self, stage, func, *args, checkpoint=True, **kwargs):
+        """
+        Run one stage, resuming from its checkpoint when there is one.
+
+        Args:
+            stage (str): Stage name, also the checkpoint name
+            func (callable): Stage function; it must raise on failure
+            *args: Positional arguments for func
+            checkpoint (bool): Whether to resume from and store a checkpoint
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            object: The stage output
+
+        Raises:
+            PipelineStageError: If the stage still fails after the attempts its error
+                kind allows
+        """
+        if checkpoint:
+            value = self.checkpoints.load(stage)
+            if value is not None:
+                logging.info(f"Resuming from {stage} checkpoint")
+                return value
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                value = func(*args, **kwargs)
+                break
+            except Exception as e:
+                kind = classify_error(e)
+                max_attempts = self.policies.get(kind, 1)
+                if isinstance(e, DraftKingsAccountsError):
+                    # Each account was already retried by the concurrent uploader
+                    max_attempts = 1
+                if attempt >= max_attempts:
+                    logging.error(f"Stage {stage} failed after {attempt} attempt(s) "
+                                  f"({kind}): {str(e)}")
+                    raise PipelineStageError(stage, kind, attempt, e) from e
+                delay = backoff_delay(attempt, self.base_delay)
+                logging.warning(f"Stage {stage} attempt {attempt} failed ({kind}): {str(e)}. "
+                                f"Retrying in {delay:.1f}s")
+                self.sleep(delay)
+
+        if checkpoint and value is not None:
+            self.checkpoints.save(stage, value)
+        return value
+
+    def complete(self):
+        """Discard the run's checkpoints once the whole pipeline has succeeded."""
+        self.checkpoints.clear()
@@ -0,0 +1,220 @@
+"""
+Player Index Module
+
+This module builds an in-memory index over the DraftKings player template so that
+scraped player names can be matched to DraftKings IDs in a single pass.
+"""
+
+import re
+import logging
+import unicodedata
+from collections import Counter, defaultdict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Name suffixes that sources disagree on ("Marvin Harrison Jr." vs "Marvin Harrison")
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# Confidence recorded for each matching tier
+CONFIDENCE_NAME_POSITION_TEAM = 1.0
+CONFIDENCE_NAME_POSITION = 0.95
+CONFIDENCE_NAME = 0.9
+# Fuzzy similarity is scaled by this, so a fuzzy match always ranks below the exact tiers
+CONFIDENCE_FUZZY_MAX = 0.85
+
+# Minimum trigram similarity accepted by the fuzzy fallback
+DEFAULT_FUZZY_THRESHOLD = 0.75
+
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize_name(name):
+    """
+    Normalize a player name for exact lookups.
+
+    Accents, punctuation and generational suffixes are removed and whitespace is
+    collapsed, so "A.J. Brown" and "AJ Brown" or "Kenneth Walker III" and
+    "Kenneth Walker" normalize to the same key.
+
+    Args:
+        name (str): Raw player name
+
+    Returns:
+        str: Normalized name, or an empty string for missing names
+    """
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    name = name.lower().replace('-', ' ')
+    name = _NON_ALNUM.sub('', name)
+    tokens = [token for token in name.split() if token not in NAME_SUFFIXES]
+    return ' '.join(tokens)
+
+
+def _trigrams(normalized):
+    """Return the set of padded character trigrams for a normalized name."""
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _normalize_key(value):
+    """Normalize a position or team code for use in a lookup key."""
+    return value.strip().upper() if isinstance(value, str) else ''
+
+
+class PlayerIndex:
+    """
+    Hash-based lookup of DraftKings player IDs by name, position and team.
+
+    Matching is tried in order of decreasing confidence: exact (name, position, team),
+    exact (name, position), exact name, and finally a trigram similarity search
+    restricted to the player's position. Ambiguous exact keys fall through to the
+    next tier instead of returning an arbitrary row, and a fuzzy search whose best
+    score is shared by several rows (e.g. two players with the same name) leaves
+    the player unmatched.
+    """
+
+    def __init__(self, ids, names, positions, teams=None, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        Build the index from parallel sequences of template columns.
+
+        Args:
+            ids (Sequence): DraftKings player IDs
+            names (Sequence[str]): Player names
+            positions (Sequence[str]): Player positions
+            teams (Sequence[str], optional): Player team codes
+            fuzzy_threshold (float): Minimum similarity accepted by the fuzzy fallback
+        """
+        if teams is None:
+            teams = [''] * len(ids)
+
+        self.fuzzy_threshold = fuzzy_threshold
+        self._ids = list(ids)
+        self._names = []
+        self._trigram_sets = []
+        self._by_name_position_team = defaultdict(list)
+        self._by_name_position = defaultdict(list)
+        self._by_name = defaultdict(list)
+        self._trigram_postings = defaultdict(list)
+
+        for row, (name, position, team) in enumerate(zip(names, positions, teams)):
+            normalized = normalize_name(name)
+            position = _normalize_key(position)
+            team = _normalize_key(team)
+            grams = _trigrams(normalized)
+
+            self._names.append(normalized)
+            self._trigram_sets.append(grams)
+            self._by_name_position_team[(normalized, position, team)].append(row)
+            self._by_name_position[(normalized, position)].append(row)
+            self._by_name[normalized].append(row)
+            for gram in grams:
+                self._trigram_postings[(position, gram)].append(row)
+
+        logging.info(f"Built player index with {len(self._ids)} players")
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        """
+        Build the index from a DraftKings template DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame with 'ID', 'Name', 'Position' and optionally 'Team'
+            **kwargs: Extra keyword arguments passed to the constructor
+
+        Returns:
+            PlayerIndex: Index over the template rows
+        """
+        teams = df['Team'].tolist() if 'Team' in df.columns else None
+        return cls(df['ID'].tolist(), df['Name'].tolist(), df['Position'].tolist(), teams, **kwargs)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def match(self, name, position, team=None):
+        """
+        Find the DraftKings ID for a single player.
+
+        Args:
+            name (str): Player name
+            position (str): Player position
+            team (str, optional): Player team code
+
+        Returns:
+            tuple: (ID or None, confidence between 0.0 and 1.0)
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            return None, 0.0
+        position = _normalize_key(position)
+        team = _normalize_key(team)
+
+        tiers = (
+            (self._by_name_position_team, (normalized, position, team),
+             CONFIDENCE_NAME_POSITION_TEAM),
+            (self._by_name_position, (normalized, position), CONFIDENCE_NAME_POSITION),
+            (self._by_name, normalized, CONFIDENCE_NAME),
+        )
+        for table, key, confidence in tiers:
+            rows = table.get(key)
+            if rows and len(rows) == 1:
+                return self._ids[rows[0]], confidence
+
+        return self._fuzzy_match(normalized, position)
+
+    def match_many(self, names, positions, teams=None):
+        """
+        Match a batch of players.
+
+        Args:
+            names (Sequence[str]): Player names
+            positions (Sequence[str]): Player positions
+            teams (Sequence[str], optional): Player team codes
+
+        Returns:
+            tuple[list, list[float]]: Matched IDs (None when unmatched) and confidences
+        """
+        if teams is None:
+            teams = [None] * len(names)
+
+        ids = []
+        confidences = []
+        for name, position, team in zip(names, positions, teams):
+            player_id, confidence = self.match(name, position, team)
+            ids.append(player_id)
+            confidences.append(confidence)
+
+        unmatched = ids.count(None)
+        if unmatched:
+            logging.warning(f"{unmatched} of {len(ids)} players could not be matched "
+                            f"to a DraftKings ID")
+        return ids, confidences
+
+    def _fuzzy_match(self, normalized, position):
+        """
+        Find the most similar name at the given position using shared trigrams.
+
+        Only rows that share at least one trigram are scored, so the cost is bounded
+        by the posting list sizes rather than the template size. A best score shared
+        by several rows is ambiguous and returns no match.
+        """
+        grams = _trigrams(normalized)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_postings.get((position, gram), ()))
+
+        best_row = None
+        best_score = 0.0
+        tied = False
+        for row, count in shared.items():
+            # Dice coefficient over trigram sets
+            score = 2.0 * count / (len(grams) + len(self._trigram_sets[row]))
+            if score > best_score:
+                best_row, best_score, tied = row, score, False
+            elif score == best_score:
+                tied = True
+
+        if best_row is None or tied or best_score < self.fuzzy_threshold:
+            return None, 0.0
+        return self._ids[best_row], round(best_score * CONFIDENCE_FUZZY_MAX, 3)
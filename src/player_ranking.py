@@ -0,0 +1,340 @@
+"""
+Player Ranking Module
+
+This module holds PlayerRanking, a compact __slots__ record for one scraped player,
+and a processing path built on it that cleans, matches and assembles the daily
+rankings into the DraftKings upload CSV without importing pandas. The CSV is
+byte-identical to serializing the result of data_processor.process_data and
+assemble_rankings.
+"""
+
+import io
+import os
+import re
+import csv
+import math
+import numbers
+import struct
+import logging
+import threading
+
+from instrumentation import span
+from player_index import PlayerIndex
+from template_repository import DEFAULT_TEMPLATE, TEMPLATE_COLUMNS, get_template_repository
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+RANKING_FIELDS = [
+    'name', 'team', 'position', 'etr_rank', 'etr_pos_rank', 'adp', 'adp_pos_rank', 'adp_diff',
+]
+TEXT_FIELDS = ['name', 'team', 'position']
+# Fields the pandas path parses to Int16, falling back to float32 for fractional values
+INT_FIELDS = ['etr_rank', 'etr_pos_rank', 'adp_pos_rank']
+FLOAT32_FIELDS = ['adp', 'adp_diff']
+INT16_RANGE = (-2**15, 2**15 - 1)
+
+UPLOAD_COLUMNS = TEMPLATE_COLUMNS + [
+    'ETR Rank', 'ETR Pos Rank', 'ADP Pos Rank', 'ADP Diff', 'Match Confidence',
+]
+
+# Strings pandas.read_csv reads as missing by default
+TEMPLATE_NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+# Numbers pandas.to_numeric accepts; Python's float() is more lenient (underscores,
+# non-ASCII digits), so values are checked against this first
+_NUMBER = re.compile(
+    r'[+-]?(?:(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?|inf(?:inity)?)', re.IGNORECASE)
+
+
+class PlayerRankingError(Exception):
+    """Custom exception class for pandas-free ranking processing errors"""
+    pass
+
+
+class PlayerRanking:
+    """
+    One scraped player, cleaned into typed fields.
+
+    Text fields are stripped strings or None; rank fields are ints, or floats when a
+    column holds fractional ranks; ADP fields are floats rounded to float32 precision.
+    Missing values are None.
+    """
+
+    __slots__ = tuple(RANKING_FIELDS)
+
+    def __init__(self, name=None, team=None, position=None, etr_rank=None, etr_pos_rank=None,
+                 adp=None, adp_pos_rank=None, adp_diff=None):
+        self.name = name
+        self.team = team
+        self.position = position
+        self.etr_rank = etr_rank
+        self.etr_pos_rank = etr_pos_rank
+        self.adp = adp
+        self.adp_pos_rank = adp_pos_rank
+        self.adp_diff = adp_diff
+
+    def __repr__(self):
+        return (f"PlayerRanking({self.name!r}, {self.position!r}, {self.team!r}, "
+                f"etr_rank={self.etr_rank!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerRanking):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in RANKING_FIELDS)
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in RANKING_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(RANKING_FIELDS, state):
+            setattr(self, field, value)
+
+    def as_dict(self):
+        """Return the record as a dictionary keyed by RANKING_FIELDS."""
+        return {field: getattr(self, field) for field in RANKING_FIELDS}
+
+
+def _float32(value):
+    """Round a float to the nearest float32 value."""
+    try:
+        return struct.unpack('f', struct.pack('f', value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def _text(value):
+    """Strip a text cell; non-strings and empty strings are missing, as in clean_data."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value or None
+
+
+def _number(value):
+    """Parse a numeric cell the way pandas.to_numeric(errors='coerce') parses it."""
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return None if value != value else value
+    value = _text(value)
+    if value is None or not _NUMBER.fullmatch(value):
+        return None
+    return float(value)
+
+
+def _int_column(values, field):
+    """Convert a parsed rank column to ints, or to float32 floats if any value is fractional."""
+    present = [value for value in values if value is not None]
+    if any(math.isinf(value) or value % 1 for value in present):
+        return [None if value is None else _float32(value) for value in values]
+    low, high = INT16_RANGE
+    if any(value < low or value > high for value in present):
+        raise PlayerRankingError(f"Values of {field} are out of the Int16 range")
+    return [None if value is None else int(value) for value in values]
+
+
+def parse_rankings(rows):
+    """
+    Clean scraped rows into PlayerRanking records.
+
+    Applies the same schema and coercion rules as data_processor.clean_data.
+
+    Args:
+        rows (list[dict]): Scraped rows keyed by RANKING_FIELDS
+
+    Returns:
+        list[PlayerRanking]: One record per row
+
+    Raises:
+        PlayerRankingError: If a required column is missing or a rank is out of range
+    """
+    present = set()
+    for row in rows:
+        present.update(row)
+    missing = [field for field in INT_FIELDS + FLOAT32_FIELDS + TEXT_FIELDS if field not in present]
+    if missing:
+        raise PlayerRankingError(f"Missing required columns: {', '.join(missing)}")
+
+    columns = {}
+    for field in TEXT_FIELDS:
+        columns[field] = [_text(row.get(field)) for row in rows]
+    for field in INT_FIELDS:
+        columns[field] = _int_column([_number(row.get(field)) for row in rows], field)
+    for field in FLOAT32_FIELDS:
+        columns[field] = [None if value is None else _float32(value)
+                          for value in (_number(row.get(field)) for row in rows)]
+
+    return [PlayerRanking(*values) for values in zip(*(columns[field] for field in RANKING_FIELDS))]
+
+
+def _template_text(value):
+    return None if value in TEMPLATE_NA_VALUES else value
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(template=DEFAULT_TEMPLATE):
+    """
+    Return the template's players and PlayerIndex, parsed with the csv module.
+
+    Templates are cached per process and reparsed when the file's mtime or size changes.
+
+    Args:
+        template (str): Name of a template registered with the template repository
+
+    Returns:
+        tuple[list[tuple], PlayerIndex]: (ID, Name, Position, ADP, Team) per template
+            row, and the index over them
+
+    Raises:
+        PlayerRankingError: If the template cannot be read
+    """
+    path = get_template_repository().path(template)
+    try:
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        with _templates_lock:
+            cached = _templates.get(template)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        players = []
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = [header.index(column) for column in TEMPLATE_COLUMNS]
+            for cells in reader:
+                player_id, name, position, adp, team = (cells[i] for i in columns)
+                adp = None if adp in TEMPLATE_NA_VALUES else _number(adp)
+                players.append((int(player_id), _template_text(name), _template_text(position),
+                                None if adp is None else _float32(adp), _template_text(team)))
+    except (OSError, ValueError, IndexError, StopIteration) as e:
+        logging.error(f"Error reading template {path}: {str(e)}")
+        raise PlayerRankingError(f"Failed to read template {path}: {str(e)}")
+
+    index = PlayerIndex([player[0] for player in players], [player[1] for player in players],
+                        [player[2] for player in players], [player[4] for player in players])
+    with _templates_lock:
+        _templates[template] = (signature, players, index)
+    return players, index
+
+
+def assemble_upload(records, template=DEFAULT_TEMPLATE):
+    """
+    Match records to DraftKings IDs and build every upload row in rank order.
+
+    Follows data_processor.assemble_rankings: matched players first by ETR rank (ties
+    and missing ranks keep their row order, duplicates keep the best rank), then the
+    remaining template players by template ADP and template order.
+
+    Args:
+        records (list[PlayerRanking]): Cleaned rankings
+        template (str): Name of the DraftKings template
+
+    Returns:
+        list[tuple]: Values per row in UPLOAD_COLUMNS order, None for missing values
+
+    Raises:
+        PlayerRankingError: If the template has duplicate IDs or a match is not in it
+    """
+    players, index = load_template(template)
+    ids, confidences = index.match_many([record.name for record in records],
+                                        [record.position for record in records],
+                                        [record.team for record in records])
+    template_rows = {}
+    for row, player in enumerate(players):
+        if player[0] in template_rows:
+            raise PlayerRankingError(f"Template {template} contains duplicate player IDs")
+        template_rows[player[0]] = row
+
+    unmatched = [record.name for record, player_id in zip(records, ids) if player_id is None]
+    if unmatched:
+        logging.warning(f"{len(unmatched)} ranked players have no DraftKings ID and are "
+                        f"placed by ADP instead: {', '.join(map(str, unmatched[:10]))}")
+
+    matched = [(record, player_id, confidence)
+               for record, player_id, confidence in zip(records, ids, confidences)
+               if player_id is not None]
+    # sorted() is stable, so ties and missing ranks keep their row order
+    matched.sort(key=lambda item: math.inf if item[0].etr_rank is None else item[0].etr_rank)
+    ranked = {}
+    for record, player_id, confidence in matched:
+        if player_id not in ranked:
+            ranked[player_id] = (record.etr_rank, record.etr_pos_rank, record.adp_pos_rank,
+                                 record.adp_diff, confidence)
+
+    unknown = [player_id for player_id in ranked if player_id not in template_rows]
+    if unknown:
+        raise PlayerRankingError(f"{len(unknown)} ranked IDs are not in template {template}: "
+                                 f"{', '.join(map(str, unknown[:10]))}")
+
+    rest = sorted((row for row, player in enumerate(players) if player[0] not in ranked),
+                  key=lambda row: (math.inf if players[row][3] is None else players[row][3], row))
+    upload = [players[template_rows[player_id]] + details for player_id, details in ranked.items()]
+    padding = (None,) * (len(UPLOAD_COLUMNS) - len(TEMPLATE_COLUMNS))
+    upload += [players[row] + padding for row in rest]
+    logging.info(f"Assembled {len(upload)} rankings: {len(ranked)} ranked, "
+                 f"{len(upload) - len(ranked)} placed by ADP")
+    return upload
+
+
+def _format_float32(value):
+    """Format a float32 value as numpy and pandas do: the shortest round-tripping repr."""
+    for precision in range(1, 10):
+        text = f'{value:.{precision}g}'
+        if _float32(float(text)) == value:
+            return repr(float(text))
+    return repr(value)
+
+
+def serialize_upload(rows):
+    """
+    Serialize upload rows to DraftKings CSV bytes, formatted as pandas.DataFrame.to_csv.
+
+    Args:
+        rows (list[tuple]): Rows from assemble_upload
+
+    Returns:
+        bytes: UTF-8 encoded CSV with a UPLOAD_COLUMNS header
+    """
+    confidence = UPLOAD_COLUMNS.index('Match Confidence')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=os.linesep)
+    writer.writerow(UPLOAD_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            '' if value is None or value != value
+            else repr(value) if column == confidence
+            else _format_float32(value) if isinstance(value, float)
+            else value
+            for column, value in enumerate(row)
+        ])
+    return buffer.getvalue().encode('utf-8')
+
+
+def process_rankings_csv(rows, template=DEFAULT_TEMPLATE):
+    """
+    Process scraped rows into the DraftKings upload CSV without pandas.
+
+    Args:
+        rows (list[dict]): Scraped rows keyed by RANKING_FIELDS
+        template (str): Name of the DraftKings template
+
+    Returns:
+        bytes: The upload CSV, byte-identical to the pandas path's
+
+    Raises:
+        PlayerRankingError: If processing fails
+    """
+    with span('parse_rankings') as record:
+        records = parse_rankings(rows)
+        record['rows'] = len(records)
+    with span('assemble_upload', template=template) as record:
+        upload = assemble_upload(records, template)
+        record['rows'] = len(upload)
+    return serialize_upload(upload)
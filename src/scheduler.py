@@ -0,0 +1,348 @@
+"""
+Scheduler Module
+
+This module runs the agent as a long-lived daemon: it keeps Chromium warm, refreshes
+logins shortly before ETR's daily update, polls the rankings data and runs the
+pipeline as soon as the rankings change.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+
+import schedule
+from dotenv import load_dotenv
+
+from browser_pool import BrowserPool
+from diagnostics import configure_logging
+from browser_profile import apply_profile, context_options
+from session_store import SessionStore
+from instrumentation import span
+from pipeline_runner import ERROR_AUTH, backoff_delay
+from sources import configured_sources
+import web_scraper
+import draftkings_uploader
+from main import run_once
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Longest wait before retrying the pipeline after consecutive failed runs
+MAX_RETRY_BACKOFF = 1800
+
+
+def load_schedule_config():
+    """
+    Load daemon settings from environment variables or .env file.
+
+    Times are local wall-clock "HH:MM" strings.
+    """
+    load_dotenv()
+    return {
+        'PRELOGIN_TIME': os.getenv('PRELOGIN_TIME', '08:50'),
+        'POLL_START': os.getenv('POLL_START', '09:00'),
+        'POLL_END': os.getenv('POLL_END', '10:30'),
+        'POLL_INTERVAL': int(os.getenv('POLL_INTERVAL', '60')),
+        'MAX_RETRY_BACKOFF': int(os.getenv('MAX_RETRY_BACKOFF', str(MAX_RETRY_BACKOFF))),
+        'RUN_TIME': os.getenv('RUN_TIME', '09:30'),
+        'HEADLESS': os.getenv('HEADLESS', 'True').lower() == 'true',
+    }
+
+
+def rankings_fingerprint(rankings):
+    """
+    Hash scraped rankings rows, so any change to a player's row changes the hash.
+
+    Args:
+        rankings (list[dict]): Rows from web_scraper.fetch_player_rankings
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    return hashlib.sha256(json.dumps(rankings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _within(now, start, end):
+    current = now.strftime('%H:%M')
+    return start <= current <= end
+
+
+class RankingsDaemon:
+    """
+    Long-running scheduler around main.main.
+
+    Jobs:
+        - pre-login at PRELOGIN_TIME, so the 9am window starts with valid sessions
+        - poll every POLL_INTERVAL seconds between POLL_START and POLL_END, running the
+          pipeline as soon as the rankings data changes
+        - a fallback run at RUN_TIME, as required by the daily schedule
+
+    After a failed run the next one waits with exponential backoff (up to
+    MAX_RETRY_BACKOFF seconds). Rejected ETR or DraftKings credentials stop polling and
+    runs for the rest of the day, since retrying them risks locking the account.
+    """
+
+    def __init__(self, config=None, browser_pool=None):
+        """
+        Args:
+            config (dict, optional): Settings from load_schedule_config
+            browser_pool (BrowserPool, optional): Warm browser; one is created when omitted
+        """
+        self.config = config or load_schedule_config()
+        self.browser_pool = browser_pool or BrowserPool(headless=self.config['HEADLESS'])
+        self.scheduler = schedule.Scheduler()
+        self.last_fingerprint = None
+        self.pending_fingerprint = None
+        # Rows of the last poll and the ninja-tables endpoint they came from
+        self.polled_rankings = None
+        self.endpoint = None
+        self.last_run_date = None
+        self.failed_runs = 0
+        self.retry_at = 0.0
+        self.auth_failed_date = None
+
+    def refresh_sessions(self):
+        """Log in to ETR and DraftKings now if the stored sessions are no longer valid."""
+        if self.auth_failed_date == datetime.now().date():
+            logging.warning("Skipping session refresh: credentials were rejected today")
+            return
+        username = os.environ.get("ETR_USERNAME")
+        password = os.environ.get("ETR_PASSWORD")
+        if username and password:
+            session_store = SessionStore('etr')
+            try:
+                with span('refresh_etr_session'), self.browser_pool.context(
+                    storage_state=session_store.load(),
+                    **context_options(web_scraper.ETR_CONTEXT_OPTIONS)
+                ) as context:
+                    apply_profile(context)
+                    page = web_scraper.ensure_logged_in(context, username, password, session_store)
+                    page.close()
+            except web_scraper.WebScraperAuthError as e:
+                self._stop_for_auth_error(str(e))
+                return
+            except web_scraper.WebScraperError as e:
+                logging.error(f"Failed to refresh ETR session: {str(e)}")
+
+        config = draftkings_uploader.load_config()
+        if config['DRAFTKINGS_USERNAME'] and config['DRAFTKINGS_PASSWORD']:
+            session_store = SessionStore(f"draftkings-{config['DRAFTKINGS_USERNAME']}")
+            try:
+                with span('refresh_draftkings_session'), self.browser_pool.context(
+                    storage_state=session_store.load(), **context_options()
+                ) as context:
+                    apply_profile(context)
+                    draftkings_uploader.ensure_logged_in(
+                        context.new_page(), config['DRAFTKINGS_USERNAME'],
+                        config['DRAFTKINGS_PASSWORD'], session_store
+                    )
+            except draftkings_uploader.DraftKingsAuthError as e:
+                self._stop_for_auth_error(str(e))
+            except draftkings_uploader.DraftKingsUploaderError as e:
+                logging.error(f"Failed to refresh DraftKings session: {str(e)}")
+
+    def rankings_changed(self):
+        """
+        Fetch the rankings data and compare it with the data of the last successful run.
+
+        Once the rankings page has been loaded, polls ask the ninja-tables endpoint it
+        called directly, conditional on the last response's ETag and Last-Modified,
+        so an unchanged table costs one small request and no page load. The page is
+        loaded again when that request fails, e.g. after its nonce expired. The first
+        check after start-up always reports a change so the pipeline's own change
+        detection decides whether to upload.
+
+        Returns:
+            bool: True if the rankings changed
+
+        Raises:
+            WebScraperAuthError: If ETR rejects the credentials
+        """
+        rankings = None
+        if self.endpoint is not None:
+            try:
+                rankings = self._poll_endpoint()
+            except web_scraper.WebScraperError as e:
+                logging.info(f"Conditional rankings request failed ({str(e)}); "
+                             f"loading the rankings page")
+                self.endpoint = None
+        if rankings is None:
+            rankings = self._fetch_rankings_page()
+        self.polled_rankings = rankings
+
+        # Only committed once the pipeline succeeds, so a failed run is retried
+        fingerprint = rankings_fingerprint(rankings)
+        if fingerprint == self.last_fingerprint:
+            return False
+        self.pending_fingerprint = fingerprint
+        return True
+
+    def _poll_endpoint(self):
+        """Request the rankings rows from the known endpoint, reusing the last rows on a 304."""
+        session_store = SessionStore('etr')
+        with span('poll_rankings_endpoint'), self.browser_pool.context(
+            storage_state=session_store.load(),
+            **context_options(web_scraper.ETR_CONTEXT_OPTIONS)
+        ) as context:
+            rankings, self.endpoint = web_scraper.fetch_ninja_table(context.request, self.endpoint)
+        if rankings is None:
+            logging.info("Rankings not modified since the last poll")
+            return self.polled_rankings
+        return rankings
+
+    def _fetch_rankings_page(self):
+        """Load the rankings the way the scraper does, remembering the AJAX endpoint."""
+        session_store = SessionStore('etr')
+        responses = []
+
+        def on_response(response):
+            if web_scraper.is_ninja_table_response(response):
+                responses.append(response)
+
+        with span('poll_rankings'), self.browser_pool.context(
+            storage_state=session_store.load(),
+            **context_options(web_scraper.ETR_CONTEXT_OPTIONS)
+        ) as context:
+            apply_profile(context)
+            page = web_scraper.ensure_logged_in(context, os.environ.get("ETR_USERNAME"),
+                                                os.environ.get("ETR_PASSWORD"), session_store)
+            page.on('response', on_response)
+            rankings = web_scraper.fetch_player_rankings(
+                page, web_scraper.ETR_RANKINGS_URL,
+                os.environ.get("ETR_FETCH_MODE", web_scraper.FETCH_MODE_AUTO)
+            )
+            self.endpoint = web_scraper.ninja_table_endpoint(responses[0]) if responses else None
+        return rankings
+
+    def _polled_scrape(self):
+        """
+        Return the polled rows as the pipeline's scrape output, or None to scrape.
+
+        The poll only loads ETR, so its rows can stand in for the scrape stage only
+        when ETR is the only configured source.
+        """
+        if not self.polled_rankings:
+            return None
+        try:
+            names = [source.name for source in configured_sources()]
+        except web_scraper.WebScraperError:
+            return None
+        return {'etr': self.polled_rankings} if names == ['etr'] else None
+
+    def _blocked(self):
+        """Return the reason runs are on hold, or None if the pipeline may run now."""
+        if self.auth_failed_date == datetime.now().date():
+            return "credentials were rejected today"
+        if time.monotonic() < self.retry_at:
+            return f"backing off for {self.retry_at - time.monotonic():.0f}s after a failed run"
+        return None
+
+    def _stop_for_auth_error(self, error):
+        self.auth_failed_date = datetime.now().date()
+        logging.error(f"Credentials were rejected ({error}); stopping polling and runs until "
+                      f"tomorrow to avoid an account lockout. Fix the credentials or restart.")
+
+    def run_pipeline(self, fresh=False, scraped=None):
+        """
+        Run the pipeline on the warm browser and remember what it ran against.
+
+        A failed run delays the next one with exponential backoff; a rejected login
+        stops runs for the rest of the day.
+
+        Args:
+            fresh (bool): Ignore scrape and process checkpoints, because the rankings
+                changed since they were written
+            scraped (dict[str, list[dict]], optional): Rows the poll already fetched,
+                used instead of scraping again
+        """
+        logging.info("Running rankings pipeline")
+        result = run_once(browser_pool=self.browser_pool, fresh=fresh, scraped=scraped)
+        if result['success']:
+            self.last_run_date = datetime.now().date()
+            self.last_fingerprint = self.pending_fingerprint or self.last_fingerprint
+            self.failed_runs = 0
+            self.retry_at = 0.0
+        elif result['error_kind'] == ERROR_AUTH:
+            self._stop_for_auth_error(result['error'])
+        else:
+            self.failed_runs += 1
+            delay = backoff_delay(self.failed_runs, base_delay=self.config['POLL_INTERVAL'],
+                                  max_delay=self.config['MAX_RETRY_BACKOFF'])
+            self.retry_at = time.monotonic() + delay
+            logging.warning(f"Pipeline run did not complete ({self.failed_runs} failed in a row); "
+                            f"retrying in {delay:.0f}s at the earliest")
+
+    def poll(self):
+        """Poll job: run the pipeline if the rankings changed inside the poll window."""
+        if not _within(datetime.now(), self.config['POLL_START'], self.config['POLL_END']):
+            return
+        if self._blocked():
+            return
+        try:
+            changed = self.rankings_changed()
+        except web_scraper.WebScraperAuthError as e:
+            self._stop_for_auth_error(str(e))
+            return
+        except Exception as e:
+            logging.error(f"Rankings poll failed: {str(e)}")
+            return
+        if changed:
+            logging.info("Rankings changed")
+            self.run_pipeline(fresh=True, scraped=self._polled_scrape())
+
+    def scheduled_run(self):
+        """Fallback job: run once a day if polling has not already done so."""
+        if self.last_run_date == datetime.now().date():
+            logging.info("Rankings already processed today; skipping scheduled run")
+            return
+        blocked = self._blocked()
+        if blocked:
+            logging.warning(f"Skipping scheduled run: {blocked}")
+            return
+        self.run_pipeline()
+
+    def _guarded(self, job):
+        def run():
+            try:
+                job()
+            except Exception as e:
+                # A failing job must not stop the daemon
+                logging.error(f"Scheduled job {job.__name__} failed: {str(e)}")
+        run.__name__ = job.__name__
+        return run
+
+    def start(self):
+        """Register the jobs and block, running them until interrupted."""
+        config = self.config
+        self.scheduler.every().day.at(config['PRELOGIN_TIME']).do(
+            self._guarded(self.refresh_sessions))
+        self.scheduler.every(config['POLL_INTERVAL']).seconds.do(self._guarded(self.poll))
+        self.scheduler.every().day.at(config['RUN_TIME']).do(self._guarded(self.scheduled_run))
+        logging.info(f"Daemon started: pre-login {config['PRELOGIN_TIME']}, polling "
+                     f"{config['POLL_START']}-{config['POLL_END']} "
+                     f"every {config['POLL_INTERVAL']}s, "
+                     f"fallback run {config['RUN_TIME']}")
+
+        # Warm the browser and sessions immediately rather than at the first job
+        self._guarded(self.refresh_sessions)()
+        try:
+            with self.browser_pool:
+                while True:
+                    self.scheduler.run_pending()
+                    idle = self.scheduler.idle_seconds
+                    time.sleep(max(1, min(idle if idle is not None else 60, 60)))
+        except KeyboardInterrupt:
+            logging.info("Daemon stopped")
+
+
+def run_daemon():
+    """Start the scheduler daemon with settings from the environment."""
+    configure_logging()
+    RankingsDaemon().start()
+
+
+if __name__ == "__main__":
+    run_daemon()
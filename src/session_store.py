@@ -0,0 +1,191 @@
+"""
+Session Store Module
+
+This module persists authenticated Playwright storage state per site, encrypted on
+disk, so warm runs can skip the login form.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+
+from cryptography.fernet import Fernet, InvalidToken
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_DIR = os.path.join(PROJECT_ROOT, '.cache', 'sessions')
+KEY_FILE_NAME = '.key'
+
+# Sessions older than this are discarded even if their cookies have not expired
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+PROBE_TIMEOUT = 15000
+
+
+class SessionStoreError(Exception):
+    """Custom exception class for session store errors"""
+    pass
+
+
+def _load_key(directory):
+    """
+    Return the Fernet key used to encrypt sessions.
+
+    The key is read from the SESSION_STORE_KEY environment variable, falling back to
+    a key file created with owner-only permissions in the session directory.
+    """
+    key = os.getenv('SESSION_STORE_KEY')
+    if key:
+        return key.encode()
+
+    key_path = os.path.join(directory, KEY_FILE_NAME)
+    try:
+        with open(key_path, 'rb') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    key = Fernet.generate_key()
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    logging.info(f"Generated session store key: {key_path}")
+    return key
+
+
+class SessionStore:
+    """
+    Encrypted on-disk cache of a site's Playwright storage state.
+
+    A stored session is considered expired once it is older than max_age or once any
+    of its persistent cookies has passed its expiry time.
+    """
+
+    def __init__(self, site, directory=SESSION_DIR, max_age=DEFAULT_MAX_AGE):
+        """
+        Args:
+            site (str): Site name used for the session file, e.g. "etr" or "draftkings"
+            directory (str): Directory holding the encrypted session files
+            max_age (int): Maximum session age in seconds
+        """
+        self.site = site
+        self.directory = directory
+        self.max_age = max_age
+        self.path = os.path.join(directory, f"{re.sub(r'[^A-Za-z0-9_.@-]', '_', site)}.session")
+        self._fernet = None
+
+    @property
+    def fernet(self):
+        if self._fernet is None:
+            try:
+                self._fernet = Fernet(_load_key(self.directory))
+            except (OSError, ValueError) as e:
+                raise SessionStoreError(f"Failed to load session store key: {str(e)}")
+        return self._fernet
+
+    def load(self):
+        """
+        Load the stored session if it exists and has not expired.
+
+        Returns:
+            dict or None: Playwright storage state, or None when no usable session is stored
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                token = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            record = json.loads(self.fernet.decrypt(token))
+            if not isinstance(record, dict):
+                raise ValueError("not a session record")
+        except (InvalidToken, ValueError, SessionStoreError) as e:
+            logging.warning(f"Discarding unreadable {self.site} session: {str(e)}")
+            self.clear()
+            return None
+
+        now = time.time()
+        if now - record.get('saved_at', 0) > self.max_age:
+            logging.info(f"Stored {self.site} session is older than {self.max_age}s")
+            self.clear()
+            return None
+
+        state = record.get('state') or {}
+        expired = [
+            cookie['name'] for cookie in state.get('cookies', [])
+            if cookie.get('expires', -1) > 0 and cookie['expires'] < now
+        ]
+        if expired:
+            logging.info(f"Stored {self.site} session has {len(expired)} expired cookies")
+            self.clear()
+            return None
+
+        logging.info(f"Loaded stored {self.site} session")
+        return state
+
+    def save(self, context):
+        """
+        Encrypt and store the storage state of a logged-in browser context.
+
+        Args:
+            context: Playwright browser context
+        """
+        self.save_state(context.storage_state())
+
+    def save_state(self, state):
+        """
+        Encrypt and store a Playwright storage state.
+
+        Args:
+            state (dict): Storage state, e.g. from an async context's storage_state()
+        """
+        record = {'saved_at': time.time(), 'state': state}
+        try:
+            token = self.fernet.encrypt(json.dumps(record).encode())
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(token)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Stored {self.site} session")
+        except (OSError, SessionStoreError) as e:
+            # A missing session only costs a login on the next run
+            logging.warning(f"Could not store {self.site} session: {str(e)}")
+
+    def clear(self):
+        """Delete the stored session."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def probe_session(context, url, login_marker):
+    """
+    Cheaply check whether a context is still logged in.
+
+    A plain HTTP request is sent with the context's cookies; the session is valid if
+    the request succeeds without being redirected to a login page.
+
+    Args:
+        context: Playwright browser context
+        url (str): Protected URL to request
+        login_marker (str): Substring of the login page URL
+
+    Returns:
+        bool: True if the session is still authenticated
+    """
+    try:
+        response = context.request.get(url, timeout=PROBE_TIMEOUT)
+        valid = response.ok and login_marker not in response.url
+        response.dispose()
+    except Exception as e:
+        logging.warning(f"Session probe failed for {url}: {str(e)}")
+        return False
+    return valid
@@ -0,0 +1,189 @@
+"""
+Sources Module
+
+This module holds the registry of rankings sources and scrapes several sources
+concurrently.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from playwright.sync_api import Error as PlaywrightError
+
+from browser_pool import BrowserPool
+from browser_profile import apply_profile, context_options
+from instrumentation import span
+from session_store import SessionStore
+import web_scraper
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_SOURCES = ['etr']
+
+
+class RankingSource:
+    """
+    Declaration of a rankings source: where it lives, how to log in and how to extract.
+
+    Extraction must return rows in the scraper schema (name, team, position, etr_rank,
+    etr_pos_rank, adp, adp_pos_rank, adp_diff), where etr_rank holds the source's own
+    overall rank.
+    """
+
+    def __init__(self, name, url, table_selector=web_scraper.RANKINGS_TABLE_SELECTOR,
+                 credentials_env=None, login=None, extract=None, weight=1.0,
+                 fetch_mode=web_scraper.FETCH_MODE_AUTO, context_options=None):
+        """
+        Args:
+            name (str): Unique source name, also used for its stored session
+            url (str): Rankings page URL
+            table_selector (str): CSS selector of the rankings table
+            credentials_env (tuple[str, str], optional): Environment variables holding
+                the username and password; None for public sources
+            login (callable, optional): login(context, username, password, session_store)
+                returning a logged-in page; required when credentials_env is set
+            extract (callable, optional): extract(page, source) returning rows; defaults
+                to web_scraper.fetch_player_rankings
+            weight (float): Weight of this source in the consensus ranking
+            fetch_mode (str): Fetch mode passed to the default extractor
+            context_options (dict, optional): Options for the source's browser context
+        """
+        self.name = name
+        self.url = url
+        self.table_selector = table_selector
+        self.credentials_env = credentials_env
+        self.login = login
+        self.extract = extract or _default_extract
+        self.weight = weight
+        self.fetch_mode = fetch_mode
+        self.context_options = context_options or {}
+
+    def __repr__(self):
+        return f"RankingSource({self.name!r}, {self.url!r})"
+
+
+def _default_extract(page, source):
+    return web_scraper.fetch_player_rankings(page, source.url, source.fetch_mode,
+                                             source.table_selector)
+
+
+_registry = {}
+
+
+def register_source(source):
+    """
+    Add a source to the registry, replacing any source with the same name.
+
+    Args:
+        source (RankingSource): Source to register
+    """
+    _registry[source.name] = source
+
+
+def get_source(name):
+    """
+    Look up a registered source.
+
+    Args:
+        name (str): Source name
+
+    Returns:
+        RankingSource: The registered source
+
+    Raises:
+        web_scraper.WebScraperError: If no source has that name
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise web_scraper.WebScraperError(
+            f"Unknown rankings source: {name}. Registered: {', '.join(_registry)}"
+        )
+
+
+def registered_sources():
+    """Return the names of all registered sources."""
+    return list(_registry)
+
+
+def configured_sources():
+    """Return the sources named in RANKING_SOURCES (comma separated), default "etr"."""
+    names = [name.strip() for name in os.getenv('RANKING_SOURCES', '').split(',') if name.strip()]
+    return [get_source(name) for name in names or DEFAULT_SOURCES]
+
+
+register_source(RankingSource(
+    name='etr',
+    url=web_scraper.ETR_RANKINGS_URL,
+    credentials_env=('ETR_USERNAME', 'ETR_PASSWORD'),
+    login=web_scraper.ensure_logged_in,
+    context_options=web_scraper.ETR_CONTEXT_OPTIONS,
+))
+
+
+def scrape_source(source, browser_pool):
+    """
+    Scrape one source in its own browser context.
+
+    Args:
+        source (RankingSource): Source to scrape
+        browser_pool (BrowserPool): Pool owned by the calling thread
+
+    Returns:
+        list[dict]: Scraped rows
+
+    Raises:
+        web_scraper.WebScraperError: If credentials are missing or scraping fails
+    """
+    session_store = SessionStore(source.name)
+    with browser_pool.context(
+        storage_state=session_store.load(), **context_options(source.context_options)
+    ) as context:
+        apply_profile(context)
+        if source.credentials_env:
+            username, password = (os.environ.get(var) for var in source.credentials_env)
+            if not username or not password:
+                raise web_scraper.WebScraperError(
+                    f"{' and '.join(source.credentials_env)} environment variables must be set"
+                )
+            page = source.login(context, username, password, session_store)
+        else:
+            page = context.new_page()
+
+        with span('fetch_player_rankings', page=page, source=source.name) as record:
+            rows = source.extract(page, source)
+            record['rows'] = len(rows)
+    logging.info(f"Fetched {len(rows)} player rankings from {source.name}")
+    return rows
+
+
+def scrape_sources(sources, headless=True, max_workers=None):
+    """
+    Scrape several sources concurrently.
+
+    The Playwright sync API is bound to the thread that starts it, so each source is
+    scraped on a worker thread with its own BrowserPool. Total time is roughly that of
+    the slowest source rather than the sum.
+
+    Args:
+        sources (list[RankingSource]): Sources to scrape
+        headless (bool): Whether to run Chromium headless
+        max_workers (int, optional): Worker threads; defaults to one per source
+
+    Returns:
+        dict[str, list[dict] or None]: Rows per source name, None for sources that failed
+    """
+    def scrape(source):
+        try:
+            with BrowserPool(headless=headless) as pool:
+                return source.name, scrape_source(source, pool)
+        except (web_scraper.WebScraperError, PlaywrightError) as e:
+            logging.error(f"Scraping {source.name} failed: {str(e)}")
+        except Exception as e:
+            logging.error(f"An unexpected error occurred scraping {source.name}: {str(e)}")
+        return source.name, None
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources) or 1) as executor:
+        return dict(executor.map(scrape, sources))
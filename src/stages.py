@@ -0,0 +1,269 @@
+"""
+Stages Module
+
+This module holds the pipeline stages shared by main and the command-line interface.
+Each stage imports its heavy dependencies (Playwright, pandas) when it runs, so a
+command that only needs one stage does not load the others.
+"""
+
+import os
+import logging
+
+from instrumentation import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CONSENSUS_SOURCE = 'consensus'
+
+# Processing engines: pandas handles every case; fast writes the same upload CSV for a
+# single source without pandas, but records no history
+ENGINE_PANDAS = 'pandas'
+ENGINE_FAST = 'fast'
+ENGINES = (ENGINE_PANDAS, ENGINE_FAST)
+
+
+def processing_engine():
+    """Return the processing engine selected by PROCESSING_ENGINE, default pandas."""
+    engine = os.getenv('PROCESSING_ENGINE', ENGINE_PANDAS)
+    if engine not in ENGINES:
+        logging.warning(f"Unknown PROCESSING_ENGINE {engine!r}; using {ENGINE_PANDAS}")
+        return ENGINE_PANDAS
+    return engine
+
+def record_history(history_store, df, source, taken_on=None):
+    """Append a processed snapshot to the history store; failures never stop the run."""
+    from history_store import HistoryStoreError
+
+    if df is None:
+        return
+    try:
+        with span('record_history', source=source):
+            history_store.append(df, source=source, taken_on=taken_on)
+    except HistoryStoreError as e:
+        logging.warning(f"Could not record {source} rankings history: {str(e)}")
+
+def scrape_rankings(browser_pool, headless=True):
+    """
+    Scrape the configured rankings sources.
+
+    With only ETR configured this is the original single-source path on the shared
+    browser. With several sources (RANKING_SOURCES) they are scraped in parallel.
+
+    Args:
+        browser_pool (BrowserPool): Shared browser pool for the single-source path
+        headless (bool): Headless setting for the per-source browsers
+
+    Returns:
+        dict[str, list[dict]]: Scraped rows per source name
+
+    Raises:
+        WebScraperError: If no source could be scraped
+    """
+    from web_scraper import scrape_rankings as scrape_etr_rankings, WebScraperError
+    from sources import configured_sources, scrape_sources
+
+    sources = configured_sources()
+    if [source.name for source in sources] == ['etr']:
+        return {'etr': scrape_etr_rankings(browser_pool)}
+
+    with span('scrape_sources', sources=len(sources)):
+        scraped = scrape_sources(sources, headless=headless)
+    for source in sources:
+        if not scraped.get(source.name):
+            logging.warning(f"No data was scraped from {source.name}")
+    scraped = {name: rows for name, rows in scraped.items() if rows}
+    if not scraped:
+        raise WebScraperError("No source produced rankings")
+    return scraped
+
+def process_rankings(scraped, history=True, taken_on=None):
+    """
+    Process scraped rankings into the complete DraftKings upload.
+
+    Several sources are merged into a consensus ranking using RANKING_MERGE_METHOD.
+    Every processed snapshot, including the consensus, is appended to the history
+    store. The result is assembled into the full template player list in rank order.
+
+    Args:
+        scraped (dict[str, list[dict]] or dict[str, str]): Scraped rows, or a rankings
+            CSV path, per source name
+        history (bool): Whether to append the snapshots to the history store
+        taken_on (date or str, optional): Day the rankings were published, default today
+
+    Returns:
+        pd.DataFrame: Every template player in upload order
+
+    Raises:
+        DataProcessingError: If no source could be processed or the upload is incomplete
+    """
+    from data_processor import (
+        process_data,
+        merge_rankings,
+        assemble_rankings,
+        MERGE_WEIGHTED_MEAN,
+        DataProcessingError,
+    )
+    from history_store import HistoryStore
+
+    history_store = HistoryStore() if history else None
+    processed = {}
+    for name, rows in scraped.items():
+        df = process_data(rows)
+        if df is None:
+            logging.warning(f"Processing {name} rankings failed")
+            continue
+        if history_store is not None:
+            record_history(history_store, df, name, taken_on)
+        processed[name] = df
+    if not processed:
+        raise DataProcessingError("Data processing failed.")
+    if len(scraped) == 1:
+        rankings = next(iter(processed.values()))
+    else:
+        # The registry imports the browser stack; only needed for source weights
+        from sources import configured_sources
+
+        sources = {source.name: source for source in configured_sources()}
+        with span('merge_rankings', sources=len(processed)):
+            rankings = merge_rankings(
+                processed,
+                weights={name: sources[name].weight for name in processed if name in sources},
+                method=os.getenv('RANKING_MERGE_METHOD', MERGE_WEIGHTED_MEAN),
+            )
+        if history_store is not None:
+            record_history(history_store, rankings, CONSENSUS_SOURCE, taken_on)
+
+    with span('assemble_rankings') as record:
+        assembled = assemble_rankings(rankings)
+        record['rows'] = len(assembled)
+    return assembled
+
+def process_rankings_csv(scraped):
+    """
+    Process one scraped source into the DraftKings upload CSV without pandas.
+
+    Produces the same bytes as serializing process_rankings' result, but does not
+    record history, which needs pandas.
+
+    Args:
+        scraped (dict[str, list[dict]]): Scraped rows of a single source
+
+    Returns:
+        bytes: The upload CSV
+
+    Raises:
+        PlayerRankingError: If there are several sources or processing fails
+    """
+    from player_ranking import process_rankings_csv as process_csv, PlayerRankingError
+
+    if len(scraped) != 1:
+        raise PlayerRankingError("The fast engine processes a single source; "
+                                 "merging sources needs the pandas engine")
+    return process_csv(next(iter(scraped.values())))
+
+def process_scraped(scraped):
+    """
+    Process freshly scraped rankings with the engine selected by PROCESSING_ENGINE.
+
+    The fast engine is used for a single source; merging several sources, and
+    recording history, needs the pandas engine, so they fall back to it.
+
+    Args:
+        scraped (dict[str, list[dict]]): Scraped rows per source name
+
+    Returns:
+        pd.DataFrame or bytes: Processed rankings, or the upload CSV from the fast engine
+    """
+    if processing_engine() == ENGINE_FAST:
+        if len(scraped) == 1:
+            logging.info("Processing with the fast engine; rankings history is not recorded")
+            return process_rankings_csv(scraped)
+        logging.info("The fast engine handles a single source; merging with pandas instead")
+    return process_rankings(scraped)
+
+def upload_row_count(rankings):
+    """Return the number of players in processed rankings or an upload CSV."""
+    if isinstance(rankings, bytes):
+        return max(rankings.count(b'\n') - 1, 0)
+    return len(rankings)
+
+def load_upload_state(checkpoints, fingerprint):
+    """
+    Return the accounts already uploaded to in this run for the given rankings.
+
+    The "upload" checkpoint is keyed to the fingerprint of the rankings it was
+    recorded for; progress recorded for other rankings is discarded, so new
+    rankings are never skipped for an account that only received older ones.
+
+    Args:
+        checkpoints (CheckpointStore): Checkpoints of this run
+        fingerprint (str): change_detector.compute_fingerprint of the rankings
+
+    Returns:
+        dict: 'fingerprint' and 'uploaded' (list of usernames)
+    """
+    state = checkpoints.load('upload')
+    if state and state.get('fingerprint') != fingerprint:
+        logging.info("Discarding upload progress recorded for different rankings")
+        state = None
+    return state or {'fingerprint': fingerprint, 'uploaded': []}
+
+def upload_rankings(accounts, rankings, browser_pool, checkpoints, fingerprint, headless=True):
+    """
+    Upload rankings to every account that has not received them yet in this run.
+
+    Accounts are marked done in the "upload" checkpoint as they succeed, so a retry
+    or a resumed run only uploads the same rankings to the accounts that failed.
+    Several accounts are uploaded concurrently, each with its own retries, so their
+    failures are raised as DraftKingsAccountsError, which the pipeline runner does
+    not retry again.
+
+    Args:
+        accounts (list[tuple[str, str]]): Usernames and passwords
+        rankings (str or pd.DataFrame): Processed rankings, or a path to a processed CSV
+        browser_pool (BrowserPool): Shared browser pool for single-account uploads
+        checkpoints (CheckpointStore): Checkpoints of this run
+        fingerprint (str): Fingerprint of the rankings, from ChangeDetector.check
+        headless (bool): Headless setting for the concurrent uploader
+
+    Raises:
+        DraftKingsAuthError: If DraftKings rejected the credentials of any account
+        DraftKingsAccountsError: If other accounts failed after their retries
+        DraftKingsUploaderError: If the upload to a single account failed
+    """
+    from draftkings_uploader import (
+        upload_rankings_to_draftkings, DraftKingsAccountsError, DraftKingsAuthError,
+    )
+    from async_uploader import upload_rankings_for_accounts
+
+    state = load_upload_state(checkpoints, fingerprint)
+    pending = [account for account in accounts if account[0] not in state['uploaded']]
+    if len(pending) < len(accounts):
+        logging.info(f"Resuming upload: {len(accounts) - len(pending)} account(s) already done")
+
+    if len(pending) > 1:
+        results = upload_rankings_for_accounts(pending, rankings, headless=headless)
+        failures = []
+        for result in results:
+            if result['success']:
+                state['uploaded'].append(result['username'])
+            else:
+                logging.error(f"Upload failed for {result['username']}: {result['error']}")
+                failures.append(result)
+        checkpoints.save('upload', state)
+        if failures:
+            details = '; '.join(f"{result['username']}: {result['error']}" for result in failures)
+            message = f"Upload failed for {len(failures)} account(s): {details}"
+            # Chain the account's own error so the runner classifies it; rejected
+            # credentials must surface as an auth error to stop further logins
+            rejected = [result['exception'] for result in failures
+                        if isinstance(result['exception'], DraftKingsAuthError)]
+            if rejected:
+                raise DraftKingsAuthError(message) from rejected[0]
+            raise DraftKingsAccountsError(message) from failures[0]['exception']
+    elif pending:
+        username, password = pending[0]
+        upload_rankings_to_draftkings(username, password, rankings, browser_pool=browser_pool)
+        state['uploaded'].append(username)
+        checkpoints.save('upload', state)
@@ -0,0 +1,230 @@
+"""
+Template Repository Module
+
+This module loads DraftKings player templates once per process and serves them,
+together with their player indexes, from memory.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import logging
+import threading
+
+from player_index import PlayerIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(PROJECT_ROOT, 'csv-templates')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'templates')
+
+DEFAULT_TEMPLATE = 'nfl'
+DEFAULT_TEMPLATES = {
+    DEFAULT_TEMPLATE: os.path.join(TEMPLATE_DIR, 'DkPreDraftRankings.csv'),
+}
+
+# Bump when the cached frame changes in a way TEMPLATE_COLUMNS and TEMPLATE_DTYPES do not show
+CACHE_VERSION = 1
+
+# Columns kept from the template, in upload order; the instruction columns are dropped.
+TEMPLATE_COLUMNS = ['ID', 'Name', 'Position', 'ADP', 'Team']
+TEMPLATE_DTYPES = {
+    'ID': 'int64',
+    'Name': 'object',
+    'Position': 'category',
+    'ADP': 'float32',
+    'Team': 'category',
+}
+
+
+class TemplateRepositoryError(Exception):
+    """Custom exception class for template repository errors"""
+    pass
+
+
+def _file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _schema_digest():
+    """Return a digest of the cached frame's layout, so a schema change skips old caches."""
+    schema = json.dumps([CACHE_VERSION, TEMPLATE_COLUMNS, TEMPLATE_DTYPES], sort_keys=True)
+    return hashlib.sha256(schema.encode('utf-8')).hexdigest()
+
+
+class TemplateRepository:
+    """
+    Registry of DraftKings templates loaded at most once per process.
+
+    Each template is parsed from CSV only when its content changes; the compact
+    typed frame is pickled under the cache directory keyed by the file's hash and
+    the frame's schema, and the in-memory copy is reused while the file's mtime and
+    size are unchanged.
+    """
+
+    def __init__(self, templates=None, cache_dir=CACHE_DIR):
+        """
+        Args:
+            templates (dict, optional): Mapping of template name to CSV path
+            cache_dir (str, optional): Directory for pickled templates, or None to disable
+        """
+        self.cache_dir = cache_dir
+        self._paths = dict(DEFAULT_TEMPLATES if templates is None else templates)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path):
+        """
+        Register an additional template, e.g. a later-season slate.
+
+        Args:
+            name (str): Template name
+            path (str): Path to the template CSV, relative paths resolve against the project root
+        """
+        if not os.path.isabs(path):
+            path = os.path.join(PROJECT_ROOT, path)
+        with self._lock:
+            self._paths[name] = path
+            self._loaded.pop(name, None)
+
+    def names(self):
+        """Return the names of all registered templates."""
+        return list(self._paths)
+
+    def path(self, name=DEFAULT_TEMPLATE):
+        """
+        Return the CSV path of a registered template.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            str: Path to the template CSV
+
+        Raises:
+            TemplateRepositoryError: If the template is unknown
+        """
+        try:
+            return self._paths[name]
+        except KeyError:
+            raise TemplateRepositoryError(f"Unknown template: {name}")
+
+    def get(self, name=DEFAULT_TEMPLATE):
+        """
+        Return the template DataFrame for the given name.
+
+        The returned frame is shared; callers must not modify it in place.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            pd.DataFrame: Template with the columns in TEMPLATE_COLUMNS
+
+        Raises:
+            TemplateRepositoryError: If the template is unknown or cannot be loaded
+        """
+        return self._entry(name)['frame']
+
+    def index(self, name=DEFAULT_TEMPLATE):
+        """
+        Return the PlayerIndex for the given template, building it on first use.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            PlayerIndex: Index over the template rows
+
+        Raises:
+            TemplateRepositoryError: If the template is unknown or cannot be loaded
+        """
+        entry = self._entry(name)
+        if entry['index'] is None:
+            with self._lock:
+                if entry['index'] is None:
+                    entry['index'] = PlayerIndex.from_dataframe(entry['frame'])
+        return entry['index']
+
+    def clear(self):
+        """Drop all in-memory templates so they are reloaded on next access."""
+        with self._lock:
+            self._loaded.clear()
+
+    def _entry(self, name):
+        path = self.path(name)
+
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise TemplateRepositoryError(f"Template file not found: {path} ({str(e)})")
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is None or entry['signature'] != signature:
+                entry = {'signature': signature, 'frame': self._load(path), 'index': None}
+                self._loaded[name] = entry
+        return entry
+
+    def _load(self, path):
+        digest = _file_digest(path)
+        cache_path = None
+        if self.cache_dir:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            cache_path = os.path.join(self.cache_dir,
+                                      f'{stem}-{digest[:16]}-{_schema_digest()[:8]}.pkl')
+            try:
+                with open(cache_path, 'rb') as f:
+                    frame = pickle.load(f)
+                logging.info(f"Loaded cached template: {cache_path}")
+                return frame
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable template cache {cache_path}: {str(e)}")
+
+        # Imported here so template paths can be looked up without loading pandas
+        import pandas as pd
+
+        try:
+            frame = pd.read_csv(path, usecols=TEMPLATE_COLUMNS).astype(TEMPLATE_DTYPES)
+        except Exception as e:
+            logging.error(f"Error reading template {path}: {str(e)}")
+            raise TemplateRepositoryError(f"Failed to read template {path}: {str(e)}")
+        logging.info(f"Parsed template CSV: {path}")
+
+        if cache_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logging.warning(f"Could not write template cache {cache_path}: {str(e)}")
+        return frame
+
+
+_default_repository = None
+
+
+def get_template_repository():
+    """
+    Return the process-wide template repository.
+
+    Returns:
+        TemplateRepository: Shared repository instance
+    """
+    global _default_repository
+    if _default_repository is None:
+        _default_repository = TemplateRepository()
+    return _default_repository
@@ -6,25 +6,70 @@ This module handles web scraping functionality using Playwright.
 
 import os
 import csv
+import html
+import re
+import time
 import logging
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import Error as PlaywrightError
 
+from browser_pool import borrowed_or_owned_pool
+from browser_profile import apply_profile, context_options
+from diagnostics import capture_failure, start_tracing, stop_tracing
+from instrumentation import span
+from session_store import SessionStore, probe_session
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+RANKINGS_TABLE_SELECTOR = 'table[data-ninja_table_instance="ninja_table_instance_0"]'
+
+FETCH_MODE_AUTO = 'auto'
+FETCH_MODE_NETWORK = 'network'
+FETCH_MODE_DOM = 'dom'
+FETCH_MODES = (FETCH_MODE_AUTO, FETCH_MODE_NETWORK, FETCH_MODE_DOM)
+NETWORK_CAPTURE_TIMEOUT = 30000
+# How long a table rendered without the AJAX call may still be waiting for it, in ms
+TABLE_RENDER_GRACE = 1000
+CAPTURE_POLL_INTERVAL = 100
+
+# Column keys of the ETR ninja table and the ranking field each one holds. Rows with
+# any other set of keys are rejected, so a renamed or added column is noticed instead
+# of shifting values into the wrong fields.
+NINJA_TABLE_COLUMNS = {
+    'player': 'name',
+    'team': 'team',
+    'pos': 'position',
+    'etr_rank': 'etr_rank',
+    'etr_pos_rank': 'etr_pos_rank',
+    'adp': 'adp',
+    'adp_pos_rank': 'adp_pos_rank',
+    'adp_diff': 'adp_diff',
+}
+
+ETR_RANKINGS_URL = "https://establishtherun.com/etrs-top-300-for-draftkings-best-ball-rankings-updates-9am-daily/"
+ETR_PROBE_URL = "https://establishtherun.com/wp-admin/"
+ETR_LOGIN_MARKER = "wp-login.php"
+
+ETR_CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'java_script_enabled': True,
+    'ignore_https_errors': True,
+    'has_touch': False,
+    'is_mobile': False,
+    'locale': 'en-US',
+}
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+
 class WebScraperError(Exception):
     """Custom exception class for web scraper errors"""
     pass
 
-def print_page_content(page):
-    """
-    Print the current page content for debugging purposes.
-    """
-    logging.info("Current page content:")
-    content = page.content()
-    print(content[:1000])  # Print first 1000 characters to avoid overwhelming the console
-    logging.info("End of page content")
+class WebScraperAuthError(WebScraperError):
+    """Raised when ETR rejects the credentials; retrying will not help."""
+    pass
 
 def login(context, username, password):
     """
@@ -51,17 +96,17 @@ def login(context, username, password):
         page.fill('input[name="pwd"]', password)
         
         logging.info("Submitting login form")
-        page.click('input[name="wp-submit"]')
-        
-        logging.info("Waiting for navigation after login")
-        page.wait_for_load_state("networkidle", timeout=60000)  # Increase timeout to 60 seconds
+        # The form posts back to wp-login.php, which redirects on success or re-renders
+        # with an error; either way the document load is the signal, not network idle
+        with page.expect_navigation(wait_until="domcontentloaded", timeout=60000):
+            page.click('input[name="wp-submit"]')
 
         # Check for error messages
         error_message = page.query_selector('.login .message')
         if error_message:
             error_text = error_message.inner_text()
             logging.error(f"Login error message: {error_text}")
-            raise Exception(f"Login failed: {error_text}")
+            raise WebScraperAuthError(f"Login failed: {error_text}")
 
         # Check if we're still on the login page
         if "wp-login.php" in page.url:
@@ -70,11 +115,9 @@ def login(context, username, password):
             if login_error:
                 error_text = login_error.inner_text()
                 logging.error(f"Login error: {error_text}")
-                print_page_content(page)
-                raise WebScraperError(f"Login failed: {error_text}")
+                raise WebScraperAuthError(f"Login failed: {error_text}")
             else:
                 logging.error(f"Still on login page. Current URL: {page.url}")
-                print_page_content(page)
                 raise WebScraperError("Login failed: Redirected back to login page")
 
         # Check if we're on the wp-admin page or any other page within the site
@@ -85,11 +128,8 @@ def login(context, username, password):
         
         logging.info(f"Login successful. Current URL: {page.url}")
 
-        # Set cookies explicitly after successful login
-        cookies = context.cookies()
-        logging.info(f"Number of cookies after login: {len(cookies)}")
-        for cookie in cookies:
-            logging.info(f"Cookie: {cookie['name']} = {cookie['value']}")
+        # Cookie values are credentials; only their number is logged
+        logging.info(f"Number of cookies after login: {len(context.cookies())}")
 
         # Additional check: Try to access a protected resource
         try:
@@ -104,6 +144,8 @@ def login(context, username, password):
             raise Exception("Login seems successful, but timed out while accessing protected resources")
         
         return page
+    except WebScraperAuthError:
+        raise
     except PlaywrightTimeoutError as e:
         logging.error(f"Login timed out: {str(e)}")
         raise WebScraperError(f"Login timed out: {str(e)}")
@@ -114,90 +156,325 @@ def login(context, username, password):
         logging.error(f"An unexpected error occurred during login: {str(e)}")
         raise WebScraperError(f"An unexpected error occurred during login: {str(e)}")
 
-def fetch_player_rankings(page, url):
+def ensure_logged_in(context, username, password, session_store):
+    """
+    Reuse a stored session when it is still valid, logging in only when it is not.
+
+    Args:
+        context: Playwright browser context, created with the stored storage state
+        username (str): Username for login
+        password (str): Password for login
+        session_store (SessionStore): Store holding the ETR session
+
+    Returns:
+        Page: Logged in page object
+
+    Raises:
+        WebScraperError: If login fails
+    """
+    if probe_session(context, ETR_PROBE_URL, ETR_LOGIN_MARKER):
+        logging.info("Reusing stored ETR session")
+        return context.new_page()
+
+    session_store.clear()
+
+    # Enable cookies
+    context.add_cookies([{
+        'name': 'wordpress_test_cookie',
+        'value': 'WP Cookie check',
+        'domain': 'establishtherun.com',
+        'path': '/',
+    }])
+
+    with span('login', page=context):
+        page = login(context, username, password)
+    session_store.save(context)
+    return page
+
+def is_ninja_table_response(response):
+    """Return True for the ninja-tables AJAX response carrying the table rows."""
+    return "admin-ajax.php" in response.url and "ninja_tables" in response.url and response.ok
+
+def _strip_html(value):
+    """Convert a ninja-tables cell value to plain text."""
+    if value is None:
+        return ''
+    return html.unescape(_HTML_TAG.sub('', str(value))).strip()
+
+def parse_ninja_table_payload(payload):
+    """
+    Parse the ninja-tables JSON payload into player ranking dictionaries.
+
+    Rows are objects, either plain or wrapped in a "value" key. Cells are mapped to
+    ranking fields by column key through NINJA_TABLE_COLUMNS; internal keys such as
+    "___id___" are ignored.
+
+    Args:
+        payload (list or dict): Decoded JSON response body
+
+    Returns:
+        list[dict]: A list of dictionaries containing player information.
+
+    Raises:
+        WebScraperError: If the payload or any row does not have the expected shape
+    """
+    rows = payload.get('data') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise WebScraperError("Unexpected ninja table payload: no row list found")
+
+    expected = set(NINJA_TABLE_COLUMNS)
+    players = []
+    for number, row in enumerate(rows, 1):
+        if isinstance(row, dict) and isinstance(row.get('value'), dict):
+            row = row['value']
+        if not isinstance(row, dict):
+            raise WebScraperError(f"Unexpected ninja table row {number}: {type(row).__name__}")
+        keys = {str(key) for key in row if not str(key).startswith('___')}
+        if keys != expected:
+            missing = ', '.join(sorted(expected - keys)) or 'none'
+            unexpected = ', '.join(sorted(keys - expected)) or 'none'
+            raise WebScraperError(f"Unexpected ninja table columns in row {number}: "
+                                  f"missing {missing}; unexpected {unexpected}")
+        players.append({field: _strip_html(row[key])
+                         for key, field in NINJA_TABLE_COLUMNS.items()})
+    return players
+
+def _fetch_rankings_from_dom(page, table_selector=RANKINGS_TABLE_SELECTOR):
+    """Extract player rankings from the rendered rankings table."""
+    page.wait_for_selector(table_selector)
+    return page.evaluate("""
+        (tableSelector) => {
+            const rows = Array.from(document.querySelectorAll(tableSelector + ' tbody tr'));
+            return rows.map(row => {
+                const cells = row.querySelectorAll('td');
+                return {
+                    name: cells[0].textContent.trim(),
+                    team: cells[1].textContent.trim(),
+                    position: cells[2].textContent.trim(),
+                    etr_rank: cells[3].textContent.trim(),
+                    etr_pos_rank: cells[4].textContent.trim(),
+                    adp: cells[5].textContent.trim(),
+                    adp_pos_rank: cells[6].textContent.trim(),
+                    adp_diff: cells[7].textContent.trim(),
+                };
+            });
+        }
+    """, table_selector)
+
+def _capture_payload_or_table(page, url, table_selector):
+    """
+    Load the page and wait for the ninja-tables response or the rendered table rows.
+
+    Returns:
+        Response or None: The AJAX response, or None once the table has rendered
+            without one (or neither appeared within NETWORK_CAPTURE_TIMEOUT)
+    """
+    responses = []
+
+    def on_response(response):
+        if is_ninja_table_response(response):
+            responses.append(response)
+
+    page.on('response', on_response)
+    try:
+        page.goto(url)
+        deadline = time.monotonic() + NETWORK_CAPTURE_TIMEOUT / 1000
+        rendered_at = None
+        while not responses:
+            now = time.monotonic()
+            if rendered_at is None and page.query_selector(f'{table_selector} tbody tr'):
+                rendered_at = now
+            # Server-rendered rows may still be followed by the call for the full table
+            if rendered_at is not None and now - rendered_at >= TABLE_RENDER_GRACE / 1000:
+                return None
+            if now >= deadline:
+                return None
+            page.wait_for_timeout(CAPTURE_POLL_INTERVAL)
+        return responses[0]
+    finally:
+        page.remove_listener('response', on_response)
+
+def fetch_player_rankings(page, url, mode=FETCH_MODE_AUTO,
+                          table_selector=RANKINGS_TABLE_SELECTOR):
     """
     Fetch player rankings from the specified URL using Playwright.
 
+    In "network" mode the ninja-tables AJAX response is captured while the page loads
+    and parsed directly, which returns every row regardless of pagination. In "dom"
+    mode the rendered table is walked instead. "auto" waits for whichever comes first,
+    the payload or the rendered table, and falls back to the DOM when the table
+    renders without the AJAX call or the payload is unusable.
+
     Args:
         page: Playwright page object
         url (str): The URL of the rankings page.
+        mode (str): One of "auto", "network" or "dom"
+        table_selector (str): CSS selector of the rankings table for DOM extraction
 
     Returns:
         list[dict]: A list of dictionaries containing player information.
     """
+    if mode not in FETCH_MODES:
+        raise WebScraperError(
+            f"Invalid fetch mode: {mode}. Expected one of {', '.join(FETCH_MODES)}."
+        )
+
     try:
-        page.goto(url)
-        page.wait_for_selector('table[data-ninja_table_instance="ninja_table_instance_0"]')
-
-        players = page.evaluate("""
-            () => {
-                const rows = Array.from(document.querySelectorAll('table[data-ninja_table_instance="ninja_table_instance_0"] tbody tr'));
-                return rows.map(row => {
-                    const cells = row.querySelectorAll('td');
-                    return {
-                        name: cells[0].textContent.trim(),
-                        team: cells[1].textContent.trim(),
-                        position: cells[2].textContent.trim(),
-                        etr_rank: cells[3].textContent.trim(),
-                        etr_pos_rank: cells[4].textContent.trim(),
-                        adp: cells[5].textContent.trim(),
-                        adp_pos_rank: cells[6].textContent.trim(),
-                        adp_diff: cells[7].textContent.trim(),
-                    };
-                });
-            }
-        """)
-        return players
+        if mode == FETCH_MODE_DOM:
+            page.goto(url)
+            return _fetch_rankings_from_dom(page, table_selector)
+
+        try:
+            if mode == FETCH_MODE_NETWORK:
+                with page.expect_response(
+                    is_ninja_table_response, timeout=NETWORK_CAPTURE_TIMEOUT
+                ) as response_info:
+                    page.goto(url)
+                response = response_info.value
+            else:
+                response = _capture_payload_or_table(page, url, table_selector)
+                if response is None:
+                    raise WebScraperError("The rankings table rendered without the AJAX call")
+            players = parse_ninja_table_payload(response.json())
+            if players:
+                logging.info(f"Captured {len(players)} rankings from the ninja table payload")
+                return players
+            raise WebScraperError("Ninja table payload contained no rows")
+        except (PlaywrightTimeoutError, WebScraperError, ValueError) as e:
+            if mode == FETCH_MODE_NETWORK:
+                raise WebScraperError(f"Failed to capture rankings payload: {str(e)}")
+            logging.warning(f"Falling back to DOM extraction: {str(e)}")
+            return _fetch_rankings_from_dom(page, table_selector)
     except PlaywrightTimeoutError:
         raise Exception("Failed to load rankings page")
 
+def ninja_table_endpoint(response):
+    """
+    Return the URL and cache validators of a ninja-tables AJAX response.
+
+    Args:
+        response: Playwright response for which is_ninja_table_response is True
+
+    Returns:
+        dict: 'url', 'etag' and 'last_modified' (None when the server sent none)
+    """
+    headers = response.headers
+    return {'url': response.url, 'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified')}
+
+def fetch_ninja_table(request, endpoint):
+    """
+    Request the ninja-tables rows directly, without loading the rankings page.
+
+    The request is conditional on the validators of the last response, so an
+    unchanged table costs a 304 Not Modified. The URL carries a WordPress nonce;
+    once it expires the request fails and the page has to be loaded again.
+
+    Args:
+        request: Playwright APIRequestContext carrying the ETR session cookies
+        endpoint (dict): Endpoint from ninja_table_endpoint
+
+    Returns:
+        tuple[list[dict] or None, dict]: The rows, or None if the table was not
+            modified, and the endpoint with the validators of this response
+
+    Raises:
+        WebScraperError: If the request fails or does not return ninja-tables rows
+    """
+    headers = {}
+    if endpoint.get('etag'):
+        headers['If-None-Match'] = endpoint['etag']
+    if endpoint.get('last_modified'):
+        headers['If-Modified-Since'] = endpoint['last_modified']
+    try:
+        response = request.get(endpoint['url'], headers=headers,
+                               timeout=NETWORK_CAPTURE_TIMEOUT)
+    except PlaywrightError as e:
+        raise WebScraperError(f"Ninja table request failed: {str(e)}")
 
-def main():
-    url = "https://establishtherun.com/etrs-top-300-for-draftkings-best-ball-rankings-updates-9am-daily/"
+    try:
+        if response.status == 304:
+            return None, endpoint
+        if not response.ok:
+            raise WebScraperError(f"Ninja table request returned HTTP {response.status}")
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise WebScraperError(f"Ninja table response is not JSON: {str(e)}")
+        players = parse_ninja_table_payload(payload)
+        if not players:
+            raise WebScraperError("Ninja table payload contained no rows")
+        headers = response.headers
+        return players, dict(endpoint, etag=headers.get('etag'),
+                             last_modified=headers.get('last-modified'))
+    finally:
+        response.dispose()
+
+
+def scrape_rankings(browser_pool=None):
+    """
+    Log in to ETR and fetch the Top 300 rankings, raising on failure.
+
+    Args:
+        browser_pool (BrowserPool, optional): Shared browser pool; a temporary one is
+            launched when omitted
+
+    Returns:
+        list[dict]: Player rankings
+
+    Raises:
+        WebScraperError: If credentials are missing, login fails or no rankings are found
+        PlaywrightError: If the browser fails
+    """
     username = os.environ.get("ETR_USERNAME")
     password = os.environ.get("ETR_PASSWORD")
 
     if not username or not password:
         raise WebScraperError("ETR_USERNAME and ETR_PASSWORD environment variables must be set")
 
+    session_store = SessionStore('etr')
+    with borrowed_or_owned_pool(browser_pool) as pool, pool.context(
+        storage_state=session_store.load(), **context_options(ETR_CONTEXT_OPTIONS)
+    ) as context:
+        apply_profile(context)
+        start_tracing(context)
+
+        try:
+            page = ensure_logged_in(context, username, password, session_store)
+            fetch_mode = os.environ.get("ETR_FETCH_MODE", FETCH_MODE_AUTO)
+            with span('fetch_player_rankings', page=page, mode=fetch_mode) as record:
+                rankings = fetch_player_rankings(page, ETR_RANKINGS_URL, fetch_mode)
+                record['rows'] = len(rankings)
+        except Exception as e:
+            capture_failure(context.pages[-1] if context.pages else None, 'etr_scrape', e)
+            raise
+        stop_tracing(context)
+
+    if not rankings:
+        raise WebScraperError("No player rankings found")
+    logging.info(f"Fetched {len(rankings)} player rankings")
+    return rankings
+
+def main(browser_pool=None):
+    """
+    Log in to ETR and fetch the Top 300 rankings.
+
+    Args:
+        browser_pool (BrowserPool, optional): Shared browser pool; a temporary one is
+            launched when omitted
+
+    Returns:
+        list[dict] or None: Player rankings, or None if scraping failed
+    """
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                java_script_enabled=True,
-                ignore_https_errors=True,
-                has_touch=False,
-                is_mobile=False,
-                locale='en-US',
-            )
-
-            # Enable cookies
-            context.add_cookies([{
-                'name': 'wordpress_test_cookie',
-                'value': 'WP Cookie check',
-                'domain': 'establishtherun.com',
-                'path': '/',
-            }])
-
-            try:
-                page = login(context, username, password)
-                rankings = fetch_player_rankings(page, url)
-
-                logging.info(f"Fetched {len(rankings)} player rankings")
-                return rankings  # Return the rankings instead of printing them
-
-            except WebScraperError as e:
-                logging.error(f"A web scraping error occurred: {str(e)}")
-            except PlaywrightError as e:
-                logging.error(f"A Playwright error occurred: {str(e)}")
-            finally:
-                context.close()
-                browser.close()
+        return scrape_rankings(browser_pool)
+    except WebScraperError as e:
+        logging.error(f"A web scraping error occurred: {str(e)}")
+    except PlaywrightError as e:
+        logging.error(f"A Playwright error occurred: {str(e)}")
     except Exception as e:
         logging.error(f"An unexpected error occurred: {str(e)}")
-    
+
     return None  # Return None if scraping failed
 
 if __name__ == "__main__":
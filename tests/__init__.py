@@ -1,3 +1,11 @@
 """
 Test package for Best Ball Rankings Agent
 """
+
+import os
+import sys
+
+# The application modules import each other as top-level modules from src/
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,120 @@
+"""
+Tests for discovering, dating and backfilling archived rankings CSVs.
+"""
+
+import os
+import csv
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import backfill
+from backfill import backfill as run_backfill, discover_files, process_file, snapshot_date
+from data_processor import DataProcessingError
+from template_repository import get_template_repository
+
+HEADER = ['name', 'team', 'position', 'etr_rank', 'etr_pos_rank', 'adp', 'adp_pos_rank',
+          'adp_diff']
+
+
+def template_players(count):
+    with open(get_template_repository().path(), newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return [next(reader) for _ in range(count)]
+
+
+def crashing_process_file(path, template):
+    """process_file stand-in whose worker process dies on files named crash*."""
+    if os.path.basename(path).startswith('crash'):
+        os._exit(1)
+    return process_file(path, template)
+
+
+class BackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text=None):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            if text is not None:
+                f.write(text)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(HEADER)
+                for rank, player in enumerate(template_players(3), 1):
+                    writer.writerow([player['Name'], player['Team'], player['Position'], rank,
+                                     rank, player['ADP'], rank, 0])
+        return path
+
+
+class DiscoverFilesTest(BackfillTestCase):
+    def test_directory_lists_its_csv_files_sorted(self):
+        b, a = self.write('b.csv', ''), self.write('a.csv', '')
+        self.write('notes.txt', '')
+        self.write('nested/c.csv', '')
+        os.makedirs(os.path.join(self.directory, 'folder.csv'))
+        self.assertEqual(discover_files(self.directory), [a, b])
+
+    def test_recursive_glob(self):
+        a = self.write('a.csv', '')
+        c = self.write('nested/c.csv', '')
+        self.assertEqual(discover_files(os.path.join(self.directory, '**', '*.csv')), [a, c])
+
+    def test_no_match(self):
+        self.assertEqual(discover_files(os.path.join(self.directory, '*.csv')), [])
+
+
+class SnapshotDateTest(BackfillTestCase):
+    def test_date_in_name(self):
+        for name in ('etr-2024-08-01.csv', 'etr_20240801.csv', 'rankings_2024_08_01_final.csv'):
+            with self.subTest(name=name):
+                self.assertEqual(snapshot_date(self.write(name, '')), date(2024, 8, 1))
+
+    def test_falls_back_to_the_modification_date(self):
+        for name in ('etr.csv', 'etr-2024-13-45.csv'):
+            with self.subTest(name=name):
+                path = self.write(name, '')
+                mtime = 1_720_000_000
+                os.utime(path, (mtime, mtime))
+                self.assertEqual(snapshot_date(path), date.fromtimestamp(mtime))
+
+
+class BackfillTest(BackfillTestCase):
+    def test_bad_file_in_the_middle_is_skipped(self):
+        first = self.write('etr-2024-08-01.csv')
+        bad = self.write('etr-2024-08-02.csv', 'name,team\n"unterminated\n')
+        last = self.write('etr-2024-08-03.csv')
+        output = os.path.join(self.directory, 'out', 'backfill.csv')
+        with self.assertLogs(level='ERROR'):
+            report = run_backfill(self.directory, output=output, workers=2)
+        self.assertEqual((report['files'], report['processed'], report['rows']), (3, 2, 6))
+        self.assertEqual(list(report['errors']), [bad])
+        with open(output, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['Source File'] for row in rows[::3]],
+                         [os.path.basename(first), os.path.basename(last)])
+        self.assertEqual(rows[0]['Snapshot Date'], '2024-08-01')
+
+    def test_crashed_worker_fails_its_files_not_the_batch(self):
+        for name in ('a.csv', 'crash.csv', 'z.csv'):
+            self.write(name)
+        with mock.patch.object(backfill, 'process_file', crashing_process_file), \
+                self.assertLogs(level='ERROR'):
+            report = run_backfill(self.directory, workers=1)
+        crashed = os.path.join(self.directory, 'crash.csv')
+        self.assertIn(crashed, report['errors'])
+        self.assertIn('BrokenProcessPool', report['errors'][crashed])
+        self.assertEqual(report['processed'] + len(report['errors']), 3)
+
+    def test_no_files(self):
+        with self.assertRaises(DataProcessingError):
+            run_backfill(os.path.join(self.directory, '*.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
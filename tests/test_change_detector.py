@@ -0,0 +1,118 @@
+"""
+Tests for detecting ranking changes against the last uploaded snapshot.
+"""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from change_detector import ChangeDetector, compute_fingerprint, diff_rankings, summarize_diff
+
+
+def rankings(*players, adp=None):
+    """Processed rankings with one row per (ID, Name, Position) in rank order."""
+    df = pd.DataFrame(players, columns=['ID', 'Name', 'Position'])
+    df['ADP'] = adp if adp is not None else range(1, len(df) + 1)
+    return df
+
+
+CHASE = (1, "Ja'Marr Chase", 'WR')
+ROBINSON = (2, 'Bijan Robinson', 'RB')
+LAMB = (3, 'CeeDee Lamb', 'WR')
+
+
+class ComputeFingerprintTest(unittest.TestCase):
+    def test_depends_on_order_and_players_only(self):
+        base = compute_fingerprint(rankings(CHASE, ROBINSON, LAMB))
+        self.assertEqual(base, compute_fingerprint(rankings(CHASE, ROBINSON, LAMB, adp=[9, 8, 7])))
+        self.assertNotEqual(base, compute_fingerprint(rankings(ROBINSON, CHASE, LAMB)))
+        self.assertNotEqual(base, compute_fingerprint(rankings(CHASE, ROBINSON)))
+
+    def test_upload_csv_matches_the_dataframe(self):
+        df = rankings((None, 'Rookie', 'RB'), CHASE, ROBINSON)
+        csv_bytes = df.to_csv(index=False, lineterminator='\r\n').encode('utf-8-sig')
+        self.assertEqual(compute_fingerprint(csv_bytes), compute_fingerprint(df))
+
+    def test_missing_ids_are_stable(self):
+        df = rankings((None, 'Rookie', 'RB'), CHASE)
+        self.assertEqual(compute_fingerprint(df), compute_fingerprint(df.copy()))
+
+
+class DiffRankingsTest(unittest.TestCase):
+    def test_moves_additions_and_removals(self):
+        previous = [['1', 'A', 'WR'], ['2', 'B', 'RB'], ['3', 'C', 'QB']]
+        current = [['2', 'B', 'RB'], ['1', 'A', 'WR'], ['4', 'D', 'TE']]
+        diff = diff_rankings(previous, current)
+        self.assertEqual(diff['moved'], [
+            {'name': 'B', 'old_rank': 2, 'new_rank': 1, 'change': 1},
+            {'name': 'A', 'old_rank': 1, 'new_rank': 2, 'change': -1},
+        ])
+        self.assertEqual(diff['added'], [{'name': 'D', 'rank': 3}])
+        self.assertEqual(diff['removed'], [{'name': 'C', 'rank': 3}])
+
+    def test_unmatched_players_are_keyed_by_name_and_position(self):
+        diff = diff_rankings([['', 'Rookie', 'RB']], [['1', 'A', 'WR'], ['', 'Rookie', 'RB']])
+        self.assertEqual(diff['moved'][0]['name'], 'Rookie')
+        self.assertEqual(diff['added'], [{'name': 'A', 'rank': 1}])
+
+    def test_summary_lists_largest_moves(self):
+        diff = diff_rankings([['1', 'A', 'WR'], ['2', 'B', 'RB'], ['3', 'C', 'QB']],
+                             [['3', 'C', 'QB'], ['1', 'A', 'WR'], ['2', 'B', 'RB']])
+        summary = summarize_diff(diff, limit=1)
+        self.assertEqual(summary.splitlines(), ['3 moved, 0 added, 0 removed', '  C: 3 -> 1 (+2)'])
+
+
+class ChangeDetectorTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'last_upload.json')
+        self.detector = ChangeDetector(self.path)
+
+    def test_first_check_is_a_change_without_diff(self):
+        change = self.detector.check(rankings(CHASE, ROBINSON))
+        self.assertTrue(change['changed'])
+        self.assertIsNone(change['diff'])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_recorded_rankings_are_unchanged(self):
+        df = rankings(CHASE, ROBINSON, LAMB)
+        self.detector.record(df)
+        change = self.detector.check(rankings(CHASE, ROBINSON, LAMB, adp=[5, 6, 7]))
+        self.assertFalse(change['changed'])
+        self.assertEqual(change['fingerprint'], compute_fingerprint(df))
+        self.assertIsNone(change['diff'])
+
+    def test_reordered_rankings_report_a_diff(self):
+        self.detector.record(rankings(CHASE, ROBINSON, LAMB))
+        change = self.detector.check(rankings(ROBINSON, CHASE, LAMB))
+        self.assertTrue(change['changed'])
+        self.assertEqual([move['name'] for move in change['diff']['moved']],
+                         ['Bijan Robinson', "Ja'Marr Chase"])
+
+    def test_check_does_not_record(self):
+        self.detector.record(rankings(CHASE, ROBINSON))
+        self.detector.check(rankings(ROBINSON, CHASE))
+        self.assertTrue(self.detector.check(rankings(ROBINSON, CHASE))['changed'])
+
+    def test_records_from_the_upload_csv(self):
+        df = rankings(CHASE, ROBINSON, LAMB)
+        self.detector.record(df.to_csv(index=False).encode('utf-8'))
+        self.assertFalse(self.detector.check(df)['changed'])
+        change = self.detector.check(rankings(LAMB, CHASE, ROBINSON).to_csv(index=False).encode())
+        self.assertTrue(change['changed'])
+        self.assertEqual(change['diff']['moved'][0]['name'], 'CeeDee Lamb')
+
+    def test_unreadable_snapshot_counts_as_missing(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        with self.assertLogs(level='WARNING'):
+            change = self.detector.check(rankings(CHASE))
+        self.assertTrue(change['changed'])
+        self.assertIsNone(change['diff'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+Tests for cleaning, merging and assembling rankings.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from data_processor import (
+    MERGE_BORDA,
+    DataProcessingError,
+    assemble_rankings,
+    clean_data,
+    merge_rankings,
+    validate_upload_ids,
+)
+import template_repository
+from template_repository import TemplateRepository
+
+TEMPLATE_CSV = """ID,Name,Position,ADP,Team,,Instructions
+10,Christian McCaffrey,RB,1.3,SF,,Rank players
+20,CeeDee Lamb,WR,2.7,DAL,,
+30,Tyreek Hill,WR,3.1,MIA,,
+40,Breece Hall,RB,,NYJ,,
+50,Bijan Robinson,RB,5.2,ATL,,
+"""
+TEMPLATE_IDS = [10, 20, 30, 40, 50]
+
+
+def scraped_row(**overrides):
+    row = {
+        'name': 'Joe Burrow', 'team': 'CIN', 'position': 'QB', 'etr_rank': '1',
+        'etr_pos_rank': '1', 'adp': '40.5', 'adp_pos_rank': '4', 'adp_diff': '39.5',
+    }
+    row.update(overrides)
+    return row
+
+
+class CleanDataTest(unittest.TestCase):
+    def test_typed_schema(self):
+        df = clean_data([scraped_row(name=' Joe Burrow ')])
+        self.assertEqual(df['name'].iloc[0], 'Joe Burrow')
+        self.assertEqual(str(df['etr_rank'].dtype), 'Int16')
+        self.assertEqual(str(df['adp'].dtype), 'float32')
+        self.assertEqual(str(df['position'].dtype), 'category')
+
+    def test_invalid_and_empty_values_are_missing(self):
+        df = clean_data([scraped_row(etr_pos_rank='QB1', adp=' ')])
+        self.assertTrue(pd.isna(df['etr_pos_rank'].iloc[0]))
+        self.assertTrue(pd.isna(df['adp'].iloc[0]))
+
+    def test_numeric_cells(self):
+        df = clean_data([scraped_row(etr_rank=1, adp=1.25), scraped_row(etr_rank='2', adp=None)])
+        self.assertEqual(df['etr_rank'].tolist(), [1, 2])
+        self.assertEqual(df['adp'].iloc[0], 1.25)
+        self.assertTrue(pd.isna(df['adp'].iloc[1]))
+
+    def test_fractional_ranks_fall_back_to_float(self):
+        df = clean_data([scraped_row(etr_rank='1.5'), scraped_row(etr_rank='2')])
+        self.assertEqual(str(df['etr_rank'].dtype), 'float32')
+
+    def test_dataframe_input(self):
+        df = clean_data(pd.DataFrame([scraped_row(etr_rank=3)]))
+        self.assertEqual(df['etr_rank'].tolist(), [3])
+
+    def test_missing_columns(self):
+        row = scraped_row()
+        del row['adp']
+        with self.assertRaises(DataProcessingError):
+            clean_data([row])
+
+
+def processed(*rows, rank=True):
+    """Processed rankings for (ID, Name, Position) rows in rank order."""
+    df = pd.DataFrame(rows, columns=['ID', 'Name', 'Position'])
+    df['ID'] = df['ID'].astype(object)
+    df['ADP'] = np.nan
+    df['Team'] = None
+    if rank:
+        df['ETR Rank'] = range(1, len(df) + 1)
+    return df
+
+
+class MergeRankingsTest(unittest.TestCase):
+    def test_weighted_mean_orders_by_average_rank(self):
+        etr = processed((1, 'A', 'WR'), (2, 'B', 'RB'), (3, 'C', 'QB'))
+        other = processed((2, 'B', 'RB'), (3, 'C', 'QB'), (1, 'A', 'WR'))
+        merged = merge_rankings({'etr': etr, 'other': other})
+        self.assertEqual(merged['ID'].tolist(), [2, 1, 3])
+        self.assertEqual(merged['Consensus Rank'].tolist(), [1, 2, 3])
+        self.assertEqual(merged['Consensus Score'].tolist(), [1.5, 2.0, 2.5])
+        self.assertEqual(merged['etr Rank'].tolist(), [2.0, 1.0, 3.0])
+
+    def test_weights_favor_a_source(self):
+        etr = processed((1, 'A', 'WR'), (2, 'B', 'RB'))
+        other = processed((2, 'B', 'RB'), (1, 'A', 'WR'))
+        merged = merge_rankings({'etr': etr, 'other': other}, weights={'etr': 3})
+        self.assertEqual(merged['ID'].tolist(), [1, 2])
+
+    def test_missing_players_rank_below_the_source_list(self):
+        etr = processed((1, 'A', 'WR'), (2, 'B', 'RB'), (3, 'C', 'QB'))
+        other = processed((3, 'C', 'QB'))
+        merged = merge_rankings({'etr': etr, 'other': other})
+        # A and B count as rank 2 in other, one below its only player
+        self.assertEqual(merged['ID'].tolist(), [1, 2, 3])
+        self.assertEqual(merged['Consensus Score'].tolist(), [1.5, 2.0, 2.0])
+        self.assertEqual(merged['Sources'].tolist(), [1, 1, 2])
+        self.assertTrue(np.isnan(merged['other Rank'].iloc[0]))
+
+    def test_borda(self):
+        etr = processed((1, 'A', 'WR'), (2, 'B', 'RB'), (3, 'C', 'QB'))
+        other = processed((3, 'C', 'QB'), (2, 'B', 'RB'), (1, 'A', 'WR'))
+        merged = merge_rankings({'etr': etr, 'other': other}, method=MERGE_BORDA)
+        # Equal points keep the order the players were first seen in
+        self.assertEqual(merged['ID'].tolist(), [1, 2, 3])
+        self.assertEqual(merged['Consensus Score'].tolist(), [2.0, 2.0, 2.0])
+
+    def test_unmatched_players_and_duplicates_are_dropped(self):
+        etr = processed((1, 'A', 'WR'), (None, 'Rookie', 'RB'), (1, 'A', 'WR'))
+        merged = merge_rankings({'etr': etr})
+        self.assertEqual(merged['ID'].tolist(), [1])
+
+    def test_row_order_is_used_without_ranks(self):
+        etr = processed((2, 'B', 'RB'), (1, 'A', 'WR'), rank=False)
+        self.assertEqual(merge_rankings({'etr': etr})['ID'].tolist(), [2, 1])
+
+    def test_invalid_input(self):
+        with self.assertRaises(DataProcessingError):
+            merge_rankings({'etr': processed()})
+        with self.assertRaises(DataProcessingError):
+            merge_rankings({'etr': processed((1, 'A', 'WR'))}, method='median')
+
+    def test_source_without_matched_players_is_left_out(self):
+        etr = processed((1, 'A', 'WR'), (2, 'B', 'RB'))
+        other = processed((None, 'Rookie', 'RB'), (None, 'Other Rookie', 'WR'))
+        with self.assertLogs(level='WARNING') as logs:
+            merged = merge_rankings({'etr': etr, 'other': other})
+        self.assertIn('Leaving other out of the merge', logs.output[0])
+        self.assertEqual(merged['ID'].tolist(), [1, 2])
+        self.assertEqual(merged['Consensus Score'].tolist(), [1.0, 2.0])
+        self.assertNotIn('other Rank', merged.columns)
+        with self.assertRaisesRegex(DataProcessingError, 'No source has players matched'):
+            merge_rankings({'other': other})
+
+    def test_invalid_weights(self):
+        frames = {'etr': processed((1, 'A', 'WR')), 'other': processed((1, 'A', 'WR'))}
+        with self.assertRaisesRegex(DataProcessingError, 'sum to zero'):
+            merge_rankings(frames, weights={'etr': 0, 'other': 0}, method=MERGE_BORDA)
+        with self.assertRaisesRegex(DataProcessingError, 'non-negative numbers: other'):
+            merge_rankings(frames, weights={'other': -1})
+        with self.assertRaisesRegex(DataProcessingError, 'non-negative numbers: etr'):
+            merge_rankings(frames, weights={'etr': float('nan')})
+        # A zero weight is fine while another source carries weight
+        merged = merge_rankings(frames, weights={'other': 0})
+        self.assertEqual(merged['ID'].tolist(), [1])
+
+
+class AssembleRankingsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'template.csv')
+        with open(path, 'w') as f:
+            f.write(TEMPLATE_CSV)
+        cls.template = 'test'
+        # A private repository without a pickle cache, so nothing is written to the tree
+        repository = TemplateRepository(templates={cls.template: path}, cache_dir=None)
+        cls.patcher = mock.patch.object(template_repository, '_default_repository', repository)
+        cls.patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patcher.stop()
+        cls.directory.cleanup()
+
+    def assemble(self, df, **kwargs):
+        return assemble_rankings(df, template=self.template, **kwargs)
+
+    def test_ranked_players_first_then_template_adp(self):
+        df = processed((30, 'Tyreek Hill', 'WR'), (50, 'Bijan Robinson', 'RB'))
+        assembled = self.assemble(df)
+        # Unranked players by template ADP, the one without ADP last
+        self.assertEqual(assembled['ID'].tolist(), [30, 50, 10, 20, 40])
+        self.assertEqual(assembled['ETR Rank'].tolist()[:2], [1, 2])
+        self.assertTrue(assembled['ETR Rank'].iloc[2:].isna().all())
+        # Details come from the template
+        self.assertEqual(assembled['Team'].iloc[0], 'MIA')
+
+    def test_ranks_order_players_and_duplicates_keep_the_best_rank(self):
+        df = processed((20, 'CeeDee Lamb', 'WR'), (10, 'Christian McCaffrey', 'RB'),
+                       (20, 'CeeDee Lamb', 'WR'))
+        df['ETR Rank'] = [5, 2, 1]
+        assembled = self.assemble(df)
+        self.assertEqual(assembled['ID'].tolist()[:2], [20, 10])
+        self.assertEqual(assembled['ETR Rank'].tolist()[:2], [1, 2])
+        self.assertEqual(len(assembled), len(TEMPLATE_IDS))
+
+    def test_consensus_rank_is_preferred(self):
+        df = processed((10, 'Christian McCaffrey', 'RB'), (20, 'CeeDee Lamb', 'WR'))
+        df['Consensus Rank'] = [2, 1]
+        self.assertEqual(self.assemble(df)['ID'].tolist()[:2], [20, 10])
+
+    def test_unmatched_players_are_placed_by_adp(self):
+        df = processed((None, 'Rookie', 'RB'), (40, 'Breece Hall', 'RB'))
+        with self.assertLogs(level='WARNING'):
+            assembled = self.assemble(df)
+        self.assertEqual(assembled['ID'].tolist(), [40, 10, 20, 30, 50])
+
+    def test_unknown_ids_are_rejected(self):
+        with self.assertRaises(DataProcessingError):
+            self.assemble(processed((99, 'Nobody', 'WR')))
+
+
+class ValidateUploadIdsTest(unittest.TestCase):
+    def test_complete_upload_passes(self):
+        validate_upload_ids([50, 40, 30, 20, 10], TEMPLATE_IDS)
+
+    def test_missing_ids(self):
+        with self.assertRaisesRegex(DataProcessingError, '1 IDs missing'):
+            validate_upload_ids([10, 20, 30, 40], TEMPLATE_IDS)
+
+    def test_unknown_ids(self):
+        with self.assertRaisesRegex(DataProcessingError, '1 unknown'):
+            validate_upload_ids(TEMPLATE_IDS + [99], TEMPLATE_IDS)
+
+    def test_duplicate_ids(self):
+        with self.assertRaisesRegex(DataProcessingError, 'Duplicate player IDs: 10'):
+            validate_upload_ids([10, 10, 20, 30, 40, 50], TEMPLATE_IDS)
+
+    def test_empty_ids(self):
+        with self.assertRaisesRegex(DataProcessingError, 'no player ID'):
+            validate_upload_ids([10, None, 20, 30, 40, 50], TEMPLATE_IDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
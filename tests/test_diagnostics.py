@@ -0,0 +1,91 @@
+"""
+Tests for capturing failure artifacts without unbounded browser calls.
+"""
+
+import os
+import gzip
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+import diagnostics
+from diagnostics import (
+    CAPTURE_TIMEOUT,
+    ArtifactStore,
+    capture_failure,
+    capture_failure_async,
+)
+
+
+def fake_page(snapshot=('Rankings', '<!DOCTYPE html><html></html>'), asynchronous=False):
+    page = mock.Mock()
+    page.url = 'https://example.com/rankings'
+    call = mock.AsyncMock if asynchronous else mock.Mock
+    page.locator.return_value.evaluate = call(return_value=list(snapshot))
+    page.screenshot = call(return_value=b'png')
+    # Neither is bounded by a timeout, so capture must not call them
+    page.title = call(side_effect=AssertionError("page.title() has no timeout"))
+    page.content = call(side_effect=AssertionError("page.content() has no timeout"))
+    return page
+
+
+class CaptureFailureTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ArtifactStore(directory.name, max_bytes=2**20, max_failures=5)
+        patcher = mock.patch.dict(os.environ, {'DIAGNOSTICS_ENABLED': 'true'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertArtifacts(self, failure_dir):
+        diagnostics._get_writer().drain()
+        with open(os.path.join(failure_dir, 'info.json')) as f:
+            info = json.load(f)
+        self.assertEqual(info['title'], 'Rankings')
+        self.assertEqual(info['error'], 'ValueError: boom')
+        with gzip.open(os.path.join(failure_dir, 'page.html.gz'), 'rt') as f:
+            self.assertEqual(f.read(), '<!DOCTYPE html><html></html>')
+        with open(os.path.join(failure_dir, 'screenshot.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'png')
+
+    def test_every_browser_call_is_bounded(self):
+        page = fake_page()
+        failure_dir = capture_failure(page, 'step', ValueError('boom'), store=self.store)
+        page.locator.return_value.evaluate.assert_called_once_with(
+            diagnostics.PAGE_SNAPSHOT_SCRIPT, timeout=CAPTURE_TIMEOUT)
+        self.assertEqual(page.screenshot.call_args.kwargs['timeout'], CAPTURE_TIMEOUT)
+        self.assertArtifacts(failure_dir)
+
+    def test_async_capture(self):
+        page = fake_page(asynchronous=True)
+        failure_dir = asyncio.run(capture_failure_async(page, 'step', ValueError('boom'),
+                                                        store=self.store))
+        page.locator.return_value.evaluate.assert_awaited_once_with(
+            diagnostics.PAGE_SNAPSHOT_SCRIPT, timeout=CAPTURE_TIMEOUT)
+        self.assertArtifacts(failure_dir)
+
+    def test_partial_capture_never_raises(self):
+        page = fake_page()
+        page.locator.return_value.evaluate.side_effect = TimeoutError('page is hung')
+        with self.assertLogs(level='WARNING'):
+            failure_dir = capture_failure(page, 'step', store=self.store)
+        diagnostics._get_writer().drain()
+        self.assertTrue(os.path.exists(os.path.join(failure_dir, 'info.json')))
+        self.assertFalse(os.path.exists(os.path.join(failure_dir, 'page.html.gz')))
+
+    def test_async_trace_is_saved_with_the_failure(self):
+        page = fake_page(asynchronous=True)
+        page.context.tracing.start = mock.AsyncMock()
+        page.context.tracing.stop = mock.AsyncMock()
+        with mock.patch.dict(os.environ, {'DIAGNOSTICS_TRACE': 'true'}):
+            asyncio.run(diagnostics.start_tracing_async(page.context))
+        failure_dir = asyncio.run(capture_failure_async(page, 'step', store=self.store))
+        page.context.tracing.stop.assert_awaited_once_with(
+            path=os.path.join(failure_dir, 'trace.zip'))
+
+
+if __name__ == '__main__':
+    unittest.main()
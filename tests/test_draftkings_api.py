@@ -0,0 +1,218 @@
+"""
+Tests for capturing the DraftKings upload requests and replaying them with a new CSV.
+"""
+
+import unittest
+from contextlib import nullcontext
+from unittest import mock
+
+import draftkings_uploader
+from draftkings_api import (
+    RECIPE_VERSION,
+    DraftKingsReplayError,
+    RequestRecorder,
+    replay_upload,
+)
+
+UPLOAD_URL = 'https://api.draftkings.com/draft/rankings/upload'
+SAVE_URL = 'https://api.draftkings.com/draft/rankings/save'
+LOGIN_MARKER = 'myaccount.draftkings.com/login'
+OLD_CSV = b'ID,Name\r\n10,Christian McCaffrey\r\n'
+NEW_CSV = b'ID,Name\r\n20,CeeDee Lamb\r\n'
+PREFIX = b'--boundary\r\nContent-Disposition: form-data; name="file"\r\n\r\n'
+SUFFIX = b'\r\n--boundary--\r\n'
+
+
+class FakeResponse:
+    def __init__(self, status=200, url=UPLOAD_URL):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.url = url
+        self.disposed = False
+
+    def dispose(self):
+        self.disposed = True
+
+
+class FakeRequest:
+    def __init__(self, url, body=None, method='POST', resource_type='xhr', status=200):
+        self.url = url
+        self.method = method
+        self.resource_type = resource_type
+        self.post_data_buffer = body
+        self._response = FakeResponse(status, url)
+
+    def response(self):
+        return self._response
+
+    def all_headers(self):
+        return {':authority': 'api.draftkings.com', 'cookie': 'session=secret',
+                'content-type': 'multipart/form-data; boundary=boundary',
+                'x-csrf-token': 'token'}
+
+
+class FakePage:
+    def __init__(self):
+        self.listeners = []
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    def send(self, *requests):
+        for request in requests:
+            for handler in list(self.listeners):
+                handler(request)
+
+
+def record(*requests, csv_bytes=OLD_CSV):
+    page = FakePage()
+    recorder = RequestRecorder(page)
+    page.send(*requests)
+    recipe = recorder.build_recipe(csv_bytes)
+    return recipe, page
+
+
+class FakeRequestContext:
+    """context.request stand-in that answers each fetch with the next status."""
+
+    def __init__(self, *statuses, url=UPLOAD_URL):
+        self.statuses = list(statuses)
+        self.url = url
+        self.calls = []
+        self.responses = []
+
+    def fetch(self, url, method=None, headers=None, data=None, timeout=None):
+        self.calls.append({'url': url, 'method': method, 'headers': headers, 'data': data})
+        response = FakeResponse(self.statuses.pop(0) if self.statuses else 200, self.url)
+        self.responses.append(response)
+        return response
+
+
+class BuildRecipeTest(unittest.TestCase):
+    def test_upload_and_following_requests_are_captured(self):
+        recipe, page = record(
+            FakeRequest('https://api.draftkings.com/telemetry', b'{}'),
+            FakeRequest('https://api.draftkings.com/rankings', method='GET'),
+            FakeRequest('https://cdn.example.com/upload', PREFIX + OLD_CSV + SUFFIX),
+            FakeRequest(UPLOAD_URL, PREFIX + OLD_CSV + SUFFIX),
+            FakeRequest(SAVE_URL, b'{"save": true}', resource_type='fetch'),
+            FakeRequest('https://www.draftkings.com/image.png', b'x', resource_type='image'),
+        )
+        self.assertEqual(page.listeners, [])
+        self.assertEqual(recipe['version'], RECIPE_VERSION)
+        upload, save = recipe['steps']
+        self.assertEqual(upload['url'], UPLOAD_URL)
+        self.assertNotIn('body', upload)
+        self.assertEqual(save['url'], SAVE_URL)
+        self.assertNotIn('prefix', save)
+        # Cookies come from the replaying context, pseudo-headers are not real headers
+        self.assertEqual(upload['headers'], {
+            'content-type': 'multipart/form-data; boundary=boundary', 'x-csrf-token': 'token',
+        })
+
+    def test_nothing_carrying_the_csv(self):
+        with self.assertLogs(level='INFO'):
+            recipe, _ = record(FakeRequest(UPLOAD_URL, b'parsed client-side'))
+        self.assertIsNone(recipe)
+
+    def test_failed_request_is_not_captured(self):
+        recipe, _ = record(FakeRequest(UPLOAD_URL, PREFIX + OLD_CSV + SUFFIX),
+                           FakeRequest(SAVE_URL, b'{}', status=500))
+        self.assertIsNone(recipe)
+
+
+class ReplayUploadTest(unittest.TestCase):
+    def setUp(self):
+        self.recipe, _ = record(FakeRequest(UPLOAD_URL, PREFIX + OLD_CSV + SUFFIX),
+                                FakeRequest(SAVE_URL, b'{"save": true}'))
+
+    def replay(self, request_context):
+        context = mock.Mock(request=request_context)
+        replay_upload(context, self.recipe, NEW_CSV, LOGIN_MARKER)
+
+    def test_new_csv_is_substituted_between_prefix_and_suffix(self):
+        request_context = FakeRequestContext()
+        self.replay(request_context)
+        upload, save = request_context.calls
+        self.assertEqual(upload['data'], PREFIX + NEW_CSV + SUFFIX)
+        self.assertEqual((upload['url'], upload['method']), (UPLOAD_URL, 'POST'))
+        self.assertEqual(upload['headers']['x-csrf-token'], 'token')
+        self.assertEqual(save['data'], b'{"save": true}')
+        self.assertTrue(all(response.disposed for response in request_context.responses))
+
+    def test_failed_step_stops_the_replay(self):
+        request_context = FakeRequestContext(403)
+        with self.assertRaisesRegex(DraftKingsReplayError, 'HTTP 403'):
+            self.replay(request_context)
+        self.assertEqual(len(request_context.calls), 1)
+
+    def test_redirect_to_login_is_a_failure(self):
+        request_context = FakeRequestContext(url=f'https://{LOGIN_MARKER}?returnPath=x')
+        with self.assertRaises(DraftKingsReplayError):
+            self.replay(request_context)
+
+    def test_unusable_recipe(self):
+        for recipe in (None, {'version': RECIPE_VERSION + 1, 'steps': [{}]},
+                       {'version': RECIPE_VERSION, 'steps': []}):
+            with self.subTest(recipe=recipe), self.assertRaises(DraftKingsReplayError):
+                replay_upload(mock.Mock(), recipe, NEW_CSV, LOGIN_MARKER)
+
+
+class ReplayFallbackTest(unittest.TestCase):
+    """upload_rankings_to_draftkings in api mode with a recipe that no longer works."""
+
+    def setUp(self):
+        self.recipes = mock.Mock()
+        self.recipes.load.return_value = {'version': RECIPE_VERSION, 'steps': [{}]}
+        self.new_recipe = {'version': RECIPE_VERSION, 'steps': [{'url': UPLOAD_URL}]}
+        self.recorder = mock.Mock()
+        self.recorder.build_recipe.return_value = self.new_recipe
+        pool = mock.Mock()
+        pool.context.return_value = nullcontext(mock.Mock())
+        patches = {
+            'load_config': mock.Mock(return_value={'UPLOAD_MODE': 'api', 'HEADLESS': True}),
+            'borrowed_or_owned_pool': mock.Mock(return_value=nullcontext(pool)),
+            'SessionStore': mock.Mock(),
+            'apply_profile': mock.Mock(),
+            'start_tracing': mock.Mock(),
+            'stop_tracing': mock.Mock(),
+            'ensure_logged_in': mock.Mock(return_value=False),
+            'recipe_store': mock.Mock(return_value=self.recipes),
+            'replay_upload': mock.Mock(side_effect=DraftKingsReplayError("HTTP 400")),
+            'navigate_to_rankings_page': mock.Mock(),
+            'upload_csv_file': mock.Mock(),
+            'save_rankings': mock.Mock(),
+            'RequestRecorder': mock.Mock(return_value=self.recorder),
+        }
+        self.mocks = {}
+        for name, value in patches.items():
+            patcher = mock.patch.object(draftkings_uploader, name, value)
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_failed_replay_clears_the_recipe_and_records_again(self):
+        with self.assertLogs(level='WARNING'):
+            draftkings_uploader.upload_rankings_to_draftkings('user', 'secret', NEW_CSV)
+        self.mocks['replay_upload'].assert_called_once()
+        self.assertEqual(self.mocks['replay_upload'].call_args.args[1:],
+                         (self.recipes.load.return_value, NEW_CSV, LOGIN_MARKER))
+        self.recipes.clear.assert_called_once()
+        # The UI flow ran with a recorder attached, and its requests replace the recipe
+        self.mocks['upload_csv_file'].assert_called_once()
+        self.mocks['save_rankings'].assert_called_once()
+        self.recorder.build_recipe.assert_called_once_with(NEW_CSV)
+        self.recipes.save_state.assert_called_once_with(self.new_recipe)
+
+    def test_working_replay_skips_the_ui(self):
+        self.mocks['replay_upload'].side_effect = None
+        draftkings_uploader.upload_rankings_to_draftkings('user', 'secret', NEW_CSV)
+        self.mocks['upload_csv_file'].assert_not_called()
+        self.recipes.clear.assert_not_called()
+        self.recipes.save_state.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for recovering from a stored DraftKings session that passes the probe but is rejected.
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+import async_uploader
+import draftkings_uploader
+from draftkings_uploader import DraftKingsAuthError, DraftKingsUploaderError, run_first_step
+
+
+class RunFirstStepTest(unittest.TestCase):
+    def setUp(self):
+        self.page = mock.Mock()
+        self.session_store = mock.Mock()
+        patcher = mock.patch.object(draftkings_uploader, 'login_to_draftkings')
+        self.login = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_step(self, step, session_reused):
+        return run_first_step(self.page, 'user', 'secret', self.session_store, session_reused,
+                              step, 'arg')
+
+    def test_success_does_not_log_in(self):
+        step = mock.Mock(return_value='done')
+        self.assertEqual(self.run_step(step, True), 'done')
+        step.assert_called_once_with('arg')
+        self.login.assert_not_called()
+
+    def test_reused_session_is_replaced_once(self):
+        step = mock.Mock(side_effect=[DraftKingsUploaderError("navigation failed"), 'done'])
+        self.assertEqual(self.run_step(step, True), 'done')
+        self.assertEqual(step.call_count, 2)
+        self.page.context.clear_cookies.assert_called_once()
+        self.session_store.clear.assert_called_once()
+        self.login.assert_called_once_with(self.page, 'user', 'secret')
+        self.session_store.save.assert_called_once_with(self.page.context)
+
+    def test_second_failure_is_raised(self):
+        step = mock.Mock(side_effect=DraftKingsUploaderError("navigation failed"))
+        with self.assertRaises(DraftKingsUploaderError):
+            self.run_step(step, True)
+        self.assertEqual(step.call_count, 2)
+        self.login.assert_called_once()
+
+    def test_fresh_login_is_not_repeated(self):
+        step = mock.Mock(side_effect=DraftKingsUploaderError("navigation failed"))
+        with self.assertRaises(DraftKingsUploaderError):
+            self.run_step(step, False)
+        step.assert_called_once()
+        self.login.assert_not_called()
+
+    def test_auth_errors_are_not_retried(self):
+        step = mock.Mock(side_effect=DraftKingsAuthError("rejected"))
+        with self.assertRaises(DraftKingsAuthError):
+            self.run_step(step, True)
+        self.login.assert_not_called()
+
+
+class NavigateAfterLoginTest(unittest.TestCase):
+    def run_navigation(self, failures, session_reused):
+        page = mock.Mock()
+        page.context.clear_cookies = mock.AsyncMock()
+        page.context.storage_state = mock.AsyncMock(return_value={})
+        session_store = mock.Mock()
+        navigate = mock.AsyncMock(side_effect=failures)
+        with mock.patch.object(async_uploader, 'navigate_to_rankings_page', navigate), \
+                mock.patch.object(async_uploader, 'login_to_draftkings',
+                                  mock.AsyncMock()) as login:
+            asyncio.run(async_uploader.navigate_after_login(page, 'user', 'secret',
+                                                            session_store, session_reused))
+        return navigate, login, session_store
+
+    def test_reused_session_is_replaced_once(self):
+        navigate, login, session_store = self.run_navigation(
+            [DraftKingsUploaderError("navigation failed"), None], True)
+        self.assertEqual(navigate.await_count, 2)
+        login.assert_awaited_once()
+        session_store.clear.assert_called_once()
+        session_store.save_state.assert_called_once_with({})
+
+    def test_fresh_login_is_not_repeated(self):
+        with self.assertRaises(DraftKingsUploaderError):
+            self.run_navigation([DraftKingsUploaderError("navigation failed")], False)
+
+
+if __name__ == '__main__':
+    unittest.main()
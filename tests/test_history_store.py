@@ -0,0 +1,71 @@
+"""
+Tests for the rankings history store.
+"""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from history_store import HistoryStore
+
+
+def rankings(rows):
+    return pd.DataFrame(rows, columns=['ID', 'Name', 'Position', 'ADP', 'Team', 'ETR Rank'])
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(os.path.join(self.directory.name, 'history.sqlite3'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rank_comes_from_rank_column_not_row_order(self):
+        self.store.append(rankings([
+            (3, 'C', 'WR', 30.0, 'SF', 237),
+            (1, 'A', 'RB', 1.0, 'SF', 1),
+            (2, 'B', 'QB', 20.0, 'SF', 2),
+        ]), taken_on='2024-08-01')
+        trajectory = self.store.trajectory('3', start='2024-08-01', end='2024-08-01')
+        self.assertEqual(trajectory['rank'].tolist(), [237])
+
+    def test_duplicates_keep_best_rank(self):
+        self.store.append(rankings([
+            (1, 'A', 'RB', 1.0, 'SF', 9),
+            (1, 'A', 'RB', 1.0, 'SF', 4),
+        ]), taken_on='2024-08-01')
+        trajectory = self.store.trajectory('1', start='2024-08-01', end='2024-08-01')
+        self.assertEqual(trajectory['rank'].tolist(), [4])
+
+    def test_consensus_rank_is_preferred(self):
+        df = rankings([(1, 'A', 'RB', 1.0, 'SF', 1), (2, 'B', 'QB', 2.0, 'SF', 2)])
+        df['Consensus Rank'] = [2, 1]
+        self.store.append(df, source='consensus', taken_on='2024-08-01')
+        trajectory = self.store.trajectory('2', source='consensus',
+                                           start='2024-08-01', end='2024-08-01')
+        self.assertEqual(trajectory['rank'].tolist(), [1])
+
+    def test_row_order_without_rank_column(self):
+        df = rankings([(1, 'A', 'RB', 1.0, 'SF', 0), (2, 'B', 'QB', 2.0, 'SF', 0)])
+        self.store.append(df.drop(columns=['ETR Rank']), taken_on='2024-08-01')
+        trajectory = self.store.trajectory('2', start='2024-08-01', end='2024-08-01')
+        self.assertEqual(trajectory['rank'].tolist(), [2])
+
+    def test_movers_and_same_day_replacement(self):
+        self.store.append(rankings([(1, 'A', 'RB', 1.0, 'SF', 1), (2, 'B', 'QB', 2.0, 'SF', 2)]),
+                          taken_on='2024-08-01')
+        self.store.append(rankings([(1, 'A', 'RB', 1.0, 'SF', 1), (2, 'B', 'QB', 2.0, 'SF', 2)]),
+                          taken_on='2024-08-02')
+        self.store.append(rankings([(1, 'A', 'RB', 1.0, 'SF', 2), (2, 'B', 'QB', 2.0, 'SF', 1)]),
+                          taken_on='2024-08-02')
+        self.assertEqual(len(self.store.snapshots()), 2)
+        movers = self.store.movers('2024-08-01', '2024-08-02')
+        self.assertEqual(movers['risers']['player_key'].tolist(), ['2'])
+        self.assertEqual(movers['fallers']['player_key'].tolist(), ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for background notification delivery against a local HTTP endpoint.
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from notifier import HttpSink, Notifier
+
+
+class StandInEndpoint:
+    """HTTP endpoint that records posted batches and answers with scripted status codes."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        self.release = threading.Event()
+        self.release.set()
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                endpoint.release.wait(5)
+                endpoint.requests.append(body)
+                status = endpoint.statuses.pop(0) if endpoint.statuses else 200
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/events'
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def events(self):
+        return [event['n'] for body in self.requests for event in body['events']]
+
+
+class NotifierTest(unittest.TestCase):
+    def endpoint(self, statuses=()):
+        endpoint = StandInEndpoint(statuses)
+        self.addCleanup(endpoint.close)
+        return endpoint
+
+    def notifier(self, endpoint, **kwargs):
+        options = {'batch_window': 0.05, 'retry_delay': 0.01}
+        options.update(kwargs)
+        return Notifier([HttpSink(endpoint.url, timeout=5)], **options)
+
+    def test_delivers_events(self):
+        endpoint = self.endpoint()
+        notifier = self.notifier(endpoint)
+        self.assertTrue(notifier.notify({'n': 1}))
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(endpoint.events(), [1])
+
+    def test_retries_failed_sends(self):
+        endpoint = self.endpoint([500, 503])
+        notifier = self.notifier(endpoint, max_attempts=3)
+        notifier.notify({'n': 1})
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(len(endpoint.requests), 3)
+        self.assertEqual(endpoint.events(), [1, 1, 1])
+
+    def test_drops_batch_after_max_attempts(self):
+        endpoint = self.endpoint([500, 500, 500])
+        notifier = self.notifier(endpoint, max_attempts=2)
+        notifier.notify({'n': 1})
+        with self.assertLogs(level='WARNING') as logs:
+            self.assertTrue(notifier.flush(5))
+        self.assertEqual(len(endpoint.requests), 2)
+        self.assertIn('Dropping 1 notification(s)', '\n'.join(logs.output))
+
+        # The sender keeps working after dropping a batch
+        notifier.notify({'n': 2})
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(endpoint.events()[-1], 2)
+
+    def test_drops_events_when_queue_is_full(self):
+        endpoint = self.endpoint()
+        endpoint.release.clear()
+        notifier = self.notifier(endpoint, queue_size=1, max_batch=1, batch_window=0)
+        self.assertTrue(notifier.notify({'n': 1}))
+        # Wait until the sender is blocked on the first event, leaving the queue empty
+        for _ in range(100):
+            if notifier.queue.qsize() == 0:
+                break
+            threading.Event().wait(0.01)
+        self.assertTrue(notifier.notify({'n': 2}))
+        with self.assertLogs(level='WARNING'):
+            self.assertFalse(notifier.notify({'n': 3}))
+
+        endpoint.release.set()
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(endpoint.events(), [1, 2])
+
+    def test_batches_events(self):
+        endpoint = self.endpoint()
+        endpoint.release.clear()
+        notifier = self.notifier(endpoint, max_batch=3, batch_window=0.2)
+        for n in range(5):
+            notifier.notify({'n': n})
+        endpoint.release.set()
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual([len(body['events']) for body in endpoint.requests], [3, 2])
+        self.assertEqual(endpoint.events(), [0, 1, 2, 3, 4])
+
+    def test_without_sinks_nothing_is_queued(self):
+        self.assertFalse(Notifier([]).notify({'n': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
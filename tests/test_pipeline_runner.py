@@ -0,0 +1,187 @@
+"""
+Tests for stage retries, checkpoints and upload progress.
+"""
+
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from pipeline_runner import (
+    CheckpointStore,
+    PipelineRunner,
+    PipelineStageError,
+    classify_error,
+    ERROR_AUTH,
+    ERROR_OTHER,
+    ERROR_SELECTOR,
+    ERROR_TIMEOUT,
+)
+from draftkings_uploader import DraftKingsAuthError, DraftKingsUploaderError
+from stages import load_upload_state, upload_rankings
+from web_scraper import WebScraperAuthError, WebScraperError
+
+
+class CheckpointStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = CheckpointStore('run', directory=self.directory.name, max_age=60)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.store.save('scrape', {'etr': [{'name': 'A'}]})
+        self.assertEqual(self.store.load('scrape'), {'etr': [{'name': 'A'}]})
+
+    def test_missing(self):
+        self.assertIsNone(self.store.load('scrape'))
+
+    def test_stale_checkpoint_is_ignored(self):
+        self.store.save('scrape', [1])
+        old = time.time() - 120
+        os.utime(os.path.join(self.store.directory, 'scrape.pkl'), (old, old))
+        self.assertIsNone(self.store.load('scrape'))
+
+    def test_unreadable_checkpoint_is_ignored(self):
+        os.makedirs(self.store.directory, exist_ok=True)
+        with open(os.path.join(self.store.directory, 'scrape.pkl'), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(self.store.load('scrape'))
+
+    def test_discard_and_clear(self):
+        self.store.save('scrape', [1])
+        self.store.save('process', [2])
+        self.store.discard('scrape')
+        self.store.discard('missing')
+        self.assertIsNone(self.store.load('scrape'))
+        self.assertEqual(self.store.load('process'), [2])
+        self.store.clear()
+        self.assertIsNone(self.store.load('process'))
+
+
+class UploadStateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = CheckpointStore('run', directory=self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_progress_for_same_rankings_is_kept(self):
+        self.store.save('upload', {'fingerprint': 'a', 'uploaded': ['user1']})
+        self.assertEqual(load_upload_state(self.store, 'a')['uploaded'], ['user1'])
+
+    def test_progress_for_other_rankings_is_discarded(self):
+        self.store.save('upload', {'fingerprint': 'a', 'uploaded': ['user1']})
+        self.assertEqual(load_upload_state(self.store, 'b'), {'fingerprint': 'b', 'uploaded': []})
+
+    def test_progress_without_fingerprint_is_discarded(self):
+        self.store.save('upload', {'uploaded': ['user1']})
+        self.assertEqual(load_upload_state(self.store, 'a')['uploaded'], [])
+
+
+class ClassifyErrorTest(unittest.TestCase):
+    def test_auth_error_in_chain(self):
+        try:
+            try:
+                raise WebScraperAuthError("Login failed")
+            except WebScraperAuthError as e:
+                raise WebScraperError("Scrape failed") from e
+        except WebScraperError as e:
+            self.assertEqual(classify_error(e), ERROR_AUTH)
+
+    def test_playwright_timeouts(self):
+        self.assertEqual(classify_error(PlaywrightTimeoutError("Timeout 30000ms exceeded")),
+                         ERROR_TIMEOUT)
+        waiting = PlaywrightTimeoutError("Timeout 30000ms exceeded.\nwaiting for locator('table')")
+        self.assertEqual(classify_error(waiting), ERROR_SELECTOR)
+
+    def test_message_hints(self):
+        self.assertEqual(classify_error(RuntimeError("request timed out")), ERROR_TIMEOUT)
+        self.assertEqual(classify_error(RuntimeError("selector not found")), ERROR_SELECTOR)
+        self.assertEqual(classify_error(ValueError("bad data")), ERROR_OTHER)
+
+
+class PipelineRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sleeps = []
+        self.runner = PipelineRunner(CheckpointStore('run', directory=self.directory.name),
+                                     base_delay=0.01, sleep=self.sleeps.append)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_retries_then_checkpoints(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("timed out")
+            return 'rows'
+
+        self.assertEqual(self.runner.run_stage('scrape', flaky), 'rows')
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        # A rerun resumes from the checkpoint without calling the stage
+        self.assertEqual(self.runner.run_stage('scrape', lambda: self.fail("not resumed")), 'rows')
+
+    def test_auth_errors_are_not_retried(self):
+        def login():
+            raise WebScraperAuthError("Invalid credentials")
+
+        with self.assertRaises(PipelineStageError) as raised:
+            self.runner.run_stage('scrape', login)
+        self.assertEqual((raised.exception.kind, raised.exception.attempts), (ERROR_AUTH, 1))
+        self.assertEqual(self.sleeps, [])
+
+
+def account_result(username, error=None):
+    return {'username': username, 'success': error is None, 'attempts': 1,
+            'error': None if error is None else str(error), 'exception': error, 'elapsed': 0.0}
+
+
+class MultiAccountUploadTest(unittest.TestCase):
+    """The concurrent uploader retries each account itself, so the runner must not."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.sleeps = []
+        self.checkpoints = CheckpointStore('run', directory=self.directory.name)
+        self.runner = PipelineRunner(self.checkpoints, base_delay=0.01, sleep=self.sleeps.append)
+        self.accounts = [('user1', 'pw'), ('user2', 'pw')]
+
+    def upload(self, results):
+        with mock.patch('async_uploader.upload_rankings_for_accounts',
+                        return_value=results) as uploader:
+            with self.assertRaises(PipelineStageError) as raised:
+                self.runner.run_stage('upload', upload_rankings, self.accounts, b'csv', None,
+                                      self.checkpoints, 'fp', checkpoint=False)
+        return raised.exception, uploader
+
+    def test_rejected_credentials_are_an_auth_failure(self):
+        rejected = DraftKingsAuthError("Login to DraftKings failed. Invalid username or password.")
+        error, uploader = self.upload([account_result('user1'), account_result('user2', rejected)])
+        self.assertEqual((error.kind, error.attempts), (ERROR_AUTH, 1))
+        self.assertIsInstance(error.error, DraftKingsAuthError)
+        uploader.assert_called_once()
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(self.checkpoints.load('upload')['uploaded'], ['user1'])
+
+    def test_failed_accounts_are_not_retried_again(self):
+        timeout = DraftKingsUploaderError("Login to DraftKings timed out. Current URL: x")
+        error, uploader = self.upload([account_result('user1', timeout),
+                                       account_result('user2', timeout)])
+        self.assertEqual((error.kind, error.attempts), (ERROR_TIMEOUT, 1))
+        uploader.assert_called_once()
+        self.assertEqual(self.sleeps, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
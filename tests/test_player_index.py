@@ -0,0 +1,75 @@
+"""
+Tests for the player index used to match scraped players to DraftKings IDs.
+"""
+
+import unittest
+
+from player_index import (
+    PlayerIndex,
+    normalize_name,
+    CONFIDENCE_NAME_POSITION_TEAM as EXACT,
+    CONFIDENCE_NAME_POSITION,
+    CONFIDENCE_NAME,
+)
+
+
+class NormalizeNameTest(unittest.TestCase):
+    def test_punctuation_and_suffixes(self):
+        self.assertEqual(normalize_name('A.J. Brown'), normalize_name('AJ Brown'))
+        self.assertEqual(normalize_name('Kenneth Walker III'), 'kenneth walker')
+        self.assertEqual(normalize_name('Marvin Harrison Jr.'), 'marvin harrison')
+        self.assertEqual(normalize_name('Amon-Ra St. Brown'), 'amon ra st brown')
+
+    def test_missing_name(self):
+        self.assertEqual(normalize_name(None), '')
+        self.assertEqual(normalize_name(float('nan')), '')
+
+
+class PlayerIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = PlayerIndex(
+            [1, 2, 3, 4, 5],
+            ['Mike Williams', 'Mike Williams', 'A.J. Brown', 'Marvin Harrison Jr.', 'Joe Burrow'],
+            ['WR', 'WR', 'WR', 'WR', 'QB'],
+            ['LAC', 'NYJ', 'PHI', 'ARI', 'CIN'],
+        )
+
+    def test_exact_match(self):
+        self.assertEqual(self.index.match('Joe Burrow', 'QB', 'CIN'), (5, EXACT))
+
+    def test_duplicate_name_resolved_by_team(self):
+        self.assertEqual(self.index.match('Mike Williams', 'WR', 'NYJ'), (2, EXACT))
+
+    def test_duplicate_name_on_other_team_is_unmatched(self):
+        self.assertEqual(self.index.match('Mike Williams', 'WR', 'PIT'), (None, 0.0))
+
+    def test_misspelled_duplicate_name_is_unmatched(self):
+        self.assertEqual(self.index.match('Mike Willaims', 'WR', 'PIT'), (None, 0.0))
+
+    def test_suffix_and_punctuation(self):
+        self.assertEqual(self.index.match('AJ Brown', 'WR', 'PHI'), (3, EXACT))
+        self.assertEqual(self.index.match('Marvin Harrison', 'WR', 'ARI'), (4, EXACT))
+
+    def test_traded_player_matches_by_name_and_position(self):
+        self.assertEqual(self.index.match('Joe Burrow', 'QB', 'PIT'), (5, CONFIDENCE_NAME_POSITION))
+
+    def test_position_change_matches_by_name(self):
+        self.assertEqual(self.index.match('Joe Burrow', 'TE', 'CIN'), (5, CONFIDENCE_NAME))
+
+    def test_fuzzy_match_ranks_below_exact_tiers(self):
+        player_id, confidence = self.index.match('Joe Burow', 'QB', 'CIN')
+        self.assertEqual(player_id, 5)
+        self.assertLess(confidence, CONFIDENCE_NAME)
+
+    def test_unknown_player(self):
+        self.assertEqual(self.index.match('Nobody Atall', 'RB', 'SF'), (None, 0.0))
+
+    def test_match_many(self):
+        ids, confidences = self.index.match_many(['Joe Burrow', 'Nobody'], ['QB', 'RB'],
+                                                 ['CIN', 'SF'])
+        self.assertEqual(ids, [5, None])
+        self.assertEqual(confidences, [EXACT, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests that the pandas-free processing path writes the same upload CSV as the pandas path.
+"""
+
+import os
+import csv
+import random
+import unittest
+from unittest import mock
+
+import data_processor
+import player_ranking
+import stages
+from draftkings_uploader import serialize_rankings_csv
+from player_ranking import PlayerRanking, PlayerRankingError, parse_rankings
+from template_repository import get_template_repository
+
+# Cell values that exercise the numeric parsing rules of both paths
+ODD_CELLS = [
+    3, 7.5, True, float('nan'), float('inf'), '', ' ', 'inf', '-inf', '1e3', '.5', '5.', '+4',
+    'WR1', '1_0', '١٢', 'nan', None, '3.25', '-0', '123456.7',
+]
+
+
+def template_rows(count, seed):
+    """Scraped-style rows for players sampled from the default template."""
+    with open(get_template_repository().path(), newline='', encoding='utf-8') as f:
+        players = [(row['Name'], row['Team'], row['Position'], row['ADP'])
+                   for row in csv.DictReader(f)]
+    rng = random.Random(seed)
+    rows = []
+    for rank in range(1, count + 1):
+        name, team, position, adp = rng.choice(players)
+        adp = float(adp) if adp else float(rank)
+        rows.append({
+            'name': f' {name} ', 'team': team, 'position': position, 'etr_rank': str(rank),
+            'etr_pos_rank': str(rank // 4 + 1), 'adp': f'{adp:.1f}',
+            'adp_pos_rank': str(rank // 4 + 1), 'adp_diff': f'{adp - rank:.1f}',
+        })
+    return rows
+
+
+def pandas_csv(rows):
+    processed = data_processor.process_data([dict(row) for row in rows])
+    return serialize_rankings_csv(data_processor.assemble_rankings(processed))
+
+
+class ByteIdentityTest(unittest.TestCase):
+    def assertSameUpload(self, rows):
+        expected = pandas_csv(rows)
+        actual = player_ranking.process_rankings_csv([dict(row) for row in rows])
+        self.assertEqual(actual.decode('utf-8').splitlines(),
+                         expected.decode('utf-8').splitlines())
+        self.assertEqual(actual, expected)
+
+    def test_daily_rankings(self):
+        self.assertSameUpload(template_rows(300, seed=1))
+
+    def test_unmatched_and_duplicate_players(self):
+        rows = template_rows(50, seed=2)
+        rows.append(dict(rows[0], etr_rank='51'))
+        rows.append(dict(rows[1], name='Not A Player', etr_rank='52'))
+        self.assertSameUpload(rows)
+
+    def test_fractional_ranks(self):
+        rows = template_rows(40, seed=3)
+        rows[0]['etr_rank'] = '2.5'
+        self.assertSameUpload(rows)
+
+    def test_odd_cells(self):
+        rng = random.Random(4)
+        for _ in range(10):
+            rows = template_rows(120, seed=5)
+            for row in rows:
+                for field in ('etr_rank', 'etr_pos_rank', 'adp', 'adp_pos_rank', 'adp_diff',
+                              'name', 'team'):
+                    if rng.random() < 0.05:
+                        row[field] = rng.choice(ODD_CELLS)
+                if rng.random() < 0.1:
+                    row['adp'] = repr(rng.uniform(-500, 500))
+            with self.subTest(rows=rows[:3]):
+                self.assertSameUpload(rows)
+
+
+class ProcessScrapedTest(unittest.TestCase):
+    def test_fast_engine_for_a_single_source(self):
+        rows = template_rows(30, seed=6)
+        with mock.patch.dict(os.environ, {'PROCESSING_ENGINE': stages.ENGINE_FAST}), \
+                mock.patch.object(stages, 'process_rankings') as process_rankings:
+            upload = stages.process_scraped({'etr': rows})
+        process_rankings.assert_not_called()
+        self.assertEqual(upload, pandas_csv(rows))
+        self.assertEqual(stages.upload_row_count(upload), len(get_template_repository().get()))
+
+    def test_several_sources_use_pandas(self):
+        scraped = {'etr': template_rows(5, seed=7), 'other': template_rows(5, seed=8)}
+        with mock.patch.dict(os.environ, {'PROCESSING_ENGINE': stages.ENGINE_FAST}), \
+                mock.patch.object(stages, 'process_rankings') as process_rankings:
+            stages.process_scraped(scraped)
+        process_rankings.assert_called_once_with(scraped)
+
+
+class ParseRankingsTest(unittest.TestCase):
+    def test_typed_records(self):
+        records = parse_rankings([{
+            'name': ' Joe Burrow ', 'team': 'CIN', 'position': 'QB', 'etr_rank': '1',
+            'etr_pos_rank': 'QB1', 'adp': '40.1', 'adp_pos_rank': 4, 'adp_diff': '',
+        }])
+        self.assertEqual(records, [PlayerRanking('Joe Burrow', 'CIN', 'QB', 1, None,
+                                                 records[0].adp, 4, None)])
+        self.assertAlmostEqual(records[0].adp, 40.1, places=5)
+
+    def test_missing_columns(self):
+        with self.assertRaises(PlayerRankingError):
+            parse_rankings([{'name': 'Joe Burrow'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Tests for the daemon's change polling, retry backoff and auth lockout guard.
+"""
+
+import unittest
+from contextlib import nullcontext
+from unittest import mock
+
+import scheduler
+import web_scraper
+from pipeline_runner import ERROR_AUTH, ERROR_TIMEOUT
+
+CONFIG = {
+    'PRELOGIN_TIME': '08:50',
+    'POLL_START': '00:00',
+    'POLL_END': '23:59',
+    'POLL_INTERVAL': 60,
+    'MAX_RETRY_BACKOFF': 600,
+    'RUN_TIME': '09:30',
+    'HEADLESS': True,
+}
+
+
+def result(success, error_kind=None):
+    return {'success': success, 'failed_stage': None if success else 'scrape',
+            'error': None if success else 'boom', 'error_kind': error_kind}
+
+
+class RankingsFingerprintTest(unittest.TestCase):
+    def test_changes_with_any_cell(self):
+        rows = [{'name': 'A', 'etr_rank': '1'}, {'name': 'B', 'etr_rank': '2'}]
+        changed = [{'name': 'A', 'etr_rank': '1'}, {'name': 'B', 'etr_rank': '3'}]
+        self.assertEqual(scheduler.rankings_fingerprint(rows),
+                         scheduler.rankings_fingerprint([dict(row) for row in rows]))
+        self.assertNotEqual(scheduler.rankings_fingerprint(rows),
+                            scheduler.rankings_fingerprint(changed))
+
+
+class RankingsDaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.daemon = scheduler.RankingsDaemon(config=dict(CONFIG), browser_pool=mock.Mock())
+        self.daemon.rankings_changed = mock.Mock(return_value=True)
+
+    def poll(self, run_result):
+        with mock.patch.object(scheduler, 'run_once', return_value=run_result) as run_once:
+            self.daemon.poll()
+        return run_once
+
+    def test_success_commits_the_fingerprint(self):
+        self.daemon.pending_fingerprint = 'abc'
+        run_once = self.poll(result(True))
+        run_once.assert_called_once_with(browser_pool=self.daemon.browser_pool, fresh=True,
+                                         scraped=None)
+        self.assertEqual(self.daemon.last_fingerprint, 'abc')
+        self.assertEqual(self.daemon.failed_runs, 0)
+
+    def test_failed_run_backs_off(self):
+        self.daemon.pending_fingerprint = 'abc'
+        self.poll(result(False, ERROR_TIMEOUT))
+        self.assertEqual(self.daemon.failed_runs, 1)
+        self.assertIsNone(self.daemon.last_fingerprint)
+
+        # The next poll is inside the backoff and does not check or run
+        run_once = self.poll(result(True))
+        run_once.assert_not_called()
+        self.assertEqual(self.daemon.rankings_changed.call_count, 1)
+
+        self.daemon.retry_at = 0.0
+        run_once = self.poll(result(True))
+        run_once.assert_called_once()
+        self.assertEqual(self.daemon.failed_runs, 0)
+
+    def test_backoff_is_capped(self):
+        self.daemon.failed_runs = 20
+        with mock.patch.object(scheduler, 'run_once', return_value=result(False, ERROR_TIMEOUT)), \
+                mock.patch.object(scheduler.time, 'monotonic', return_value=1000.0):
+            self.daemon.run_pipeline()
+        self.assertLessEqual(self.daemon.retry_at, 1000.0 + 1.5 * CONFIG['MAX_RETRY_BACKOFF'])
+
+    def test_auth_error_stops_polling_and_runs(self):
+        self.poll(result(False, ERROR_AUTH))
+        self.assertIsNotNone(self.daemon.auth_failed_date)
+
+        run_once = self.poll(result(True))
+        run_once.assert_not_called()
+        with mock.patch.object(scheduler, 'run_once') as run_once:
+            self.daemon.scheduled_run()
+        run_once.assert_not_called()
+
+    def test_auth_error_while_polling_stops_polling(self):
+        self.daemon.rankings_changed.side_effect = web_scraper.WebScraperAuthError("rejected")
+        run_once = self.poll(result(True))
+        run_once.assert_not_called()
+        self.assertIsNotNone(self.daemon.auth_failed_date)
+
+        self.poll(result(True))
+        self.assertEqual(self.daemon.rankings_changed.call_count, 1)
+
+    def test_unchanged_rankings_do_not_run(self):
+        self.daemon.rankings_changed.return_value = False
+        run_once = self.poll(result(True))
+        run_once.assert_not_called()
+
+    def test_polled_rows_are_handed_to_the_run(self):
+        self.daemon.polled_rankings = ROWS
+        etr = mock.Mock()
+        etr.name = 'etr'
+        with mock.patch.object(scheduler, 'configured_sources', return_value=[etr]):
+            run_once = self.poll(result(True))
+        self.assertEqual(run_once.call_args.kwargs['scraped'], {'etr': ROWS})
+
+    def test_several_sources_scrape_again(self):
+        self.daemon.polled_rankings = ROWS
+        etr, other = mock.Mock(), mock.Mock()
+        etr.name, other.name = 'etr', 'other'
+        with mock.patch.object(scheduler, 'configured_sources', return_value=[etr, other]):
+            run_once = self.poll(result(True))
+        self.assertIsNone(run_once.call_args.kwargs['scraped'])
+
+
+ROWS = [{'name': 'A', 'etr_rank': '1'}, {'name': 'B', 'etr_rank': '2'}]
+ENDPOINT = {'url': 'https://example.com/admin-ajax.php?ninja_tables', 'etag': '"v1"',
+            'last_modified': None}
+
+
+class RankingsChangedTest(unittest.TestCase):
+    def setUp(self):
+        pool = mock.Mock()
+        pool.context.return_value = nullcontext(mock.Mock())
+        self.daemon = scheduler.RankingsDaemon(config=dict(CONFIG), browser_pool=pool)
+        self.daemon._fetch_rankings_page = mock.Mock(return_value=ROWS)
+
+    def fetch_ninja_table(self, **kwargs):
+        return mock.patch.object(scheduler.web_scraper, 'fetch_ninja_table', **kwargs)
+
+    def test_first_poll_loads_the_page(self):
+        with self.fetch_ninja_table() as fetch:
+            self.assertTrue(self.daemon.rankings_changed())
+        fetch.assert_not_called()
+        self.assertEqual(self.daemon.polled_rankings, ROWS)
+
+    def test_not_modified_skips_the_page(self):
+        self.daemon.endpoint = ENDPOINT
+        self.daemon.polled_rankings = ROWS
+        self.daemon.last_fingerprint = scheduler.rankings_fingerprint(ROWS)
+        with self.fetch_ninja_table(return_value=(None, ENDPOINT)):
+            self.assertFalse(self.daemon.rankings_changed())
+        self.daemon._fetch_rankings_page.assert_not_called()
+
+    def test_not_modified_after_a_failed_run_still_reports_the_change(self):
+        self.daemon.endpoint = ENDPOINT
+        self.daemon.polled_rankings = ROWS
+        with self.fetch_ninja_table(return_value=(None, ENDPOINT)):
+            self.assertTrue(self.daemon.rankings_changed())
+        self.daemon._fetch_rankings_page.assert_not_called()
+
+    def test_changed_rows_come_from_the_endpoint(self):
+        changed = [dict(ROWS[0], etr_rank='2'), dict(ROWS[1], etr_rank='1')]
+        self.daemon.endpoint = ENDPOINT
+        self.daemon.polled_rankings = ROWS
+        self.daemon.last_fingerprint = scheduler.rankings_fingerprint(ROWS)
+        updated = dict(ENDPOINT, etag='"v2"')
+        with self.fetch_ninja_table(return_value=(changed, updated)):
+            self.assertTrue(self.daemon.rankings_changed())
+        self.assertEqual(self.daemon.polled_rankings, changed)
+        self.assertEqual(self.daemon.endpoint, updated)
+        self.daemon._fetch_rankings_page.assert_not_called()
+
+    def test_failed_request_falls_back_to_the_page(self):
+        self.daemon.endpoint = ENDPOINT
+        self.daemon.polled_rankings = ROWS
+        error = scheduler.web_scraper.WebScraperError("HTTP 403")
+        with self.fetch_ninja_table(side_effect=error):
+            self.daemon.rankings_changed()
+        self.daemon._fetch_rankings_page.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the encrypted on-disk session store.
+"""
+
+import os
+import stat
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from cryptography.fernet import Fernet
+
+from session_store import SessionStore, KEY_FILE_NAME
+
+STATE = {'cookies': [{'name': 'session', 'value': 'abc', 'expires': -1}], 'origins': []}
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = os.path.join(tmp.name, 'sessions')
+        env = mock.patch.dict(os.environ)
+        env.start()
+        self.addCleanup(env.stop)
+        os.environ.pop('SESSION_STORE_KEY', None)
+
+    def store(self, max_age=3600):
+        return SessionStore('draftkings', directory=self.directory, max_age=max_age)
+
+    def test_saved_session_round_trips_encrypted(self):
+        self.store().save_state(STATE)
+        with open(self.store().path, 'rb') as f:
+            self.assertNotIn(b'abc', f.read())
+        self.assertEqual(self.store().load(), STATE)
+
+    def test_missing_session(self):
+        self.assertIsNone(self.store().load())
+
+    def test_session_older_than_max_age_is_cleared(self):
+        store = self.store(max_age=60)
+        store.save_state(STATE)
+        with mock.patch('session_store.time.time', return_value=time.time() + 61), \
+                self.assertLogs(level='INFO'):
+            self.assertIsNone(store.load())
+        self.assertFalse(os.path.exists(store.path))
+
+    def test_expired_persistent_cookie_clears_the_session(self):
+        store = self.store()
+        cookies = STATE['cookies'] + [{'name': 'auth', 'expires': time.time() - 1}]
+        store.save_state(dict(STATE, cookies=cookies))
+        with self.assertLogs(level='INFO'):
+            self.assertIsNone(store.load())
+        self.assertFalse(os.path.exists(store.path))
+
+    def test_unreadable_sessions_are_cleared(self):
+        key = Fernet.generate_key()
+        tokens = {
+            'corrupt': b'not a fernet token',
+            'other key': Fernet(Fernet.generate_key()).encrypt(json.dumps({}).encode()),
+            'not json': Fernet(key).encrypt(b'{'),
+            'not a record': Fernet(key).encrypt(b'[]'),
+        }
+        os.environ['SESSION_STORE_KEY'] = key.decode()
+        for name, token in tokens.items():
+            with self.subTest(name):
+                store = self.store()
+                os.makedirs(self.directory, exist_ok=True)
+                with open(store.path, 'wb') as f:
+                    f.write(token)
+                with self.assertLogs(level='WARNING'):
+                    self.assertIsNone(store.load())
+                self.assertFalse(os.path.exists(store.path))
+
+    def test_unusable_key_file_discards_the_session(self):
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, KEY_FILE_NAME), 'wb') as f:
+            f.write(b'not a key')
+        store = self.store()
+        with open(store.path, 'wb') as f:
+            f.write(b'token')
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(store.load())
+            # Saving without a key only costs a login on the next run
+            store.save_state(STATE)
+        self.assertFalse(os.path.exists(store.path))
+
+    def test_generated_key_and_session_are_owner_only(self):
+        store = self.store()
+        store.save_state(STATE)
+        key_path = os.path.join(self.directory, KEY_FILE_NAME)
+        self.assertEqual(mode(self.directory), 0o700)
+        self.assertEqual(mode(key_path), 0o600)
+        self.assertEqual(mode(store.path), 0o600)
+        # The generated key is reused by later stores
+        self.assertEqual(self.store().load(), STATE)
+
+    def test_environment_key_takes_precedence(self):
+        key = Fernet.generate_key()
+        os.environ['SESSION_STORE_KEY'] = key.decode()
+        store = self.store()
+        store.save_state(STATE)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, KEY_FILE_NAME)))
+        with open(store.path, 'rb') as f:
+            self.assertEqual(json.loads(Fernet(key).decrypt(f.read()))['state'], STATE)
+
+
+if __name__ == '__main__':
+    unittest.main()
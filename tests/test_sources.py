@@ -0,0 +1,83 @@
+"""
+Tests for scraping several rankings sources in parallel.
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+from playwright.sync_api import Error as PlaywrightError
+
+import sources
+import stages
+from sources import RankingSource, scrape_sources
+from web_scraper import WebScraperError
+
+ROWS = [{'name': 'A', 'etr_rank': '1'}]
+
+
+def source(name):
+    return RankingSource(name, f'https://example.com/{name}')
+
+
+class ScrapeSourcesTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sources, 'BrowserPool')
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self, outcomes, names):
+        """Scrape names, where outcomes maps a source name to rows or an exception."""
+        threads = set()
+
+        def scrape_source(source, pool):
+            threads.add(threading.get_ident())
+            outcome = outcomes[source.name]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with mock.patch.object(sources, 'scrape_source', side_effect=scrape_source):
+            scraped = scrape_sources([source(name) for name in names])
+        return scraped, threads
+
+    def test_every_source_gets_its_own_browser_and_thread(self):
+        scraped, threads = self.scrape({'a': ROWS, 'b': ROWS}, ['a', 'b'])
+        self.assertEqual(scraped, {'a': ROWS, 'b': ROWS})
+        self.assertEqual(self.pool.call_count, 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_a_failing_source_does_not_stop_the_others(self):
+        outcomes = {'a': ROWS, 'b': WebScraperError("login failed"),
+                    'c': PlaywrightError("browser closed"), 'd': RuntimeError("bug")}
+        with self.assertLogs(level='ERROR') as logs:
+            scraped, _ = self.scrape(outcomes, ['a', 'b', 'c', 'd'])
+        self.assertEqual(scraped, {'a': ROWS, 'b': None, 'c': None, 'd': None})
+        self.assertEqual(len(logs.output), 3)
+
+    def test_browser_launch_failure_is_isolated(self):
+        self.pool.side_effect = [mock.MagicMock(), PlaywrightError("launch failed")]
+        with mock.patch.object(sources, 'scrape_source', return_value=ROWS), \
+                self.assertLogs(level='ERROR'):
+            scraped = scrape_sources([source('a'), source('b')], max_workers=1)
+        self.assertEqual(scraped, {'a': ROWS, 'b': None})
+
+
+class ScrapeRankingsStageTest(unittest.TestCase):
+    def scrape(self, scraped):
+        configured = [source('etr'), source('other')]
+        with mock.patch.object(sources, 'configured_sources', return_value=configured), \
+                mock.patch.object(sources, 'scrape_sources', return_value=scraped):
+            return stages.scrape_rankings(browser_pool=None)
+
+    def test_failed_sources_are_dropped(self):
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(self.scrape({'etr': ROWS, 'other': None}), {'etr': ROWS})
+
+    def test_no_source_is_an_error(self):
+        with self.assertLogs(level='WARNING'), self.assertRaises(WebScraperError):
+            self.scrape({'etr': None, 'other': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
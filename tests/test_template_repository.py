@@ -0,0 +1,103 @@
+"""
+Tests for loading, caching and reloading DraftKings templates.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import template_repository
+from template_repository import TemplateRepository, TemplateRepositoryError
+
+TEMPLATE_CSV = """ID,Name,Position,ADP,Team,,Instructions
+10,Christian McCaffrey,RB,1.3,SF,,Rank players
+20,CeeDee Lamb,WR,2.7,DAL,,
+"""
+
+
+class TemplateRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'template.csv')
+        self.cache_dir = os.path.join(directory.name, 'cache')
+        self.write(TEMPLATE_CSV)
+
+    def write(self, text, mtime=None):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def repository(self):
+        return TemplateRepository(templates={'test': self.path}, cache_dir=self.cache_dir)
+
+    def parses(self, repository):
+        """Return the template and whether it was parsed from CSV rather than the cache."""
+        with self.assertLogs(level='INFO') as logs:
+            frame = repository.get('test')
+        return frame, any('Parsed template CSV' in line for line in logs.output)
+
+    def test_loaded_once_per_process(self):
+        repository = self.repository()
+        frame, parsed = self.parses(repository)
+        self.assertTrue(parsed)
+        self.assertEqual(frame['ID'].tolist(), [10, 20])
+        self.assertEqual(list(frame.columns), template_repository.TEMPLATE_COLUMNS)
+        self.assertIs(repository.get('test'), frame)
+
+    def test_pickle_cache_is_reused_by_a_new_process(self):
+        self.parses(self.repository())
+        frame, parsed = self.parses(self.repository())
+        self.assertFalse(parsed)
+        self.assertEqual(frame['Name'].tolist(), ['Christian McCaffrey', 'CeeDee Lamb'])
+
+    def test_changed_file_is_reloaded(self):
+        repository = self.repository()
+        self.write(TEMPLATE_CSV, mtime=1_000_000)
+        self.parses(repository)
+        # Same size, new mtime and content
+        self.write(TEMPLATE_CSV.replace('1.3', '1.4'), mtime=2_000_000)
+        frame, parsed = self.parses(repository)
+        self.assertTrue(parsed)
+        self.assertAlmostEqual(float(frame['ADP'].iloc[0]), 1.4, places=5)
+        # Same mtime, new size
+        self.write(TEMPLATE_CSV + '30,Tyreek Hill,WR,3.1,MIA,,\n', mtime=2_000_000)
+        frame, parsed = self.parses(repository)
+        self.assertTrue(parsed)
+        self.assertEqual(len(frame), 3)
+
+    def test_schema_change_skips_the_old_cache(self):
+        self.parses(self.repository())
+        dtypes = dict(template_repository.TEMPLATE_DTYPES, ADP='float64')
+        with mock.patch.object(template_repository, 'TEMPLATE_DTYPES', dtypes):
+            frame, parsed = self.parses(self.repository())
+        self.assertTrue(parsed)
+        self.assertEqual(frame['ADP'].dtype, 'float64')
+        with mock.patch.object(template_repository, 'CACHE_VERSION',
+                               template_repository.CACHE_VERSION + 1):
+            self.assertTrue(self.parses(self.repository())[1])
+        # The original schema still finds its own cache
+        self.assertFalse(self.parses(self.repository())[1])
+
+    def test_unreadable_cache_is_ignored(self):
+        self.parses(self.repository())
+        for name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, name), 'wb') as f:
+                f.write(b'not a pickle')
+        frame, parsed = self.parses(self.repository())
+        self.assertTrue(parsed)
+        self.assertEqual(len(frame), 2)
+
+    def test_unknown_and_missing_templates(self):
+        repository = self.repository()
+        with self.assertRaises(TemplateRepositoryError):
+            repository.get('other')
+        os.remove(self.path)
+        with self.assertRaises(TemplateRepositoryError):
+            repository.get('test')
+
+
+if __name__ == '__main__':
+    unittest.main()
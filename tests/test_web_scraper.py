@@ -0,0 +1,179 @@
+"""
+Tests for parsing and fetching the ninja-tables rankings payload.
+"""
+
+import unittest
+from unittest import mock
+
+import web_scraper
+from web_scraper import (
+    WebScraperError,
+    fetch_ninja_table,
+    fetch_player_rankings,
+    parse_ninja_table_payload,
+)
+
+
+def ninja_row(**overrides):
+    value = {
+        '___id___': 1,
+        'player': '<a href="/p/ja-marr-chase">Ja&#039;Marr Chase</a>',
+        'team': 'CIN',
+        'pos': 'WR',
+        'etr_rank': '1',
+        'etr_pos_rank': '1',
+        'adp': '1.4',
+        'adp_pos_rank': '1',
+        'adp_diff': '0.4',
+    }
+    value.update(overrides)
+    return {'value': value}
+
+
+class ParseNinjaTablePayloadTest(unittest.TestCase):
+    def test_maps_cells_by_column_key(self):
+        # Key order must not matter
+        row = ninja_row()
+        row['value'] = dict(reversed(list(row['value'].items())))
+        players = parse_ninja_table_payload([row])
+        self.assertEqual(players, [{
+            'name': "Ja'Marr Chase", 'team': 'CIN', 'position': 'WR', 'etr_rank': '1',
+            'etr_pos_rank': '1', 'adp': '1.4', 'adp_pos_rank': '1', 'adp_diff': '0.4',
+        }])
+
+    def test_accepts_unwrapped_rows_and_data_key(self):
+        players = parse_ninja_table_payload({'data': [ninja_row()['value']]})
+        self.assertEqual(players[0]['position'], 'WR')
+
+    def test_missing_cells_are_empty(self):
+        players = parse_ninja_table_payload([ninja_row(adp=None)])
+        self.assertEqual(players[0]['adp'], '')
+
+    def test_rejects_unexpected_column(self):
+        with self.assertRaisesRegex(WebScraperError, 'unexpected bye_week'):
+            parse_ninja_table_payload([ninja_row(bye_week='10')])
+
+    def test_rejects_missing_column(self):
+        row = ninja_row()
+        del row['value']['pos']
+        with self.assertRaisesRegex(WebScraperError, 'missing pos'):
+            parse_ninja_table_payload([row])
+
+    def test_rejects_positional_rows(self):
+        with self.assertRaisesRegex(WebScraperError, 'row 1: list'):
+            parse_ninja_table_payload([["Ja'Marr Chase", 'CIN', 'WR', '1', '1', '1.4', '1', '0.4']])
+
+    def test_rejects_payload_without_rows(self):
+        with self.assertRaises(WebScraperError):
+            parse_ninja_table_payload({'rows': []})
+
+
+class FakeResponse:
+    url = 'https://example.com/wp-admin/admin-ajax.php?action=wp_ajax_ninja_tables_public_action'
+    ok = True
+
+    def json(self):
+        return [ninja_row()]
+
+
+class FakePage:
+    """Page stand-in whose table renders after `render_after` waits, with or without AJAX."""
+
+    def __init__(self, ajax, render_after=2):
+        self.ajax = ajax
+        self.render_after = render_after
+        self.waits = 0
+        self.listeners = []
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    def goto(self, url):
+        pass
+
+    def wait_for_timeout(self, timeout):
+        self.waits += 1
+        if self.ajax and self.waits == self.render_after:
+            for handler in list(self.listeners):
+                handler(FakeResponse())
+
+    def query_selector(self, selector):
+        return object() if self.waits >= self.render_after else None
+
+    def wait_for_selector(self, selector):
+        pass
+
+    def evaluate(self, script, selector):
+        return [{'name': 'From DOM'}]
+
+
+class FetchPlayerRankingsTest(unittest.TestCase):
+    def test_auto_mode_uses_the_payload(self):
+        page = FakePage(ajax=True)
+        players = fetch_player_rankings(page, 'https://example.com/rankings')
+        self.assertEqual(players[0]['name'], "Ja'Marr Chase")
+        self.assertEqual(page.listeners, [])
+
+    def test_auto_mode_falls_back_once_the_table_renders_without_ajax(self):
+        page = FakePage(ajax=False)
+        with mock.patch.object(web_scraper, 'TABLE_RENDER_GRACE', 0):
+            players = fetch_player_rankings(page, 'https://example.com/rankings')
+        self.assertEqual(players, [{'name': 'From DOM'}])
+        # Returned as soon as the table rendered, not after NETWORK_CAPTURE_TIMEOUT
+        self.assertLessEqual(page.waits, page.render_after + 1)
+
+
+class FakeRequest:
+    """APIRequestContext stand-in answering every GET with one canned response."""
+
+    def __init__(self, status, body=None, headers=None):
+        self.response = mock.Mock(status=status, ok=200 <= status < 300, headers=headers or {})
+        self.response.json.side_effect = (ValueError("not JSON") if body is None
+                                          else lambda: body)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append((url, headers))
+        return self.response
+
+
+class FetchNinjaTableTest(unittest.TestCase):
+    endpoint = {'url': FakeResponse.url, 'etag': '"v1"',
+                'last_modified': 'Mon, 01 Jul 2024 13:00:00 GMT'}
+
+    def test_request_is_conditional_and_not_modified_returns_none(self):
+        request = FakeRequest(304)
+        rows, endpoint = fetch_ninja_table(request, self.endpoint)
+        self.assertIsNone(rows)
+        self.assertEqual(endpoint, self.endpoint)
+        self.assertEqual(request.calls, [(FakeResponse.url, {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jul 2024 13:00:00 GMT',
+        })])
+        request.response.dispose.assert_called_once()
+
+    def test_changed_table_returns_rows_and_new_validators(self):
+        request = FakeRequest(200, [ninja_row()], headers={'etag': '"v2"'})
+        rows, endpoint = fetch_ninja_table(request, self.endpoint)
+        self.assertEqual(rows[0]['name'], "Ja'Marr Chase")
+        self.assertEqual(endpoint, {'url': FakeResponse.url, 'etag': '"v2"',
+                                    'last_modified': None})
+
+    def test_no_validators_sends_a_plain_request(self):
+        request = FakeRequest(200, [ninja_row()])
+        fetch_ninja_table(request, {'url': FakeResponse.url, 'etag': None,
+                                    'last_modified': None})
+        self.assertEqual(request.calls, [(FakeResponse.url, {})])
+
+    def test_unusable_responses_raise(self):
+        # An expired nonce answers 403 or "-1", and a lost session the login page
+        for request in (FakeRequest(403), FakeRequest(200, -1), FakeRequest(200)):
+            with self.assertRaises(WebScraperError):
+                fetch_ninja_table(request, self.endpoint)
+            request.response.dispose.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()